@@ -15,15 +15,41 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    from .uploads import UploadRequest
+    app.request_class = UploadRequest  # File parts stream straight to the upload folder
+
     db.init_app(app)
     migrate.init_app(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
-    CORS(app, resources={r"/api/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000", "http://127.0.0.1:3000"]}}, supports_credentials=True)
+    CORS(app, resources={r"/api/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173", "http://localhost:3000", "http://127.0.0.1:3000"]}}, supports_credentials=True, expose_headers=['X-Next-Cursor', 'Link', 'ETag'])
 
     from . import routes
     app.register_blueprint(routes.api_bp, url_prefix='/api')
 
     from . import models
+    from . import events, extraction, extraction_cache, job_changes, job_stats, metrics, pools, scorer, serialization
+    # Session listeners, in this order: the job's change counter is bumped,
+    # locking its row, before its aggregates and events are written
+    job_changes.register_listeners()
+    job_stats.register_listeners()
+    events.register_listeners()
+    metrics.init_app(app)
+    pools.init_app(app)
+    serialization.init_app(app)
+    events.init_app(app)
+    extraction.init_app(app)
+    extraction_cache.init_app(app)
+    scorer.init_app(app)
+    from . import job_profile
+    job_profile.init_app(app)
+    from . import vector_index
+    vector_index.init_app(app)
+    from . import tasks
+    tasks.init_app(app)
+
+    if app.config['WORKER_AUTOSTART']:
+        from .worker import start_workers
+        start_workers(app)
 
     return app
@@ -0,0 +1,326 @@
+"""
+Bulk resume ingest: many files and/or ZIP archives in a single request.
+
+Uploaded files arrive already on disk in the upload folder (app/uploads.py)
+and are renamed into content-addressed storage; ZIP members are streamed
+straight from the archive. Files seen before are scored from their
+stored extraction; new ones are extracted once each, in parallel on a process
+pool, and parsed in nlp.pipe batches. Candidates are inserted with a single
+bulk INSERT as 'processing' and committed before anything is scored, so the
+upload only holds storage.storing() while its rows are written; the results
+are saved onto them afterwards.
+"""
+import os
+import zipfile
+from datetime import datetime
+from itertools import repeat
+from types import SimpleNamespace
+
+from werkzeug.utils import secure_filename
+from sqlalchemy import insert, update
+from . import db, events, job_changes, job_stats, storage, vector_index
+from .extraction import UnsupportedFileType, check_supported
+from .job_profile import get_job_profile
+from .models import Candidate, ResumeFile
+from .pools import get_process_pool
+from .scorer import process_resumes, score_resume
+from .vectors import pack_vector
+
+IN_CHUNK_SIZE = 500  # Ids per IN (...) list, well under SQLite's bound parameter limit
+
+
+def pool_size(config):
+    return config.get('BATCH_WORKERS') or os.cpu_count() or 1
+
+
+def job_snapshot(job):
+    """A picklable copy of the job fields the scorer needs."""
+    return SimpleNamespace(
+        id=job.id,
+        description=job.description,
+        required_skills=list(job.required_skills or ()),
+        preferred_skills=list(job.preferred_skills or ()),
+        min_experience=job.min_experience,
+        score_weights=dict(job.score_weights or {})
+    )
+
+
+def _is_archive(filename):
+    return filename.lower().endswith('.zip')
+
+
+def save_uploads(files, upload_folder, allowed_file, max_files, max_file_size, entries=None):
+    """
+    Writes the uploaded files (expanding ZIP archives) to content-addressed
+    storage.
+
+    Returns a list of manifest entries; entries with a 'file_path' are ready
+    to be scored, the others (including files of a type no extractor handles)
+    carry an 'error' and are skipped. Entries are appended to the given list,
+    if any, so the caller still sees what was stored when this raises.
+    """
+    entries = [] if entries is None else entries
+
+    def add_entry(original_filename, source):
+        if len(entries) >= max_files:
+            entries.append({'filename': original_filename, 'status': 'skipped',
+                            'error': f'Batch limit of {max_files} files reached'})
+            return
+        if not allowed_file(original_filename):
+            entries.append({'filename': original_filename, 'status': 'skipped',
+                            'error': 'Invalid file type'})
+            return
+        if getattr(source, 'too_large', False):
+            # Drained while streaming, never stored
+            entries.append({'filename': original_filename, 'status': 'skipped',
+                            'error': 'File too large'})
+            return
+
+        ext = os.path.splitext(secure_filename(original_filename))[1]
+        sha256, filepath, size = storage.store_file(source, upload_folder, ext)
+        try:
+            check_supported(filepath)
+        except UnsupportedFileType as e:
+            storage.discard_file(sha256, filepath)
+            entries.append({'filename': original_filename, 'status': 'skipped', 'error': str(e)})
+            return
+        entries.append({
+            'filename': original_filename,
+            'stored_filename': os.path.basename(filepath),
+            'file_path': filepath,
+            'sha256': sha256,
+            'size': size
+        })
+
+    for file in files:
+        if not file or file.filename == '':
+            continue
+
+        if not _is_archive(file.filename):
+            add_entry(file.filename, file.stream)
+            continue
+
+        try:
+            # The spooled upload is seekable, so members are read straight from it
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    name = os.path.basename(member.filename)
+                    if member.is_dir() or not name or name.startswith('.') \
+                            or member.filename.startswith('__MACOSX/'):
+                        continue
+                    if member.file_size > max_file_size:
+                        entries.append({'filename': name, 'status': 'skipped',
+                                        'error': 'File too large'})
+                        continue
+                    with archive.open(member) as source:
+                        add_entry(name, source)
+        except zipfile.BadZipFile:
+            entries.append({'filename': file.filename, 'status': 'skipped',
+                            'error': 'Invalid ZIP archive'})
+
+    return entries
+
+
+def attach_resume_files(entries, job_id):
+    """
+    Links every saved entry to its shared ResumeFile and flags files that are
+    already on the job (or appear twice in this batch) as duplicates.
+    """
+    saved = [entry for entry in entries if 'file_path' in entry]
+    if not saved:
+        return {}
+
+    hashes = {entry['sha256'] for entry in saved}
+    resume_files = {
+        resume_file.sha256: resume_file
+        for resume_file in ResumeFile.query.filter(ResumeFile.sha256.in_(hashes)).all()
+    }
+    for entry in saved:
+        if entry['sha256'] not in resume_files:
+            resume_files[entry['sha256']] = storage.get_or_create_resume_file(
+                entry['sha256'], entry['file_path'], entry['size']
+            )
+    db.session.flush()
+
+    # First existing candidate per file on this job
+    file_ids = [resume_file.id for resume_file in resume_files.values()]
+    existing = dict(db.session.query(
+        Candidate.resume_file_id, db.func.min(Candidate.id)
+    ).filter(
+        Candidate.job_id == job_id,
+        Candidate.resume_file_id.in_(file_ids)
+    ).group_by(Candidate.resume_file_id).all())
+
+    seen = set()
+    for entry in saved:
+        resume_file = resume_files[entry['sha256']]
+        entry['resume_file_id'] = resume_file.id
+        entry['duplicate_of'] = existing.get(resume_file.id)
+        entry['duplicate'] = entry['duplicate_of'] is not None or resume_file.id in seen
+        seen.add(resume_file.id)
+    return resume_files
+
+
+def score_entries(entries, job, config):
+    """
+    Scores every saved entry. Files extracted before are scored from their
+    stored features; each new file is extracted once, across the process pool.
+    """
+    saved = [entry for entry in entries if 'file_path' in entry]
+    if not saved:
+        return
+
+    file_ids = sorted({entry['resume_file_id'] for entry in saved})
+    resume_files = {}
+    for start in range(0, len(file_ids), IN_CHUNK_SIZE):
+        for resume_file in ResumeFile.query.filter(ResumeFile.id.in_(file_ids[start:start + IN_CHUNK_SIZE])):
+            resume_files[resume_file.sha256] = resume_file
+
+    job_profile = get_job_profile(job)
+    pending = {}
+    for entry in saved:
+        resume_file = resume_files.get(entry['sha256'])
+        if resume_file is None:
+            continue  # Reaped with a job deleted since the upload committed
+        features = storage.stored_features(resume_file)
+        if features is not None:
+            resume_text, resume_vector, resume_terms = features
+            entry['result'] = {
+                'resume_text': resume_text,
+                'resume_terms': resume_file.resume_terms,
+                'name': resume_file.name or 'Unknown',
+                **score_resume(resume_text, resume_vector, resume_terms, job, job_profile)
+            }
+            entry['packed_vector'] = resume_file.resume_vector
+        else:
+            pending.setdefault(entry['sha256'], []).append(entry)
+    if not pending:
+        return
+
+    pool = get_process_pool(pool_size(config), config.get('BATCH_MP_CONTEXT'))
+    hashes = list(pending)
+    paths = [pending[sha256][0]['file_path'] for sha256 in hashes]
+    # Each pool task extracts a group of files and parses them with one nlp.pipe
+    # call; groups are small enough to keep every worker busy
+    group_size = max(1, min(config['NLP_BATCH_SIZE'], -(-len(paths) // pool_size(config))))
+    starts = range(0, len(paths), group_size)
+    groups = [paths[start:start + group_size] for start in starts]
+    hash_groups = [hashes[start:start + group_size] for start in starts]
+    # The job profile is built (or fetched) once here and shipped to every child
+    results = [
+        result
+        for group in pool.map(process_resumes, groups, repeat(job_snapshot(job)), repeat(job_profile), hash_groups)
+        for result in group
+    ]
+
+    for sha256, result in zip(hashes, results):
+        packed_vector = pack_vector(result.get('resume_vector'))
+        if 'error' not in result:
+            storage.record_extraction(resume_files[sha256], result, packed_vector)
+        for entry in pending[sha256]:
+            entry['result'] = result
+            entry['packed_vector'] = packed_vector
+
+
+def insert_candidates(entries, job_id, user_id):
+    """
+    Inserts one 'processing' Candidate per saved entry with a single bulk
+    INSERT and commits, so the files are in use before they are scored;
+    save_results() fills the candidates in.
+    """
+    saved = [entry for entry in entries if 'file_path' in entry]
+    rows = [{
+        'original_filename': secure_filename(entry['filename']),
+        'filename': entry['stored_filename'],
+        'file_path': entry['file_path'],
+        'job_id': job_id,
+        'user_id': user_id,
+        'status': 'processing',
+        'resume_file_id': entry['resume_file_id'],
+        'duplicate_of_id': entry['duplicate_of']
+    } for entry in saved]
+    if not rows:
+        db.session.commit()
+        return
+
+    ids = db.session.scalars(
+        insert(Candidate).returning(Candidate.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+
+    # Repeats within this batch point at the first copy inserted
+    first_ids = {}
+    repeats = []
+    for entry, candidate_id in zip(saved, ids):
+        first_id = first_ids.setdefault(entry['resume_file_id'], candidate_id)
+        if entry['duplicate_of'] is None and first_id != candidate_id:
+            entry['duplicate_of'] = first_id
+            repeats.append({'id': candidate_id, 'duplicate_of_id': first_id})
+    if repeats:
+        db.session.execute(update(Candidate), repeats)
+    job_changes.touch(job_id)
+    uploaded_at = datetime.utcnow()
+    job_stats.record(job_id, added=[(row['status'], None, uploaded_at) for row in rows])
+    events.record(job_id, added=[(candidate_id, row['status'], None) for row, candidate_id in zip(rows, ids)])
+    db.session.commit()
+
+    for entry, candidate_id in zip(saved, ids):
+        entry.update({'status': 'processing', 'resume_id': candidate_id})
+
+
+def _inserted_candidates(entries):
+    """The candidates of the inserted entries that still exist, by id."""
+    ids = [entry['resume_id'] for entry in entries if 'resume_id' in entry]
+    candidates = {}
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        for candidate in Candidate.query.filter(Candidate.id.in_(ids[start:start + IN_CHUNK_SIZE])):
+            candidates[candidate.id] = candidate
+    return candidates
+
+
+def save_results(entries):
+    """
+    Writes each scored entry's result onto its candidate and commits.
+    Candidates deleted meanwhile, with their job, are skipped.
+    """
+    candidates = _inserted_candidates(entries)
+    for entry in entries:
+        candidate = candidates.get(entry.get('resume_id'))
+        if candidate is None or 'result' not in entry:
+            continue
+        result = entry['result']
+        candidate.resume_text = result.get('resume_text', '')
+        candidate.name = result.get('name', 'Unknown')
+        if 'error' in result:
+            candidate.status = 'error'
+            candidate.match_score = 0
+            candidate.processed_data = {'error': result['error']}
+            entry['error'] = result['error']
+        else:
+            candidate.status = 'processed'
+            candidate.resume_vector = entry.get('packed_vector')
+            candidate.resume_terms = result.get('resume_terms')
+            storage.apply_scores(candidate, result)
+        entry.update({'status': candidate.status, 'match_score': candidate.match_score, 'name': candidate.name})
+    db.session.commit()
+    vector_index.index_candidates(
+        candidate.id for candidate in candidates.values() if candidate.status == 'processed'
+    )
+
+
+def fail_candidates(entries, error):
+    """Marks the inserted candidates that are still 'processing' as failed, and commits."""
+    for candidate in _inserted_candidates(entries).values():
+        if candidate.status == 'processing':
+            candidate.status = 'error'
+            candidate.match_score = 0
+            candidate.processed_data = {'error': error}
+    db.session.commit()
+
+
+def manifest(entries):
+    """Strips internal fields from the entries for the API response."""
+    return [{
+        key: value for key, value in entry.items()
+        if key not in ('result', 'file_path', 'packed_vector', 'resume_file_id', 'size')
+    } for entry in entries]
@@ -0,0 +1,181 @@
+"""
+Vectorized scoring of N resumes against M jobs.
+
+Builds on the same measures as app/scorer.py: cosine similarity of the spaCy
+vectors where both sides have one (calculate_similarity), otherwise the keyword
+overlap of calculate_basic_similarity, computed for all pairs at once from a
+sparse resume-term matrix. The sequence-matching part of the basic score is a
+per-pair character comparison and is left out of the batch path.
+
+The matrix is the semantic component only; the per-job skills and experience
+components of app/skills.py are applied when candidates are scored for a job.
+
+Resumes are processed in chunks sized to a memory budget, so the full score
+matrix never has to exist unless the caller asks for it.
+"""
+import numpy as np
+from scipy import sparse
+from . import db
+from .job_profile import get_job_profile
+from .models import Candidate, JobPosting
+from .vectors import VECTOR_DTYPE, unpack_vector
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # 256MB
+
+
+class JobMatrix:
+    """The M jobs in the stacked forms the batch scorer needs."""
+
+    def __init__(self, profiles):
+        self.job_ids = [profile.job_id for profile in profiles]
+        self.size = len(profiles)
+
+        # Unit-normalized job vectors as an (M, d) matrix; jobs without one are zero rows
+        dim = next((p.vector.shape[0] for p in profiles if p.vector is not None), 0)
+        self.dim = dim
+        self.vectors = np.zeros((self.size, dim), dtype=VECTOR_DTYPE)
+        self.has_vector = np.zeros(self.size, dtype=bool)
+        for j, profile in enumerate(profiles):
+            if profile.vector is None or profile.vector.shape[0] != dim:
+                continue
+            norm = float(np.linalg.norm(profile.vector))
+            if norm:
+                self.vectors[j] = profile.vector / norm
+            self.has_vector[j] = True
+
+        # Binary term-job matrix over the jobs' combined vocabulary
+        self.vocabulary = {}
+        rows, cols = [], []
+        for j, profile in enumerate(profiles):
+            for term in profile.terms:
+                rows.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                cols.append(j)
+        self.terms = sparse.csc_matrix(
+            (np.ones(len(rows), dtype=VECTOR_DTYPE), (rows, cols)),
+            shape=(len(self.vocabulary), self.size)
+        )
+        self.term_counts = np.asarray(self.terms.sum(axis=0), dtype=VECTOR_DTYPE).ravel()
+
+    def chunk_size(self, memory_budget):
+        """Resumes per chunk so one chunk's working set stays within the budget."""
+        # Score blocks and their temporaries, plus the resume vectors themselves
+        per_row = self.size * VECTOR_DTYPE().itemsize * 4 + self.dim * VECTOR_DTYPE().itemsize
+        return max(1, int(memory_budget // max(per_row, 1)))
+
+
+def _resume_vectors(blobs, dim):
+    """Unit-normalized (n, dim) matrix for a chunk of packed resume vectors."""
+    matrix = np.zeros((len(blobs), dim), dtype=VECTOR_DTYPE)
+    has_vector = np.zeros(len(blobs), dtype=bool)
+    for i, blob in enumerate(blobs):
+        vector = blob if isinstance(blob, np.ndarray) else unpack_vector(blob)
+        if vector is None or vector.shape[0] != dim:
+            continue
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            matrix[i] = vector / norm
+        has_vector[i] = True
+    return matrix, has_vector
+
+
+def _resume_terms(term_lists, vocabulary):
+    """Binary (n, V) resume-term matrix restricted to the jobs' vocabulary."""
+    rows, cols = [], []
+    for i, terms in enumerate(term_lists):
+        for term in set(terms or ()):
+            col = vocabulary.get(term)
+            if col is not None:
+                rows.append(i)
+                cols.append(col)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=VECTOR_DTYPE), (rows, cols)),
+        shape=(len(term_lists), len(vocabulary))
+    )
+
+
+def score_block(jobs, resume_vectors, resume_terms):
+    """Scores one chunk of resumes against every job; returns an (n, M) array."""
+    # Keyword overlap: |resume terms & job terms| / |job terms|
+    overlap = (_resume_terms(resume_terms, jobs.vocabulary) @ jobs.terms).toarray()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(jobs.term_counts > 0, overlap / jobs.term_counts, 0.0).astype(VECTOR_DTYPE)
+
+    # Cosine similarity wherever both sides have a vector
+    if jobs.dim:
+        matrix, has_vector = _resume_vectors(resume_vectors, jobs.dim)
+        semantic = matrix @ jobs.vectors.T
+        both = np.outer(has_vector, jobs.has_vector)
+        scores = np.where(both, semantic, scores)
+
+    return np.clip(scores, 0.0, 1.0, out=scores)
+
+
+def iter_score_chunks(resume_vectors, resume_terms, jobs, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Yields (start_row, scores) blocks covering all resumes."""
+    step = jobs.chunk_size(memory_budget)
+    for start in range(0, len(resume_terms), step):
+        yield start, score_block(
+            jobs,
+            resume_vectors[start:start + step],
+            resume_terms[start:start + step]
+        )
+
+
+def score_matrix(resume_vectors, resume_terms, jobs, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """The full (N, M) score matrix."""
+    scores = np.zeros((len(resume_terms), jobs.size), dtype=VECTOR_DTYPE)
+    for start, block in iter_score_chunks(resume_vectors, resume_terms, jobs, memory_budget):
+        scores[start:start + block.shape[0]] = block
+    return scores
+
+
+def top_k(resume_vectors, resume_terms, jobs, k, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    The k best resumes per job without materializing the full matrix.
+    Returns (indices, scores), both (M, k') with k' = min(k, N), best first.
+    """
+    k = min(k, len(resume_terms))
+    if k <= 0:
+        empty = np.zeros((jobs.size, 0))
+        return empty.astype(np.int64), empty.astype(VECTOR_DTYPE)
+
+    best_scores = np.full((jobs.size, 0), -1.0, dtype=VECTOR_DTYPE)
+    best_indices = np.zeros((jobs.size, 0), dtype=np.int64)
+
+    for start, block in iter_score_chunks(resume_vectors, resume_terms, jobs, memory_budget):
+        block_indices = np.broadcast_to(np.arange(start, start + block.shape[0]), (jobs.size, block.shape[0]))
+        merged_scores = np.hstack([best_scores, block.T])
+        merged_indices = np.hstack([best_indices, block_indices])
+        if merged_scores.shape[1] > k:
+            keep = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+            merged_scores = np.take_along_axis(merged_scores, keep, axis=1)
+            merged_indices = np.take_along_axis(merged_indices, keep, axis=1)
+        best_scores, best_indices = merged_scores, merged_indices
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+def load_jobs(job_ids=None):
+    """Builds the JobMatrix for the given jobs (all jobs by default)."""
+    query = JobPosting.query.order_by(JobPosting.id)
+    if job_ids is not None:
+        query = query.filter(JobPosting.id.in_(job_ids))
+    profiles = [get_job_profile(job) for job in query.all()]
+    db.session.commit()  # Keep any freshly built profiles
+    return JobMatrix(profiles)
+
+
+def load_resumes(candidate_ids=None):
+    """Stored features of processed candidates: (ids, vectors, terms)."""
+    query = db.session.query(
+        Candidate.id, Candidate.resume_vector, Candidate.resume_terms
+    ).filter(Candidate.status == 'processed').order_by(Candidate.id)
+    if candidate_ids is not None:
+        query = query.filter(Candidate.id.in_(candidate_ids))
+    rows = query.all()
+    return (
+        [row.id for row in rows],
+        [row.resume_vector for row in rows],
+        [row.resume_terms or [] for row in rows]
+    )
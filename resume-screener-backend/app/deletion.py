@@ -0,0 +1,116 @@
+"""
+Background deletion of jobs and their candidates.
+
+DELETE /jobs/<id> only marks the job 'deleting' and queues a delete_job task,
+so the request returns at once and the job stays visible, with that status,
+until the task has finished. The task removes the rows with set-based
+statements (one DELETE for all of the job's candidates, whatever their
+number) in a single short transaction, recording the files that may now be
+unused in its payload in the same commit. It then reaps those files: the
+ResumeFile rows no candidate uses any more are deleted, and a path is only
+removed if no ResumeFile or Candidate refers to it after that, so files shared
+with other jobs, or uploaded again meanwhile, are kept. Reaping excludes
+uploads (see app/storage.py), so none can reuse a file while it is checked
+and removed; a task that waits too long for them is retried. A retried task
+skips straight to reaping the recorded paths.
+"""
+import os
+
+from flask import current_app
+from sqlalchemy import delete, exists, select, update
+from . import db, events, storage
+from .models import BackgroundTask, Candidate, JobPosting, JobStats, ResumeFile
+from .worker import enqueue
+
+# Rows per IN (...) list, well under SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def queue_job_deletion(job):
+    """
+    Marks the job as being deleted and queues its deletion, reusing a task
+    already queued or running. Returns the task; the caller commits.
+    """
+    job.status = 'deleting'
+    task = BackgroundTask.query.filter(
+        BackgroundTask.kind == 'delete_job',
+        BackgroundTask.job_id == job.id,
+        BackgroundTask.status.in_(('queued', 'processing'))
+    ).first()
+    if task is not None:
+        return task
+    return enqueue('delete_job', job_id=job.id)
+
+
+def delete_job_rows(job_id):
+    """
+    Deletes a job and its candidates. Returns (candidate_ids, paths): the
+    deleted candidates and the files that may have lost their last reference,
+    whose ResumeFile rows reap_files() deletes with them. The caller commits.
+    """
+    job_candidates = Candidate.job_id == job_id
+    candidate_ids = db.session.scalars(select(Candidate.id).where(job_candidates)).all()
+    resume_file_ids = db.session.scalars(
+        select(Candidate.resume_file_id).where(job_candidates, Candidate.resume_file_id.isnot(None)).distinct()
+    ).all()
+    paths = set(db.session.scalars(
+        select(Candidate.file_path).where(job_candidates, Candidate.file_path.isnot(None)).distinct()
+    ))
+
+    # Duplicates always point at a candidate of the same job
+    unsynced = {'synchronize_session': False}
+    db.session.execute(update(Candidate).where(job_candidates).values(duplicate_of_id=None), execution_options=unsynced)
+    db.session.execute(delete(Candidate).where(job_candidates), execution_options=unsynced)
+
+    for chunk in _chunks(resume_file_ids):
+        paths.update(db.session.scalars(select(ResumeFile.file_path).where(ResumeFile.id.in_(chunk))))
+
+    db.session.execute(delete(JobStats).where(JobStats.job_id == job_id), execution_options=unsynced)
+    db.session.execute(delete(JobPosting).where(JobPosting.id == job_id), execution_options=unsynced)
+    events.record(job_id, status='deleted')  # Ends the job's event streams
+    return candidate_ids, sorted(paths)
+
+
+def referenced_paths(paths):
+    """The given paths that a ResumeFile or Candidate still refers to."""
+    used = set()
+    for chunk in _chunks(paths):
+        used.update(db.session.scalars(select(ResumeFile.file_path).where(ResumeFile.file_path.in_(chunk))))
+        used.update(db.session.scalars(select(Candidate.file_path).where(Candidate.file_path.in_(chunk))))
+    return used
+
+
+def reap_files(paths, progress=None):
+    """
+    Deletes the ResumeFile rows of the given paths that no candidate uses and
+    removes the files no row refers to any more, a chunk at a time. Calls
+    progress(done, total) after each chunk. Returns the number of files removed.
+    Raises storage.StoreLockTimeout if uploads hold the store lock for longer
+    than STORE_LOCK_TIMEOUT seconds.
+    """
+    unused = ~exists().where(Candidate.resume_file_id == ResumeFile.id)
+    removed = 0
+    for done, chunk in enumerate(_chunks(paths), 1):
+        with storage.reaping(current_app.config['UPLOAD_FOLDER'], current_app.config['STORE_LOCK_TIMEOUT']):
+            db.session.execute(
+                delete(ResumeFile).where(ResumeFile.file_path.in_(chunk), unused),
+                execution_options={'synchronize_session': False}
+            )
+            used = referenced_paths(chunk)
+            db.session.commit()
+            for path in chunk:
+                if path in used or not os.path.exists(path):
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass  # Removed concurrently
+        if progress:
+            progress(min(done * CHUNK_SIZE, len(paths)), len(paths))
+    return removed
@@ -0,0 +1,425 @@
+"""
+Live per-job event streams: GET /jobs/<id>/events, as server-sent events.
+
+Candidate status and score changes, and job status changes, are written to
+job_event in the same transaction as the change itself: ORM changes after
+every flush, bulk statements through record(). The row id is the SSE event
+id, so a client reconnecting with Last-Event-ID (or ?last_event_id=) is sent
+exactly the events it missed, by whichever process it reaches. Events are
+written after the job's change counter is bumped (app/job_changes.py; the
+listeners are registered in that order by create_app), which keeps the job
+row locked until commit, so a job's events commit in id order.
+
+Each process fans events out with one EventHub thread. Every POLL_INTERVAL
+seconds, or as soon as this process commits an event, it reads the events
+newer than the last it saw for the jobs being streamed and hands each to the
+listeners of its job. A listener queues at most QUEUE_SIZE events and the hub
+never waits on one: a listener that falls that far behind has its queue
+dropped, and its stream reads what it missed from the table, after the last
+event it sent. A slow client costs neither memory nor the other clients'
+latency.
+
+A process serves at most MAX_STREAMS streams at once (more get a 503), and a
+stream ends after MAX_STREAM_SECONDS: the client reconnects with Last-Event-ID
+and loses nothing, while long-lived connections can't pin down the request
+threads of a threaded server for good.
+
+EventSource can't send an Authorization header, so a client first asks for a
+stream token (POST /jobs/<id>/events/token) and passes it as ?token=. The
+token is signed with SECRET_KEY, names the job and the user, and is only
+accepted by that job's stream within TOKEN_SECONDS; the access token never
+appears in a URL. A client reconnecting after that gets a new stream token
+and resumes with last_event_id.
+
+Events older than RETENTION_HOURS are pruned. A stream resuming after an
+event that was pruned starts with a 'reset' event: reload, then carry on.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import and_, delete, event, func, inspect, insert, or_, select
+from . import db
+from .models import Candidate, JobEvent, JobPosting
+from .serialization import dumps
+
+SETTINGS = {
+    'poll_interval': 0.5,
+    'keepalive': 15.0,
+    'queue_size': 1000,
+    'retention_hours': 24,
+    'retry_ms': 3000,
+    'max_streams': 2,
+    'max_stream_seconds': 300,
+    'token_seconds': 60,
+}
+READ_BATCH = 500  # Events per query when a stream catches up
+POLL_BATCH = 2000  # Events per hub query
+POLL_JOBS = 100  # Jobs per hub query
+PRUNE_INTERVAL = 300  # Seconds between prunes by one process
+
+LAGGING = object()  # Returned by Listener.get() after its queue was dropped
+
+_events = JobEvent.__table__
+_hub_lock = threading.Lock()
+_prune_lock = threading.Lock()
+_next_prune = 0.0
+
+
+def init_app(app):
+    SETTINGS.update({
+        'poll_interval': app.config['EVENTS_POLL_INTERVAL'],
+        'keepalive': app.config['EVENTS_KEEPALIVE'],
+        'queue_size': app.config['EVENTS_QUEUE_SIZE'],
+        'retention_hours': app.config['EVENTS_RETENTION_HOURS'],
+        'retry_ms': app.config['EVENTS_RETRY_MS'],
+        'max_streams': app.config['EVENTS_MAX_STREAMS'],
+        'max_stream_seconds': app.config['EVENTS_MAX_STREAM_SECONDS'],
+        'token_seconds': app.config['EVENTS_TOKEN_SECONDS'],
+    })
+
+
+class TooManyStreams(Exception):
+    """This process already serves MAX_STREAMS event streams."""
+
+
+def _token_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='job-event-stream')
+
+
+def stream_token(job_id, user_id):
+    """A token that opens the job's event stream, for TOKEN_SECONDS, and nothing else."""
+    return _token_serializer().dumps({'job_id': job_id, 'user_id': user_id})
+
+
+def stream_token_user(token, job_id):
+    """The user a valid, unexpired stream token for this job was issued to, else None."""
+    try:
+        claims = _token_serializer().loads(token, max_age=SETTINGS['token_seconds'])
+    except BadSignature:  # Also raised for expired tokens
+        return None
+    if not isinstance(claims, dict) or claims.get('job_id') != job_id:
+        return None
+    return claims.get('user_id')
+
+
+def _row(job_id, kind, data):
+    return {'job_id': job_id, 'kind': kind, 'data': data, 'created_at': datetime.utcnow()}
+
+
+def _candidate(candidate_id, status, match_score, previous_status=None):
+    return {'id': candidate_id, 'status': status, 'previous_status': previous_status, 'match_score': match_score}
+
+
+def _write(session, connection, rows):
+    if rows:
+        connection.execute(insert(_events), rows)
+        session.info['job_events'] = True
+
+
+def record(job_id, added=(), rescored=(), status=None):
+    """
+    Writes the events of changes made with bulk statements: added candidates
+    as (id, status, match_score), rescored candidates as (id, match_score) and
+    the job's new status. Call it after job_changes.touch(); the caller commits.
+    """
+    rows = [_row(job_id, 'candidate', _candidate(*candidate)) for candidate in added]
+    if rescored:
+        rows.append(_row(job_id, 'rescore', {'scores': [[candidate_id, score] for candidate_id, score in rescored]}))
+    if status is not None:
+        rows.append(_row(job_id, 'job', {'status': status}))
+    _write(db.session, db.session.connection(), rows)
+
+
+def _previous_value(history):
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else None
+
+
+def register_listeners():
+    """
+    Adds the session listeners. create_app calls it after
+    job_changes.register_listeners(), so the job row is bumped (and locked)
+    before its events are written.
+    """
+    for name, listener in (
+        ('after_flush', _after_flush),
+        ('after_commit', _after_commit),
+        ('after_rollback', _after_rollback),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
+
+
+def _after_flush(session, flush_context):
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, Candidate):
+            rows.append(_row(obj.job_id, 'candidate', _candidate(obj.id, obj.status, obj.match_score)))
+
+    for obj in session.dirty:
+        state = inspect(obj)
+        if isinstance(obj, Candidate):
+            status, score = state.attrs.status.history, state.attrs.match_score.history
+            if status.has_changes() or score.has_changes():
+                rows.append(_row(obj.job_id, 'candidate', _candidate(
+                    obj.id, obj.status, obj.match_score, _previous_value(status)
+                )))
+        elif isinstance(obj, JobPosting) and state.attrs.status.history.has_changes():
+            rows.append(_row(obj.id, 'job', {'status': obj.status}))
+
+    for obj in session.deleted:
+        if isinstance(obj, Candidate):
+            values = inspect(obj).dict
+            if 'job_id' in values:
+                rows.append(_row(values['job_id'], 'candidate', _candidate(
+                    inspect(obj).identity[0], 'deleted', None, values.get('status')
+                )))
+
+    _write(session, session.connection(), rows)
+
+
+def _after_commit(session):
+    if not session.info.pop('job_events', False):
+        return
+    hub = current_app.extensions.get('event_hub')
+    if hub is not None:
+        hub.notify()
+    _prune_if_due()
+
+
+def _after_rollback(session):
+    session.info.pop('job_events', None)
+
+
+def prune(older_than):
+    """Deletes the events written before the given datetime. Returns how many."""
+    with db.engine.begin() as connection:
+        return connection.execute(delete(_events).where(_events.c.created_at < older_than)).rowcount
+
+
+def _prune_if_due():
+    # Every process writing events prunes now and then, in its own short
+    # transaction, so the table stays bounded whether or not anyone listens
+    global _next_prune
+    with _prune_lock:
+        if time.monotonic() < _next_prune:
+            return
+        _next_prune = time.monotonic() + PRUNE_INTERVAL
+    try:
+        prune(datetime.utcnow() - timedelta(hours=SETTINGS['retention_hours']))
+    except Exception as e:
+        current_app.logger.warning(f'Could not prune job events: {e}')
+
+
+def newest_event_id(job_id):
+    """The id of the job's newest event, 0 if it has none."""
+    return db.session.execute(select(func.max(_events.c.id)).where(_events.c.job_id == job_id)).scalar() or 0
+
+
+def has_event(job_id, event_id):
+    return db.session.execute(
+        select(_events.c.id).where(_events.c.job_id == job_id, _events.c.id == event_id)
+    ).first() is not None
+
+
+def read_events(app, job_id, after):
+    """The job's events after the given id, oldest first, read READ_BATCH at a time."""
+    while True:
+        # No session is held between batches, however slowly they are sent
+        with app.app_context():
+            rows = db.session.execute(select(_events).where(
+                _events.c.job_id == job_id, _events.c.id > after
+            ).order_by(_events.c.id).limit(READ_BATCH)).all()
+        yield from rows
+        if len(rows) < READ_BATCH:
+            return
+        after = rows[-1].id
+
+
+class Listener:
+    """One stream's queue of events from the hub, holding at most size of them."""
+
+    def __init__(self, job_id, size):
+        self.job_id = job_id
+        self.size = size
+        self.lagging = False
+        self._pending = deque()
+        self._ready = threading.Condition()
+
+    def put(self, row):
+        """Queues an event without ever blocking; a full queue is dropped instead."""
+        with self._ready:
+            if self.lagging:
+                return
+            if len(self._pending) >= self.size:
+                self._pending.clear()
+                self.lagging = True
+            else:
+                self._pending.append(row)
+            self._ready.notify()
+
+    def get(self, timeout):
+        """
+        The next queued event, LAGGING if the queue was dropped since the last
+        call (the caller reads the events it missed from the table), or None
+        after timeout seconds without one.
+        """
+        with self._ready:
+            if not self._pending and not self.lagging:
+                self._ready.wait(timeout)
+            if self.lagging:
+                self.lagging = False
+                return LAGGING
+            return self._pending.popleft() if self._pending else None
+
+
+class EventHub:
+    """Hands the events of the jobs being streamed to their listeners, one thread per process."""
+
+    def __init__(self, app):
+        self.app = app
+        self._listeners = {}  # job_id -> set of Listener
+        self._seen = {}  # job_id -> id of the newest event handed out
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def subscribe(self, job_id):
+        """
+        Adds a listener for the job's events. Returns (listener, event id):
+        every event after that id is queued to the listener. Raises
+        TooManyStreams when MAX_STREAMS listeners are open.
+        """
+        listener = Listener(job_id, SETTINGS['queue_size'])
+        with self._lock:
+            if sum(len(listeners) for listeners in self._listeners.values()) >= SETTINGS['max_streams']:
+                raise TooManyStreams(f"{SETTINGS['max_streams']} event streams are open")
+            if job_id not in self._seen:
+                self._seen[job_id] = newest_event_id(job_id)
+            self._listeners.setdefault(job_id, set()).add(listener)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-hub', daemon=True)
+                self._thread.start()
+            return listener, self._seen[job_id]
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            listeners = self._listeners.get(listener.job_id, set())
+            listeners.discard(listener)
+            if not listeners:
+                self._listeners.pop(listener.job_id, None)
+                self._seen.pop(listener.job_id, None)
+
+    def notify(self):
+        self._wakeup.set()
+
+    def poll(self):
+        """Hands the events committed since the last poll to their listeners. Returns how many."""
+        with self._lock:
+            seen = sorted(self._seen.items())
+        handed_out = 0
+        for start in range(0, len(seen), POLL_JOBS):
+            newer = or_(*(
+                and_(_events.c.job_id == job_id, _events.c.id > last_id)
+                for job_id, last_id in seen[start:start + POLL_JOBS]
+            ))
+            rows = db.session.execute(
+                select(_events).where(newer).order_by(_events.c.id).limit(POLL_BATCH)
+            ).all()
+            if len(rows) == POLL_BATCH:
+                self._wakeup.set()  # More to read, right after this round
+            with self._lock:
+                for row in rows:
+                    if row.id <= self._seen.get(row.job_id, row.id):
+                        continue  # Already handed out, or nobody listens any more
+                    self._seen[row.job_id] = row.id
+                    for listener in self._listeners[row.job_id]:
+                        listener.put(row)
+                    handed_out += 1
+        return handed_out
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(SETTINGS['poll_interval'])
+            self._wakeup.clear()
+            with self.app.app_context():
+                try:
+                    self.poll()
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f'Event hub poll failed: {e}')
+
+
+def get_hub(app):
+    """The app's event hub in this process, created on first use."""
+    with _hub_lock:
+        hub = app.extensions.get('event_hub')
+        if hub is None:
+            hub = app.extensions['event_hub'] = EventHub(app)
+        return hub
+
+
+def message(event_id, kind, data):
+    """One SSE message."""
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (event_id, kind.encode('ascii'), dumps(data))
+
+
+def _is_last(row):
+    return row.kind == 'job' and row.data.get('status') == 'deleted'
+
+
+def event_stream(job_id, resume_from=None):
+    """
+    The job's events as SSE messages, after the event resume_from or from now
+    on, until the client goes away, the job is deleted or MAX_STREAM_SECONDS
+    have passed. It subscribes at once, so call it while handling the
+    request; raises TooManyStreams.
+
+    The first message is 'ready', or 'reset' if resume_from is no longer
+    retained; its id is the event the stream continues after.
+    """
+    app = current_app._get_current_object()
+    hub = get_hub(app)
+    listener, start = hub.subscribe(job_id)
+    if resume_from is None:
+        first, last = message(start, 'ready', {'job_id': job_id}), start
+    elif resume_from and not has_event(job_id, resume_from):
+        first, last = message(start, 'reset', {'job_id': job_id}), start
+    else:
+        first, last = message(resume_from, 'ready', {'job_id': job_id}), resume_from
+    return _messages(app, hub, listener, first, last, catch_up=last < start)
+
+
+def _messages(app, hub, listener, first, last, catch_up):
+    closes_at = time.monotonic() + SETTINGS['max_stream_seconds']
+    try:
+        yield b'retry: %d\n\n' % SETTINGS['retry_ms'] + first
+        while True:
+            if catch_up:
+                for row in read_events(app, listener.job_id, last):
+                    yield message(row.id, row.kind, row.data)
+                    last = row.id
+                    if _is_last(row):
+                        return
+                catch_up = False
+
+            remaining = closes_at - time.monotonic()
+            if remaining <= 0:
+                return  # The client reconnects after the last event it got
+            row = listener.get(min(SETTINGS['keepalive'], remaining))
+            if row is None:
+                yield b': keepalive\n\n'  # Also how a closed connection is noticed
+            elif row is LAGGING:
+                catch_up = True
+            elif row.id > last:  # Events read from the table come through the queue too
+                yield message(row.id, row.kind, row.data)
+                last = row.id
+                if _is_last(row):
+                    return
+    finally:
+        hub.unsubscribe(listener)
@@ -0,0 +1,307 @@
+"""
+Resume text extraction with page, size, time and memory budgets.
+
+Files are dispatched on their sniffed content type, not their extension, to the
+extractor registered for it: PDFs through pdfplumber, DOCX by streaming the
+document XML straight out of the archive. Legacy .doc and other types are
+rejected up front with UnsupportedFileType. Each extractor has its own time and
+memory budget (BUDGETS).
+
+PDF pages are extracted one at a time and joined once at the end, each page's
+layout objects are released as soon as its text is out, and extraction stops
+at the configured page, character and time limits. Long documents can be split
+into page ranges and extracted in parallel on the shared process pool.
+extract_text() serves repeat extractions from the extraction cache.
+"""
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from types import SimpleNamespace
+from xml.etree import ElementTree
+
+import pdfplumber
+from . import extraction_cache, metrics
+from .pools import get_process_pool, in_pool_worker
+
+SNIFF_BYTES = 1024
+PDF_MAGIC = b'%PDF-'
+ZIP_MAGIC = b'PK\x03\x04'
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # Legacy Office (.doc) container
+RTF_MAGIC = b'{\\rtf'
+
+DOCX_BODY = 'word/document.xml'
+DOCX_HEADER = re.compile(r'word/header\d*\.xml$')
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+TYPE_NAMES = {
+    'pdf': 'PDF',
+    'docx': 'DOCX',
+    'doc': 'Legacy Word (.doc)',
+    'rtf': 'RTF',
+    'zip': 'ZIP',
+    None: 'Unrecognized',
+}
+
+# Defaults; create_app overrides them from the app config
+LIMITS = {
+    'max_pages': int(os.environ.get('EXTRACT_MAX_PAGES', 50)),
+    'max_chars': int(os.environ.get('EXTRACT_MAX_CHARS', 200000)),
+    'parallel_min_pages': int(os.environ.get('EXTRACT_PARALLEL_MIN_PAGES', 20)),
+}
+
+# Per extractor: seconds before the text so far is returned, and the largest
+# input it will load (PDF: file size; DOCX: uncompressed XML it reads)
+BUDGETS = {
+    'pdf': {
+        'timeout': float(os.environ.get('EXTRACT_TIMEOUT', 30)),
+        'max_bytes': int(os.environ.get('EXTRACT_PDF_MAX_MB', 32)) * 1024 * 1024,
+    },
+    'docx': {
+        'timeout': float(os.environ.get('EXTRACT_DOCX_TIMEOUT', 10)),
+        'max_bytes': int(os.environ.get('EXTRACT_DOCX_MAX_MB', 64)) * 1024 * 1024,
+    },
+}
+
+_extractors = {}
+
+
+class ExtractionError(ValueError):
+    """A file that can't be extracted within its extractor's budgets."""
+
+
+class UnsupportedFileType(ExtractionError):
+    def __init__(self, file_type):
+        self.file_type = file_type
+        super().__init__(
+            f"{TYPE_NAMES.get(file_type, file_type)} files are not supported; upload a PDF or DOCX"
+        )
+
+
+def extractor(file_type, version):
+    """
+    Registers func(filepath, flags=None) as the extractor for a sniffed file
+    type. version goes into the extraction cache key; bump it when a change to
+    the extractor changes its output.
+    """
+    def decorator(func):
+        _extractors[file_type] = SimpleNamespace(extract=func, version=version)
+        return func
+    return decorator
+
+
+def init_app(app):
+    LIMITS.update({
+        'max_pages': app.config['EXTRACT_MAX_PAGES'],
+        'max_chars': app.config['EXTRACT_MAX_CHARS'],
+        'parallel_min_pages': app.config['EXTRACT_PARALLEL_MIN_PAGES'],
+    })
+    BUDGETS['pdf'].update({
+        'timeout': app.config['EXTRACT_TIMEOUT'],
+        'max_bytes': app.config['EXTRACT_PDF_MAX_MB'] * 1024 * 1024,
+    })
+    BUDGETS['docx'].update({
+        'timeout': app.config['EXTRACT_DOCX_TIMEOUT'],
+        'max_bytes': app.config['EXTRACT_DOCX_MAX_MB'] * 1024 * 1024,
+    })
+
+
+def sniff_file_type(filepath):
+    """
+    The type of a file from its content: 'pdf', 'docx', 'doc', 'rtf', 'zip', or
+    None when it isn't recognized.
+    """
+    with open(filepath, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+    if PDF_MAGIC in head:  # Some writers put junk before the header
+        return 'pdf'
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(filepath) as archive:
+                names = set(archive.namelist())
+        except zipfile.BadZipFile:
+            return None
+        return 'docx' if DOCX_BODY in names else 'zip'
+    if head.startswith(OLE_MAGIC):
+        return 'doc'
+    if head.startswith(RTF_MAGIC):
+        return 'rtf'
+    return None
+
+
+def check_supported(filepath):
+    """The file's sniffed type; raises UnsupportedFileType if no extractor handles it."""
+    with metrics.span('sniff'):
+        file_type = sniff_file_type(filepath)
+    if file_type not in _extractors:
+        raise UnsupportedFileType(file_type)
+    return file_type
+
+
+def _page_texts(pages, deadline=None, flags=None):
+    """Yields the text of each page, releasing its layout objects afterwards."""
+    for page in pages:
+        if deadline is not None and time.monotonic() > deadline:
+            print("PDF extraction stopped: time budget exhausted")
+            if flags is not None:
+                flags['timed_out'] = True
+            return
+        try:
+            # Pages without a text layer (e.g. scans) return None
+            yield page.extract_text() or ''
+        finally:
+            page.close()
+            metrics.inc('extract_pages_total', type='pdf')
+
+
+def iter_pdf_pages(filepath, max_pages=None, timeout=None):
+    """Yields the text of a PDF page by page, within the page and time budgets."""
+    deadline = time.monotonic() + timeout if timeout else None
+    with pdfplumber.open(filepath) as pdf:
+        yield from _page_texts(pdf.pages[:max_pages], deadline)
+
+
+def _extract_page_range(filepath, start, stop, deadline=None):
+    """
+    Pool task: the texts of pages [start, stop) of a PDF, stopping at the
+    deadline (a time.monotonic() value, which is system-wide, so the parent's
+    deadline holds here too).
+    """
+    with pdfplumber.open(filepath) as pdf:
+        return list(_page_texts(pdf.pages[start:stop], deadline))
+
+
+def _iter_pages_parallel(filepath, page_count, timeout, flags=None):
+    """Extracts contiguous page ranges on the process pool, yielding texts in order."""
+    pool = get_process_pool()
+    step = max(1, -(-page_count // (os.cpu_count() or 1)))
+    deadline = time.monotonic() + timeout if timeout else None
+    # Cancelling can't stop a range that is already running, so each one
+    # stops itself at the deadline and frees its pool process
+    futures = [
+        pool.submit(_extract_page_range, filepath, start, min(start + step, page_count), deadline)
+        for start in range(0, page_count, step)
+    ]
+    try:
+        for future in futures:
+            remaining = max(0.0, deadline - time.monotonic()) if deadline else None
+            yield from future.result(timeout=remaining)
+    except FutureTimeoutError:
+        print("PDF extraction stopped: time budget exhausted")
+        if flags is not None:
+            flags['timed_out'] = True
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _join_within(texts, max_chars):
+    """Joins page texts once, stopping as soon as max_chars is reached."""
+    parts, length = [], 0
+    for text in texts:
+        parts.append(text)
+        length += len(text) + 1
+        if max_chars and length >= max_chars:
+            break
+    joined = '\n'.join(parts)
+    return joined[:max_chars] if max_chars else joined
+
+
+@extractor('pdf', version=f'1:{pdfplumber.__version__}')
+def extract_text_from_pdf(filepath, max_pages=None, max_chars=None, timeout=None, flags=None):
+    """
+    Extracts text from a PDF file. Budgets default to LIMITS and
+    BUDGETS['pdf']; when the page, character or time budget is hit the text
+    extracted so far is returned, and if the time budget ran out
+    flags['timed_out'] is set on the given dict. Files over the memory budget
+    raise ExtractionError.
+    """
+    max_pages = max_pages or LIMITS['max_pages']
+    max_chars = max_chars or LIMITS['max_chars']
+    timeout = timeout or BUDGETS['pdf']['timeout']
+
+    size = os.path.getsize(filepath)
+    if size > BUDGETS['pdf']['max_bytes']:
+        raise ExtractionError(f"PDF of {size} bytes is over the {BUDGETS['pdf']['max_bytes']} byte extraction budget")
+
+    with pdfplumber.open(filepath) as pdf:
+        page_count = min(len(pdf.pages), max_pages)
+        parallel = page_count >= LIMITS['parallel_min_pages'] and not in_pool_worker()
+        if not parallel:
+            deadline = time.monotonic() + timeout if timeout else None
+            return _join_within(_page_texts(pdf.pages[:page_count], deadline, flags), max_chars)
+
+    return _join_within(_iter_pages_parallel(filepath, page_count, timeout, flags), max_chars)
+
+
+def _docx_paragraphs(archive, parts, deadline=None, flags=None):
+    """
+    Yields the text of each paragraph in the given XML parts, streaming the XML
+    and releasing each paragraph's elements once its text is out.
+    """
+    for name in parts:
+        with archive.open(name) as xml:
+            runs = []
+            for _, element in ElementTree.iterparse(xml):
+                tag = element.tag
+                if tag == W + 't':
+                    runs.append(element.text or '')
+                elif tag == W + 'tab':
+                    runs.append('\t')
+                elif tag in (W + 'br', W + 'cr'):
+                    runs.append('\n')
+                elif tag == W + 'p':
+                    yield ''.join(runs)
+                    runs = []
+                    element.clear()
+                    if deadline is not None and time.monotonic() > deadline:
+                        print("DOCX extraction stopped: time budget exhausted")
+                        if flags is not None:
+                            flags['timed_out'] = True
+                        return
+
+
+@extractor('docx', version='1')
+def extract_text_from_docx(filepath, max_chars=None, timeout=None, flags=None):
+    """
+    Extracts text from a DOCX file: its headers (where contact details often
+    sit), then the body. Budgets default to LIMITS and BUDGETS['docx'] and
+    behave as for PDFs; the memory budget caps the uncompressed XML read.
+    """
+    max_chars = max_chars or LIMITS['max_chars']
+    timeout = timeout or BUDGETS['docx']['timeout']
+    deadline = time.monotonic() + timeout if timeout else None
+
+    with zipfile.ZipFile(filepath) as archive:
+        parts = sorted(name for name in archive.namelist() if DOCX_HEADER.match(name)) + [DOCX_BODY]
+        size = sum(archive.getinfo(name).file_size for name in parts)
+        if size > BUDGETS['docx']['max_bytes']:
+            raise ExtractionError(f"DOCX with {size} bytes of XML is over the {BUDGETS['docx']['max_bytes']} byte extraction budget")
+        return _join_within(_docx_paragraphs(archive, parts, deadline, flags), max_chars)
+
+
+def _extractor_key(file_type):
+    """Identifies what shapes the extracted text: extractor, its version and the limits."""
+    return f"{file_type}:{_extractors[file_type].version}:{LIMITS['max_pages']}:{LIMITS['max_chars']}"
+
+
+def extract_text(filepath, sha256=None):
+    """
+    The text of a resume file, by the extractor for its sniffed type and from
+    the extraction cache when it was extracted before (sha256, if known, saves
+    hashing the file). Raises UnsupportedFileType for files no extractor
+    handles.
+    """
+    file_type = check_supported(filepath)
+    extract = _extractors[file_type].extract
+
+    def extract_complete(path):
+        flags = {}
+        text = extract(path, flags=flags)
+        return text, not flags.get('timed_out')
+
+    with metrics.span('extract'):
+        text = extraction_cache.cached_extract(filepath, _extractor_key(file_type), extract_complete, sha256)
+    metrics.inc('extract_chars_total', len(text), type=file_type)
+    return text
@@ -0,0 +1,187 @@
+"""
+Persistent cache of extracted resume text.
+
+Entries are keyed by the SHA-256 of the file's content plus an extractor key
+(extractor version and the limits that shape its output), stored zlib
+compressed under <dir>/<aa>/<sha256>.<key digest>.z. Reprocessing a file that
+was extracted before, by any path, skips parsing it. The cache is bounded in
+size: a hit refreshes the entry's mtime, and once the total passes the limit
+the least recently used entries are evicted. Hit/miss counters are kept per
+process.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import zlib
+
+from filelock import FileLock
+from . import metrics
+
+COMPRESSION_LEVEL = 6
+EVICT_TO = 0.9  # Eviction frees space down to this share of the limit
+
+# Defaults; create_app overrides them from the app config. Pool children keep
+# these, so the default path matches the config default.
+SETTINGS = {
+    'enabled': os.environ.get('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true',
+    'path': os.environ.get('EXTRACTION_CACHE_DIR', os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'extraction_cache'
+    )),
+    'max_bytes': int(os.environ.get('EXTRACTION_CACHE_MAX_MB', 512)) * 1024 * 1024,
+}
+
+_counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+_size = None  # Approximate total size on disk, scanned on first store
+_lock = threading.Lock()
+
+
+def init_app(app):
+    SETTINGS.update({
+        'enabled': app.config['EXTRACTION_CACHE_ENABLED'],
+        'path': app.config['EXTRACTION_CACHE_DIR'],
+        'max_bytes': app.config['EXTRACTION_CACHE_MAX_MB'] * 1024 * 1024,
+    })
+
+
+def file_sha256(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def entry_path(sha256, extractor_key):
+    key_digest = hashlib.sha1(extractor_key.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(SETTINGS['path'], sha256[:2], f'{sha256}.{key_digest}.z')
+
+
+def _count(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def get(sha256, extractor_key):
+    """The cached text, or None on a miss."""
+    path = entry_path(sha256, extractor_key)
+    try:
+        with open(path, 'rb') as f:
+            text = zlib.decompress(f.read()).decode('utf-8')
+    except (OSError, zlib.error, UnicodeDecodeError):
+        _count('misses')
+        metrics.inc('extraction_cache_lookups_total', result='miss')
+        return None
+    try:
+        os.utime(path)  # Mark as recently used
+    except OSError:
+        pass
+    _count('hits')
+    metrics.inc('extraction_cache_lookups_total', result='hit')
+    return text
+
+
+def put(sha256, extractor_key, text):
+    """Stores text for the file; the oldest entries are evicted past the size limit."""
+    global _size
+    path = entry_path(sha256, extractor_key)
+    data = zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _count('stores')
+
+    with _lock:
+        if _size is None:
+            _size = _disk_usage()
+        else:
+            _size += len(data)
+        over = _size > SETTINGS['max_bytes']
+    if over:
+        evict()
+
+
+def _entries():
+    """(mtime, size, path) of every cache entry."""
+    entries = []
+    for root, _, files in os.walk(SETTINGS['path']):
+        for name in files:
+            if not name.endswith('.z'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Evicted by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def _disk_usage():
+    return sum(size for _, size, _ in _entries())
+
+
+def evict():
+    """Deletes least recently used entries until the cache is under EVICT_TO of its limit."""
+    global _size
+    os.makedirs(SETTINGS['path'], exist_ok=True)
+    with FileLock(os.path.join(SETTINGS['path'], '.evict.lock')):
+        entries = sorted(_entries())
+        total = sum(size for _, size, _ in entries)
+        target = SETTINGS['max_bytes'] * EVICT_TO
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+    _count('evictions', evicted)
+    with _lock:
+        _size = total
+
+
+def cached_extract(filepath, extractor_key, extract, sha256=None):
+    """
+    The text of a file from the cache, or from extract(filepath). extract
+    returns (text, complete); incomplete results (a time budget ran out) and
+    empty texts are not cached. Pass the file's sha256 if it is known, to
+    save reading the file to hash it.
+    """
+    if not SETTINGS['enabled']:
+        return extract(filepath)[0]
+
+    sha256 = sha256 or file_sha256(filepath)
+    text = get(sha256, extractor_key)
+    if text is not None:
+        return text
+
+    text, complete = extract(filepath)
+    if complete and text:
+        try:
+            put(sha256, extractor_key, text)
+        except OSError as e:
+            print(f"Extraction cache store failed: {e}")
+    return text
+
+
+def stats():
+    """This process's counters plus the cache's approximate size."""
+    with _lock:
+        counters = dict(_counters)
+        size = _size
+    lookups = counters['hits'] + counters['misses']
+    counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else None
+    counters['size_bytes'] = size
+    counters['max_bytes'] = SETTINGS['max_bytes']
+    return counters
@@ -0,0 +1,58 @@
+"""
+Per-job change counters.
+
+JobPosting.change_count goes up in the same transaction as any change to the
+job or to one of its candidates, so a listing can tell whether anything it
+shows changed by reading one job_posting row, without touching the candidate
+table (see the ETags in app/serialization.py). Changes made through the ORM
+are picked up after every flush (register_listeners()); bulk INSERT/UPDATE
+statements bypass the unit of work, so the code issuing them calls touch()
+itself.
+"""
+from sqlalchemy import event, select, update
+from . import db
+from .models import Candidate, JobPosting
+
+_jobs = JobPosting.__table__
+
+
+def _bump(connection, job_ids):
+    job_ids = sorted(job_id for job_id in job_ids if job_id is not None)
+    if job_ids:
+        connection.execute(
+            update(_jobs).where(_jobs.c.id.in_(job_ids)).values(change_count=_jobs.c.change_count + 1)
+        )
+
+
+def touch(*job_ids):
+    """Marks jobs as changed after bulk statements on their candidates; the caller commits."""
+    _bump(db.session.connection(), job_ids)
+
+
+def change_count(job_id):
+    """The job's change counter, or None if there is no such job."""
+    return db.session.execute(select(_jobs.c.change_count).where(_jobs.c.id == job_id)).scalar()
+
+
+def change_counts():
+    """[(job id, change counter)] for every job, by id."""
+    return db.session.execute(select(_jobs.c.id, _jobs.c.change_count).order_by(_jobs.c.id)).all()
+
+
+def register_listeners():
+    """Adds the session listener; create_app calls it before the other flush listeners."""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+
+
+def _after_flush(session, flush_context):
+    # The new/dirty/deleted collections still hold what was just flushed,
+    # with the ids of new rows filled in
+    job_ids = set()
+    for obj in session.dirty:
+        if isinstance(obj, (Candidate, JobPosting)) and session.is_modified(obj, include_collections=False):
+            job_ids.add(obj.job_id if isinstance(obj, Candidate) else obj.id)
+    for obj in session.new | session.deleted:
+        if isinstance(obj, Candidate):
+            job_ids.add(obj.job_id)
+    _bump(session.connection(), job_ids)
@@ -0,0 +1,104 @@
+"""
+Job-side precomputation for scoring.
+
+A job description is parsed once into a JobProfile (spaCy vector plus the
+keyword set used by the fallback scorer). Profiles are keyed by job id and a
+hash of the description, persisted on the JobPosting row and kept in a bounded
+in-process LRU, so scoring a resume only parses the resume itself.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from . import scorer
+from .similarity import minhash_sketch
+from .vectors import pack_vector, unpack_vector
+
+# sketch is the MinHash sketch for the fallback scorer; it is cheap to build
+# and is not persisted
+JobProfile = namedtuple('JobProfile', ['job_id', 'content_hash', 'vector', 'terms', 'sketch'])
+
+
+class LRUCache:
+    """A small thread-safe LRU mapping."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = LRUCache()
+
+
+def init_app(app):
+    _cache.maxsize = app.config['JOB_PROFILE_CACHE_SIZE']
+
+
+def content_hash(description):
+    return hashlib.sha256((description or '').encode('utf-8')).hexdigest()
+
+
+def _profile_from_row(job, digest):
+    """Loads the profile persisted on the job row, if it is still current."""
+    if job.description_hash != digest or job.description_terms is None:
+        return None
+    vector = unpack_vector(job.description_vector)
+    if vector is None and scorer.spacy_available():
+        # Persisted while spaCy was unavailable, rebuild with a vector
+        return None
+    return JobProfile(job.id, digest, vector, frozenset(job.description_terms),
+                      minhash_sketch(job.description))
+
+
+def refresh_job_profile(job):
+    """
+    Rebuilds the profile and stores it on the job row. Call this when a job is
+    created or its description is edited; the caller commits.
+    """
+    digest = content_hash(job.description)
+    vector, terms = scorer.build_features(job.description)
+    job.description_hash = digest
+    job.description_vector = pack_vector(vector)
+    job.description_terms = sorted(terms)
+
+    profile = JobProfile(job.id, digest, vector, frozenset(terms), minhash_sketch(job.description))
+    if job.id is not None:
+        _cache.put((job.id, digest), profile)
+    return profile
+
+
+def get_job_profile(job):
+    """
+    Returns the current profile for a job, from the LRU, the job row or by
+    building it. A stale or missing row profile is rebuilt and written back to
+    the job (the caller commits).
+    """
+    digest = content_hash(job.description)
+    key = (job.id, digest)
+
+    profile = _cache.get(key)
+    if profile is None:
+        profile = _profile_from_row(job, digest)
+        if profile is None:
+            profile = refresh_job_profile(job)
+        _cache.put(key, profile)
+    return profile
@@ -0,0 +1,273 @@
+"""
+Per-job candidate aggregates behind GET /jobs/summary.
+
+A JobStats row holds a job's candidate count by status, the count, sum and
+maximum of its processed candidates' match scores, a histogram of those
+scores (SCORE_BUCKETS equal-width buckets over 0-1, which the percentiles are
+read from) and the time of its last upload. The row is updated in the same
+transaction as the candidates, from deltas: ORM inserts, updates and deletes
+are turned into deltas after each flush (the replaced status and score come
+from attribute history), and bulk statements report theirs with record().
+The row is locked while it is updated, so concurrent writers don't lose
+counts.
+
+Only removing the current maximum score or latest upload reads the candidate
+table (one MAX() over the job's rows); a job with no stats row, or whose old
+values are unknown, is rebuilt from its candidates. Serving the summary never
+reads the candidate table.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, insert, select, update
+from . import db
+from .models import Candidate, JobPosting, JobStats
+
+SCORE_BUCKETS = 100
+SCORED_STATUS = 'processed'  # Only these candidates' scores are aggregated
+PERCENTILES = (50, 75, 90)
+
+_stats = JobStats.__table__
+_candidates = Candidate.__table__
+
+
+def score_bucket(score):
+    return min(max(int(score * SCORE_BUCKETS), 0), SCORE_BUCKETS - 1)
+
+
+class Delta:
+    """Changes to one job's aggregates."""
+
+    def __init__(self):
+        self.count = 0
+        self.statuses = defaultdict(int)
+        self.scored = 0
+        self.score_sum = 0.0
+        self.histogram = defaultdict(int)
+        self.added_max = None
+        self.removed_max = None
+        self.last_upload = None
+        self.removed_upload = None
+        self.rebuild = False
+
+    def add(self, status, score, uploaded_at=None, sign=1):
+        """Counts a candidate in (sign 1) or out (sign -1) of the aggregates."""
+        self.count += sign
+        self.statuses[status] += sign
+        if status == SCORED_STATUS and score is not None:
+            self.scored += sign
+            self.score_sum += sign * score
+            self.histogram[score_bucket(score)] += sign
+            if sign > 0:
+                self.added_max = _max(self.added_max, score)
+            else:
+                self.removed_max = _max(self.removed_max, score)
+        if uploaded_at is not None:
+            if sign > 0:
+                self.last_upload = _max(self.last_upload, uploaded_at)
+            else:
+                self.removed_upload = _max(self.removed_upload, uploaded_at)
+
+    def remove(self, status, score, uploaded_at=None):
+        self.add(status, score, uploaded_at, sign=-1)
+
+
+def _max(current, value):
+    return value if current is None or value > current else current
+
+
+def compute(connection, job_id):
+    """A job's aggregates computed from scratch from its candidates."""
+    job_rows = _candidates.c.job_id == job_id
+    status_counts = dict(connection.execute(
+        select(_candidates.c.status, func.count()).where(job_rows).group_by(_candidates.c.status)
+    ).all())
+    histogram = [0] * SCORE_BUCKETS
+    scored, score_sum, max_score = 0, 0.0, None
+    for score in connection.execute(select(_candidates.c.match_score).where(
+        job_rows, _candidates.c.status == SCORED_STATUS, _candidates.c.match_score.isnot(None)
+    )).scalars():
+        histogram[score_bucket(score)] += 1
+        scored += 1
+        score_sum += score
+        max_score = _max(max_score, score)
+    return {
+        'candidate_count': sum(status_counts.values()),
+        'status_counts': status_counts,
+        'scored_count': scored,
+        'score_sum': score_sum,
+        'max_score': max_score,
+        'score_histogram': histogram,
+        'last_upload_at': connection.execute(select(func.max(_candidates.c.upload_date)).where(job_rows)).scalar(),
+    }
+
+
+def _apply(connection, job_id, delta):
+    row = connection.execute(select(_stats).where(_stats.c.job_id == job_id).with_for_update()).first()
+    if row is None or delta.rebuild:
+        values = compute(connection, job_id)
+    else:
+        status_counts = dict(row.status_counts or {})
+        for status, change in delta.statuses.items():
+            status_counts[status] = status_counts.get(status, 0) + change
+        histogram = list(row.score_histogram or [0] * SCORE_BUCKETS)
+        for index, change in delta.histogram.items():
+            histogram[index] += change
+        values = {
+            'candidate_count': row.candidate_count + delta.count,
+            'status_counts': {status: count for status, count in status_counts.items() if count},
+            'scored_count': row.scored_count + delta.scored,
+            'score_sum': row.score_sum + delta.score_sum,
+            'max_score': _max(row.max_score, delta.added_max) if delta.added_max is not None else row.max_score,
+            'score_histogram': histogram,
+            'last_upload_at': _max(row.last_upload_at, delta.last_upload)
+            if delta.last_upload is not None else row.last_upload_at,
+        }
+        job_rows = _candidates.c.job_id == job_id
+        if row.max_score is not None and delta.removed_max is not None and delta.removed_max >= row.max_score:
+            values['max_score'] = connection.execute(select(func.max(_candidates.c.match_score)).where(
+                job_rows, _candidates.c.status == SCORED_STATUS
+            )).scalar()
+        if row.last_upload_at is not None and delta.removed_upload is not None \
+                and delta.removed_upload >= row.last_upload_at:
+            values['last_upload_at'] = connection.execute(
+                select(func.max(_candidates.c.upload_date)).where(job_rows)
+            ).scalar()
+        if not values['scored_count']:
+            values['score_sum'] = 0.0  # Drop accumulated rounding error
+
+    values['updated_at'] = datetime.utcnow()
+    if row is None:
+        connection.execute(insert(_stats).values(job_id=job_id, **values))
+    else:
+        connection.execute(update(_stats).where(_stats.c.job_id == job_id).values(**values))
+
+
+def record(job_id, added=(), rescored=()):
+    """
+    Applies changes made with bulk statements: added candidates as (status,
+    match_score, upload_date) and rescored processed candidates as (old
+    match_score, new match_score). The caller commits.
+    """
+    delta = Delta()
+    for status, score, uploaded_at in added:
+        delta.add(status, score, uploaded_at)
+    for old_score, new_score in rescored:
+        delta.remove(SCORED_STATUS, old_score)
+        delta.add(SCORED_STATUS, new_score)
+    _apply(db.session.connection(), job_id, delta)
+
+
+def rebuild(job_id):
+    """Recomputes a job's aggregates from its candidates; the caller commits."""
+    delta = Delta()
+    delta.rebuild = True
+    _apply(db.session.connection(), job_id, delta)
+
+
+def percentile(histogram, count, share, max_score=None):
+    """The score below which share (0-1) of the scored candidates fall, interpolated within its bucket."""
+    if not count:
+        return None
+    rank = share * count
+    seen = 0
+    for index, bucket_count in enumerate(histogram):
+        if bucket_count and seen + bucket_count >= rank:
+            value = (index + (rank - seen) / bucket_count) / SCORE_BUCKETS
+            return round(min(value, max_score) if max_score is not None else value, 4)
+        seen += bucket_count
+    return max_score
+
+
+def summarize(stats):
+    """The aggregates of a JobStats row (None: no candidates yet) for the API."""
+    if stats is None:
+        return {
+            'candidates': {'total': 0, 'by_status': {}},
+            'scores': {'count': 0, 'max': None, 'mean': None, **{f'p{p}': None for p in PERCENTILES}},
+            'last_upload_at': None,
+        }
+    count = stats.scored_count
+    return {
+        'candidates': {'total': stats.candidate_count, 'by_status': stats.status_counts},
+        'scores': {
+            'count': count,
+            'max': stats.max_score,
+            'mean': round(stats.score_sum / count, 4) if count else None,
+            **{
+                f'p{p}': percentile(stats.score_histogram, count, p / 100, stats.max_score)
+                for p in PERCENTILES
+            },
+        },
+        'last_upload_at': stats.last_upload_at,
+    }
+
+
+_UNKNOWN = object()
+
+
+def _replaced_value(history):
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return _UNKNOWN  # Set without the old value loaded
+
+
+def _keep_replaced_value(target, value, oldvalue, initiator):
+    pass
+
+
+def register_listeners():
+    """Adds the attribute and session listeners; called by create_app."""
+    for attribute in (Candidate.status, Candidate.match_score):
+        # Load the value being replaced even when it was expired, so the flush
+        # knows what to take out of the aggregates
+        if not event.contains(attribute, 'set', _keep_replaced_value):
+            event.listen(attribute, 'set', _keep_replaced_value, active_history=True)
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+
+
+def _after_flush(session, flush_context):
+    # The new/dirty/deleted collections and attribute history still describe
+    # what was just flushed
+    deltas = defaultdict(Delta)
+    new_jobs = []
+    for obj in session.new:
+        if isinstance(obj, JobPosting):
+            new_jobs.append(obj.id)
+        elif isinstance(obj, Candidate):
+            deltas[obj.job_id].add(obj.status, obj.match_score, obj.upload_date)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Candidate):
+            continue
+        state = inspect(obj)
+        status, score = state.attrs.status.history, state.attrs.match_score.history
+        if not (status.has_changes() or score.has_changes()):
+            continue
+        old_status, old_score = _replaced_value(status), _replaced_value(score)
+        if old_status is _UNKNOWN or old_score is _UNKNOWN:
+            deltas[obj.job_id].rebuild = True
+            continue
+        deltas[obj.job_id].remove(old_status, old_score)
+        deltas[obj.job_id].add(obj.status, obj.match_score)
+
+    for obj in session.deleted:
+        if isinstance(obj, Candidate):
+            values = inspect(obj).dict
+            if 'job_id' not in values:
+                continue
+            delta = deltas[values['job_id']]
+            if {'status', 'match_score', 'upload_date'} <= set(values):
+                delta.remove(values['status'], values['match_score'], values['upload_date'])
+            else:
+                delta.rebuild = True
+
+    connection = session.connection()
+    for job_id in new_jobs:
+        if job_id not in deltas:
+            deltas[job_id] = Delta()  # Starts the job's row at zero
+    for job_id in sorted(deltas):
+        _apply(connection, job_id, deltas[job_id])
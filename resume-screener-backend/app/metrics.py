@@ -0,0 +1,232 @@
+"""
+Per-stage timings, counters and the Prometheus text exposition behind
+/api/metrics.
+
+Code records with span(stage) (a timing into the resume_stage_seconds
+histogram), observe() and inc(). Every process — each server worker, the
+background worker threads with it, and the extraction pool children — keeps
+its own registry and flushes a snapshot to <dir>/metrics.<pid>.<start>.json
+at most every FLUSH_INTERVAL seconds; the endpoint merges all snapshots, so
+counters add up across processes and survive a process exiting. Clear the
+directory with reset() when the server starts.
+
+Each request also gets a trace of its spans, logged with its total time for
+requests that recorded any. Requests are profiled with cProfile while the
+profiling flag file exists, so profiling can be switched on and off on a
+running server; the flag file may list the endpoints to profile, one per line.
+"""
+import cProfile
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+
+FLUSH_INTERVAL = 1.0  # Seconds between snapshot writes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+DESCRIPTIONS = {
+    'resume_stage_seconds': ('histogram', 'Time spent in each stage of resume processing'),
+    'http_request_duration_seconds': ('histogram', 'Time spent serving API requests'),
+    'extract_pages_total': ('counter', 'PDF pages extracted'),
+    'extract_chars_total': ('counter', 'Characters of text extracted'),
+    'extraction_cache_lookups_total': ('counter', 'Extraction cache lookups by result'),
+    'resumes_processed_total': ('counter', 'Resumes extracted and scored, by outcome'),
+}
+
+# Defaults; create_app overrides them from the app config. Pool children keep
+# these, so the default path matches the config default.
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETTINGS = {
+    'dir': os.environ.get('METRICS_DIR', os.path.join(_root, 'metrics')),
+    'profile_flag': os.environ.get('PROFILE_FLAG_FILE', os.path.join(_root, 'profile.flag')),
+    'profile_dir': os.environ.get('PROFILE_DIR', os.path.join(_root, 'profiles')),
+}
+
+_counters = {}  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_lock = threading.Lock()
+_local = threading.local()
+_started = int(time.time())
+_last_flush = 0.0
+
+
+def init_app(app):
+    SETTINGS.update({
+        'dir': app.config['METRICS_DIR'],
+        'profile_flag': app.config['PROFILE_FLAG_FILE'],
+        'profile_dir': app.config['PROFILE_DIR'],
+    })
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _maybe_flush()
+
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[len(LATENCY_BUCKETS)] += 1
+        histogram[-1] += seconds
+    _maybe_flush()
+
+
+@contextmanager
+def span(stage):
+    """Times a block as one stage of resume processing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe('resume_stage_seconds', seconds, stage=stage)
+        trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0.0) + seconds
+
+
+def _snapshot():
+    with _lock:
+        return {
+            'counters': [[name, labels, value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, labels, values] for (name, labels), values in _histograms.items()],
+        }
+
+
+def flush():
+    """Writes this process's snapshot for the metrics endpoint to merge."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    try:
+        os.makedirs(SETTINGS['dir'], exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=SETTINGS['dir'], suffix='.part')
+        with os.fdopen(fd, 'w') as out:
+            json.dump(_snapshot(), out)
+        os.replace(temp_path, os.path.join(SETTINGS['dir'], f'metrics.{os.getpid()}.{_started}.json'))
+    except OSError as e:
+        print(f"Metrics flush failed: {e}")
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+def reset():
+    """Deletes the snapshots of earlier runs; call once when the server starts."""
+    for path in glob.glob(os.path.join(SETTINGS['dir'], 'metrics.*.json')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _merged():
+    """Counters and histograms summed over every process's snapshot."""
+    flush()
+    counters, histograms = {}, {}
+    for path in glob.glob(os.path.join(SETTINGS['dir'], 'metrics.*.json')):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue  # Being replaced or removed
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.get(key)
+            histograms[key] = values if total is None else [a + b for a, b in zip(total, values)]
+    return counters, histograms
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def render():
+    """All metrics in the Prometheus text format."""
+    counters, histograms = _merged()
+    lines = []
+    for name in sorted({name for name, _ in counters} | {name for name, _ in histograms}):
+        kind, description = DESCRIPTIONS.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f'{name}{_labels(labels)} {value}')
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {round(values[-1], 6)}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def _profile_requested():
+    """Whether the current request should be profiled, per the flag file."""
+    try:
+        with open(SETTINGS['profile_flag']) as f:
+            endpoints = {line.strip() for line in f if line.strip()}
+    except OSError:
+        return False
+    return not endpoints or (request.endpoint or '').split('.')[-1] in endpoints
+
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    _local.trace = {}
+    if _profile_requested():
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _finish_request(response):
+    seconds = time.perf_counter() - g.pop('request_started', time.perf_counter())
+    endpoint = (request.endpoint or 'unmatched').split('.')[-1]
+    observe('http_request_duration_seconds', seconds,
+            endpoint=endpoint, method=request.method, status=response.status_code)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(SETTINGS['profile_dir'], exist_ok=True)
+        path = os.path.join(SETTINGS['profile_dir'], f'{time.strftime("%Y%m%dT%H%M%S")}-{endpoint}-{os.getpid()}.prof')
+        profiler.dump_stats(path)
+        response.headers['X-Profile'] = os.path.basename(path)
+
+    trace, _local.trace = getattr(_local, 'trace', None), None
+    if trace:
+        stages = ' '.join(f'{stage}={1000 * value:.1f}ms' for stage, value in trace.items())
+        current_app.logger.info(f"{request.method} {request.path} {response.status_code} {1000 * seconds:.1f}ms {stages}")
+    return response
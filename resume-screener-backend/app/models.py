@@ -38,8 +38,17 @@ class JobPosting(db.Model):
         'experience': 0.3,
         'semantic': 0.2
     })
+    # Precomputed scoring profile of the description (see app/job_profile.py)
+    description_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the description it was built from
+    description_vector = db.Column(db.LargeBinary, nullable=True)  # float32 spaCy vector
+    description_terms = db.Column(db.JSON, nullable=True)  # Keyword set for the fallback scorer
+    # Scoring fingerprint (see app/skills.py) the candidates were last rescored against
+    scoring_fingerprint = db.Column(db.JSON, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='active', server_default='active')  # active, deleting
+    # Bumped on every change to the job or its candidates (see app/job_changes.py)
+    change_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     candidates = db.relationship('Candidate', backref='job', lazy=True, cascade="all, delete-orphan")
 
     def __repr__(self):
@@ -55,6 +64,8 @@ class Candidate(db.Model):
     education = db.Column(db.JSON, nullable=False, default=list)  # List of education entries
     work_history = db.Column(db.JSON, nullable=False, default=list)  # List of work experiences
     resume_text = db.Column(db.Text, nullable=True)
+    resume_vector = db.Column(db.LargeBinary, nullable=True)  # float32 spaCy vector, computed once at ingest
+    resume_terms = db.Column(db.JSON, nullable=True)  # Normalized keyword set for the fallback scorer
     match_score = db.Column(db.Float, nullable=True)  # Overall match score (0-1)
     score_breakdown = db.Column(db.JSON, nullable=True)  # Detailed score breakdown
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -66,9 +77,94 @@ class Candidate(db.Model):
     original_filename = db.Column(db.String(255), nullable=True)
     filename = db.Column(db.String(255), nullable=True)
     file_path = db.Column(db.String(500), nullable=True)
-    status = db.Column(db.String(50), default='uploaded')
+    status = db.Column(db.String(50), default='uploaded')  # queued, processing, processed, error
     score = db.Column(db.Float, nullable=True)
     processed_data = db.Column(db.JSON, nullable=True)
+    resume_file_id = db.Column(db.Integer, db.ForeignKey('resume_file.id'), nullable=True)  # Shared stored file
+    duplicate_of_id = db.Column(db.Integer, db.ForeignKey('candidate.id', ondelete='SET NULL'), nullable=True)  # Same file already on this job
+
+    __table_args__ = (
+        db.Index('ix_candidate_job_id_status', 'job_id', 'status'),
+        db.Index('ix_candidate_user_id', 'user_id'),
+        db.Index('ix_candidate_resume_file_id_job_id', 'resume_file_id', 'job_id'),
+    )
 
     def __repr__(self):
         return f'<Candidate {self.id} for Job {self.job_id}>'
+
+# Listings page by (match_score DESC, id DESC) within a job; PostgreSQL builds
+# this one with NULLS LAST, see migration 2f6d8b4e1a07
+db.Index(
+    'ix_candidate_job_id_match_score',
+    Candidate.job_id, Candidate.match_score.desc(), Candidate.id.desc()
+)
+
+class ResumeFile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)  # Content hash, also the stored file name
+    file_path = db.Column(db.String(500), nullable=False)
+    size = db.Column(db.Integer, nullable=True)  # Bytes
+    # Extraction results shared by every candidate created from this file
+    resume_text = db.Column(db.Text, nullable=True)
+    resume_vector = db.Column(db.LargeBinary, nullable=True)
+    resume_terms = db.Column(db.JSON, nullable=True)
+    name = db.Column(db.String(120), nullable=True)
+    extracted_at = db.Column(db.DateTime, nullable=True)  # None until extraction succeeded
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    candidates = db.relationship('Candidate', backref='resume_file', lazy=True)
+
+    def __repr__(self):
+        return f'<ResumeFile {self.sha256[:12]}>'
+
+class JobStats(db.Model):
+    # Aggregates over a job's candidates, kept up to date as they change (see app/job_stats.py)
+    job_id = db.Column(db.Integer, db.ForeignKey('job_posting.id'), primary_key=True)
+    candidate_count = db.Column(db.Integer, nullable=False, default=0)
+    status_counts = db.Column(db.JSON, nullable=False, default=dict)  # Candidates per status
+    # Over processed candidates with a match_score
+    scored_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    max_score = db.Column(db.Float, nullable=True)
+    score_histogram = db.Column(db.JSON, nullable=False, default=list)  # Counts per equal-width bucket of 0-1
+    last_upload_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<JobStats {self.job_id}>'
+
+class JobEvent(db.Model):
+    # Live updates sent by GET /jobs/<id>/events (see app/events.py), pruned after EVENTS_RETENTION_HOURS
+    __table_args__ = (
+        db.Index('ix_job_event_job_id_id', 'job_id', 'id'),
+        # Ids are never reused after pruning, so a stale Last-Event-ID can't match a newer event
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)  # The SSE event id
+    job_id = db.Column(db.Integer, nullable=False)  # Plain integer, so a deleted job's last event is kept
+    kind = db.Column(db.String(20), nullable=False)  # candidate, rescore, job
+    data = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<JobEvent {self.id} {self.kind}>'
+
+class BackgroundTask(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # Name of the registered task handler
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, processing, done, error
+    payload = db.Column(db.JSON, nullable=True)  # Handler-specific arguments
+    # Plain integers rather than foreign keys so a task outlives the rows it refers to
+    candidate_id = db.Column(db.Integer, nullable=True, index=True)
+    job_id = db.Column(db.Integer, nullable=True, index=True)
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text, nullable=True)
+    progress = db.Column(db.Integer, nullable=True)  # Items done so far, for long-running tasks
+    total = db.Column(db.Integer, nullable=True)  # Items to do, when known
+    result = db.Column(db.JSON, nullable=True)  # Handler-specific outcome
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<BackgroundTask {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,7 @@
+"""
+Imported by the process pool's forkserver (see app/pools.py), so the spaCy
+model is loaded once there and every pool child forks with it in place.
+"""
+from .scorer import warm_up
+
+warm_up()
@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination for candidate listings.
+
+Candidates are listed best score first: match_score DESC NULLS LAST, then id
+DESC as a tie breaker. The cursor is the (match_score, id) of the last row of a
+page, so every page is a bounded index range scan instead of an OFFSET.
+"""
+import base64
+import json
+
+from sqlalchemy import and_, or_
+from . import db
+from .models import Candidate
+
+# Only the columns the listing returns; resume_text and the JSON feature
+# columns are never loaded
+LISTING_COLUMNS = (
+    Candidate.id,
+    Candidate.name,
+    Candidate.original_filename,
+    Candidate.status,
+    Candidate.match_score,
+    Candidate.score,
+    Candidate.upload_date,
+    Candidate.processed_data,
+    Candidate.duplicate_of_id,
+)
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(match_score, candidate_id):
+    raw = json.dumps([match_score, candidate_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        match_score, candidate_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (None if match_score is None else float(match_score)), int(candidate_id)
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def _float_arg(args, name):
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidPageRequest(f'{name} must be a number')
+
+
+def candidate_query(job_id, args, default_limit=100, max_limit=1000):
+    """
+    Builds the listing query for one page of a job's candidates and returns
+    (query, limit). The query fetches limit + 1 rows to detect a next page.
+    With default_limit None, a request without a limit gets every row and
+    the limit returned is None.
+
+    Supported query arguments: limit, cursor, status (comma separated),
+    min_score and max_score.
+    """
+    limit = None
+    if 'limit' in args or default_limit is not None:
+        try:
+            limit = int(args.get('limit', default_limit))
+        except ValueError:
+            raise InvalidPageRequest('limit must be an integer')
+        limit = max(1, min(limit, max_limit))
+
+    query = db.session.query(*LISTING_COLUMNS).filter(Candidate.job_id == job_id)
+
+    statuses = [s.strip() for s in args.get('status', '').split(',') if s.strip()]
+    if statuses:
+        query = query.filter(Candidate.status.in_(statuses))
+
+    min_score = _float_arg(args, 'min_score')
+    max_score = _float_arg(args, 'max_score')
+    if min_score is not None:
+        query = query.filter(Candidate.match_score >= min_score)
+    if max_score is not None:
+        query = query.filter(Candidate.match_score <= max_score)
+
+    cursor = args.get('cursor')
+    if cursor:
+        last_score, last_id = decode_cursor(cursor)
+        if last_score is None:
+            # Already in the trailing block of unscored candidates
+            query = query.filter(Candidate.match_score.is_(None), Candidate.id < last_id)
+        else:
+            query = query.filter(or_(
+                Candidate.match_score < last_score,
+                and_(Candidate.match_score == last_score, Candidate.id < last_id),
+                Candidate.match_score.is_(None)
+            ))
+
+    query = query.order_by(
+        Candidate.match_score.desc().nulls_last(),
+        Candidate.id.desc()
+    )
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query, limit
+
+
+def candidate_page(job_id, args, default_limit=100, max_limit=1000):
+    """Returns (rows, next_cursor) for one page of a job's candidates."""
+    query, limit = candidate_query(job_id, args, default_limit, max_limit)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].match_score, rows[-1].id)
+    return rows, next_cursor
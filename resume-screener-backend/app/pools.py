@@ -0,0 +1,47 @@
+"""The process pool shared by the CPU-bound ingest paths."""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# 'fork' is not offered: a forked child inherits whatever the request threads
+# hold at that moment, such as the store lock of app/storage.py, for its life
+START_METHODS = ('forkserver', 'spawn')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_app(app):
+    context_name = app.config['BATCH_MP_CONTEXT']
+    if context_name is not None and context_name not in START_METHODS:
+        raise ValueError(f"BATCH_MP_CONTEXT must be one of {START_METHODS}, got {context_name!r}")
+
+
+def in_pool_worker():
+    """True inside a pool child, which may not start processes of its own."""
+    return multiprocessing.current_process().daemon
+
+
+def get_process_pool(workers=None, context_name=None):
+    """
+    Returns the shared process pool, creating it on first use. The first caller
+    decides its size (default: the number of cores) and start method.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if context_name not in (None, *START_METHODS):
+                raise ValueError(f"Process pool start method must be one of {START_METHODS}, got {context_name!r}")
+            if context_name is None:
+                # forkserver keeps the request threads out of the children and is
+                # not available on Windows
+                methods = multiprocessing.get_all_start_methods()
+                context_name = 'forkserver' if 'forkserver' in methods else 'spawn'
+            context = multiprocessing.get_context(context_name)
+            if context_name == 'forkserver':
+                # Children fork from a server that has already loaded the spaCy
+                # model, sharing its pages instead of each loading a copy
+                context.set_forkserver_preload(['app.nlp_preload'])
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=context)
+        return _pool
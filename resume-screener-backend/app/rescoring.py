@@ -0,0 +1,202 @@
+"""
+Incremental rescoring of a job's candidates from stored features.
+
+Each candidate's score_breakdown records the job's scoring fingerprint (see
+app/skills.py). A rescore compares it with the job's current fingerprint and
+recomputes only the stale components, from features cached at ingest: the
+semantic score from the stored resume vectors (one matrix-vector product per
+chunk), experience from Candidate.experience, skills from Candidate.skills
+(or one regex pass over the stored text when the job now lists a skill the
+original scan did not look for), and new weights by recombining. No resume
+file is read again, and each chunk is written back with one batched UPDATE.
+"""
+from sqlalchemy import update
+from sqlalchemy.orm import load_only
+from . import db, events, job_changes, job_stats
+from .job_profile import get_job_profile
+from .models import BackgroundTask, Candidate
+from .scorer import calculate_basic_similarity, document_vectors, extract_keywords
+from .skills import (
+    cached_skills_cover, evaluate_resume, get_matcher, rescore_breakdown,
+    scoring_fingerprint, stale_components
+)
+from .vector_index import index_candidates
+from .vectors import cosine_scores, cosine_similarity, pack_vector, stack_vectors
+from .worker import enqueue
+
+
+def _score_without_vector(candidates, job, profile):
+    """
+    Fully scores candidates that have no usable stored vector or no stored
+    breakdown, backfilling their features from resume_text so the next rescore
+    takes the fast path. The texts needing a vector are parsed in one nlp.pipe
+    batch. Candidates without text can't be scored against the job as it is
+    now, so they are marked as errors rather than left with a stale score.
+    """
+    for candidate in candidates:
+        if not candidate.resume_text:
+            candidate.status = 'error'
+            candidate.match_score = 0
+            candidate.score_breakdown = None
+            candidate.processed_data = {'error': 'No resume text to rescore from'}
+    candidates = [candidate for candidate in candidates if candidate.resume_text]
+    to_parse = [
+        candidate for candidate in candidates
+        if candidate.resume_terms is None or profile.vector is not None
+    ]
+    parsed = dict(zip(
+        (candidate.id for candidate in to_parse),
+        document_vectors([candidate.resume_text for candidate in to_parse])
+    ))
+
+    for candidate in candidates:
+        if candidate.id in parsed:
+            vector, terms = parsed[candidate.id], extract_keywords(candidate.resume_text)
+            candidate.resume_vector = pack_vector(vector)
+            candidate.resume_terms = sorted(terms)
+        else:
+            vector, terms = None, set(candidate.resume_terms)
+
+        if vector is not None and profile.vector is not None:
+            score = cosine_similarity(vector, profile.vector)
+        else:
+            score = calculate_basic_similarity(candidate.resume_text, job.description, profile, terms)
+        scores = evaluate_resume(candidate.resume_text, job, score)
+        candidate.match_score = scores['match_score']
+        candidate.score_breakdown = scores['score_breakdown']
+        candidate.skills = scores['skills']
+        candidate.experience = scores['experience']
+
+
+def _rescore_chunk(rows, job, profile, fingerprint, force):
+    """
+    Rescores the stale candidates of one chunk. Returns (candidates rescored,
+    ids that went through the full path).
+    """
+    stale = {
+        row.id: set(fingerprint) if force or row.score_breakdown is None
+        else stale_components(row.score_breakdown, fingerprint)
+        for row in rows
+    }
+    rows = [row for row in rows if stale[row.id]]
+    if not rows:
+        return 0, []
+
+    # Semantic scores for the whole chunk from the stored vectors
+    semantic = {}
+    needs_semantic = [row for row in rows if 'semantic' in stale[row.id] and row.score_breakdown is not None]
+    if needs_semantic and profile.vector is not None:
+        matrix, indices = stack_vectors([row.resume_vector for row in needs_semantic], dim=profile.vector.shape[0])
+        for i, score in zip(indices, cosine_scores(matrix, profile.vector)):
+            semantic[needs_semantic[i].id] = float(score)
+
+    # Rows without a breakdown, or needing a semantic score their vector can't
+    # give, are scored in full
+    full = {
+        row.id for row in rows
+        if row.score_breakdown is None or ('semantic' in stale[row.id] and row.id not in semantic)
+    }
+    incremental = [row for row in rows if row.id not in full]
+
+    rescan = {
+        row.id for row in incremental
+        if 'skills' in stale[row.id] and not cached_skills_cover(job, row.score_breakdown)
+    }
+    texts = dict(db.session.query(Candidate.id, Candidate.resume_text).filter(
+        Candidate.id.in_(rescan)
+    ).all()) if rescan else {}
+
+    scores, rescanned = [], []
+    for row in incremental:
+        parts = stale[row.id]
+        changes = {}
+        if 'semantic' in parts:
+            changes['semantic_score'] = semantic[row.id]
+        if 'experience' in parts:
+            changes['years'] = row.experience or 0.0
+        if 'skills' in parts:
+            if row.id in rescan:
+                found, _ = get_matcher(job).scan(texts.get(row.id) or '')
+                rescanned.append({'id': row.id, 'skills': sorted(found)})
+            else:
+                found = row.skills or ()
+            changes['found'] = found
+        match_score, breakdown = rescore_breakdown(job, row.score_breakdown, **changes)
+        scores.append({'id': row.id, 'match_score': match_score, 'score_breakdown': breakdown})
+
+    if scores:
+        job_changes.touch(job.id)  # The batched UPDATEs bypass the ORM's change tracking
+        db.session.execute(update(Candidate), scores)
+        old_scores = {row.id: row.match_score for row in incremental}
+        job_stats.record(job.id, rescored=[(old_scores[entry['id']], entry['match_score']) for entry in scores])
+        events.record(job.id, rescored=[(entry['id'], entry['match_score']) for entry in scores])
+    if rescanned:
+        db.session.execute(update(Candidate), rescanned)
+
+    if full:
+        candidates = Candidate.query.options(load_only(
+            Candidate.id, Candidate.status, Candidate.resume_text, Candidate.resume_vector,
+            Candidate.resume_terms, Candidate.match_score, Candidate.score_breakdown,
+            Candidate.skills, Candidate.experience, Candidate.processed_data
+        )).filter(Candidate.id.in_(full)).all()
+        _score_without_vector(candidates, job, profile)
+
+    return len(rows), sorted(full)
+
+
+def rescore_job(job, chunk_size=1000, force=False, progress=None):
+    """
+    Brings the scores of a job's processed candidates up to date with the job,
+    recomputing only stale components (all of them with force). progress, if
+    given, is called as progress(done, total) after every chunk.
+    Returns the number of candidates rescored.
+    """
+    fingerprint = scoring_fingerprint(job)
+    profile = get_job_profile(job)
+    db.session.commit()  # Keep a freshly built profile
+
+    total = Candidate.query.filter_by(job_id=job.id, status='processed').count()
+    if progress:
+        progress(0, total)
+
+    rescored = 0
+    done = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(
+            Candidate.id, Candidate.resume_vector, Candidate.score_breakdown,
+            Candidate.skills, Candidate.experience, Candidate.match_score
+        ).filter(
+            Candidate.job_id == job.id,
+            Candidate.status == 'processed',
+            Candidate.id > last_id
+        ).order_by(Candidate.id).limit(chunk_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        count, full = _rescore_chunk(rows, job, profile, fingerprint, force)
+        db.session.commit()
+        if full:
+            index_candidates(full)  # Vectors may have been backfilled
+        rescored += count
+        done += len(rows)
+        if progress:
+            progress(done, total)
+
+    job.scoring_fingerprint = fingerprint
+    db.session.commit()
+    return rescored
+
+
+def queue_rescore(job, force=False, chunk_size=1000):
+    """
+    Queues a background rescore of the job, reusing one that is still queued.
+    Returns the task; the caller commits.
+    """
+    task = BackgroundTask.query.filter_by(kind='rescore_job', job_id=job.id, status='queued').first()
+    if task is not None:
+        if force and not (task.payload or {}).get('force'):
+            task.payload = {**(task.payload or {}), 'force': True}
+        return task
+    return enqueue('rescore_job', payload={'force': force, 'chunk_size': chunk_size}, job_id=job.id)
@@ -1,23 +1,42 @@
 import os
 import time
-from flask import Blueprint, request, jsonify, current_app, url_for
+from flask import Blueprint, Response, request, jsonify, current_app, url_for, abort
 from werkzeug.utils import secure_filename
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from . import db
-from .models import JobPosting, Candidate, User  # Import your models
-from .scorer import process_resume
+from .models import JobPosting, JobStats, Candidate, User, BackgroundTask  # Import your models
+from .worker import enqueue, wake_workers
+from . import batch, batch_scorer
+from . import events, extraction_cache, job_changes, job_stats, metrics, serialization, storage, vector_index
+from .deletion import queue_job_deletion, reap_files
+from .extraction import UnsupportedFileType, check_supported
+from .job_profile import get_job_profile, refresh_job_profile
+from .pagination import InvalidPageRequest, candidate_page, decode_cursor, encode_cursor
+from .rescoring import queue_rescore
+from .search import InvalidQuery, SearchUnavailable, search_candidates
+from .skills import DEFAULT_WEIGHTS, scoring_fingerprint
 
 # Create the blueprint
 api_bp = Blueprint('api', __name__)
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
-MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _reap_stored(paths):
+    """Removes files a failed upload stored, unless another upload or candidate uses them."""
+    paths = sorted(set(paths))
+    if not paths:
+        return
+    try:
+        # Outside the storing lock: the reaper waits for in-flight uploads to commit
+        reap_files(paths)
+    except Exception as e:
+        current_app.logger.error(f'Error removing files of a failed upload: {str(e)}')
+        db.session.rollback()
+
 # Error handlers
 @api_bp.errorhandler(400)
 def bad_request(error):
@@ -31,6 +50,10 @@ def unauthorized(error):
 def not_found(error):
     return jsonify({'error': 'Not found', 'message': str(error)}), 404
 
+@api_bp.errorhandler(413)
+def request_too_large(error):
+    return jsonify({'error': 'File too large', 'message': str(error)}), 413
+
 @api_bp.errorhandler(500)
 def internal_error(error):
     return jsonify({'error': 'Internal server error', 'message': str(error)}), 500
@@ -104,15 +127,70 @@ def me():
 @api_bp.route('/jobs', methods=['GET'])
 @jwt_required()
 def get_jobs():
+    # Changes to any job (or its candidates) change the ETag
+    tag = serialization.etag(job_changes.change_counts())
+    cached = serialization.not_modified(tag)
+    if cached is not None:
+        return cached
+    
     jobs = JobPosting.query.all()
-    return jsonify([{
+    response = serialization.json_array_response([{
         'id': job.id,
         'title': job.title,
         'description': job.description,
         'required_skills': job.required_skills,
         'preferred_skills': job.preferred_skills,
-        'created_at': job.created_at.isoformat() if job.created_at else None
+        'status': job.status,
+        'created_at': job.created_at
     } for job in jobs])
+    return serialization.set_etag(response, tag)
+
+@api_bp.route('/jobs/summary', methods=['GET'])
+@jwt_required()
+def get_jobs_summary():
+    """
+    Jobs newest first with their candidate aggregates (see app/job_stats.py)
+    and without descriptions, a page at a time: limit and cursor, with the
+    next page's cursor in X-Next-Cursor.
+    """
+    tag = serialization.etag(job_changes.change_counts())
+    cached = serialization.not_modified(tag)
+    if cached is not None:
+        return cached
+    
+    try:
+        limit = int(request.args.get('limit', current_app.config['JOB_SUMMARY_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, current_app.config['JOB_SUMMARY_MAX_PAGE_SIZE']))
+    
+    query = db.session.query(
+        JobPosting.id, JobPosting.title, JobPosting.status, JobPosting.created_at, JobPosting.created_by, JobStats
+    ).outerjoin(JobStats, JobStats.job_id == JobPosting.id)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            _, last_id = decode_cursor(cursor)  # Only the id part is used
+        except InvalidPageRequest as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(JobPosting.id < last_id)
+    rows = query.order_by(JobPosting.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = encode_cursor(None, rows[limit - 1].id) if len(rows) > limit else None
+    response = serialization.json_array_response([{
+        'id': row.id,
+        'title': row.title,
+        'status': row.status,
+        'created_at': row.created_at,
+        'created_by': row.created_by,
+        **job_stats.summarize(row.JobStats)
+    } for row in rows[:limit]])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = '<{}>; rel="next"'.format(url_for(
+            request.endpoint, **{**request.args.to_dict(), 'cursor': next_cursor}
+        ))
+    return serialization.set_etag(response, tag)
 
 @api_bp.route('/jobs', methods=['POST'])
 @jwt_required()
@@ -130,6 +208,9 @@ def create_job():
         )
         
         db.session.add(job)
+        db.session.flush()
+        # Parse the description once now rather than on every resume upload
+        refresh_job_profile(job)
         db.session.commit()
         
         return jsonify({
@@ -152,43 +233,108 @@ def get_job(job_id):
         'required_skills': job.required_skills,
         'preferred_skills': job.preferred_skills,
         'min_experience': job.min_experience,
+        'score_weights': job.score_weights,
+        'status': job.status,
         'created_at': job.created_at.isoformat() if job.created_at else None,
         'created_by': job.created_by
     })
 
-@api_bp.route('/jobs/<int:job_id>', methods=['DELETE'])
+@api_bp.route('/jobs/<int:job_id>', methods=['PUT'])
 @jwt_required()
-def delete_job(job_id):
+def update_job(job_id):
     job = JobPosting.query.get_or_404(job_id)
     
-    # Check if user has permission to delete this job
-    current_user_id = get_jwt_identity()
-    if job.created_by != current_user_id:
-        return jsonify({'error': 'You can only delete jobs you created'}), 403
+    if job.created_by != get_jwt_identity():
+        return jsonify({'error': 'You can only edit jobs you created'}), 403
+    if job.status == 'deleting':
+        return jsonify({'error': 'Job is being deleted'}), 409
+    
+    data = request.get_json() or {}
+    weights = data.get('score_weights')
+    if weights is not None and (
+        not isinstance(weights, dict)
+        or set(weights) - set(DEFAULT_WEIGHTS)
+        or not all(isinstance(value, (int, float)) and value >= 0 for value in weights.values())
+    ):
+        return jsonify({'error': f'score_weights must map {", ".join(DEFAULT_WEIGHTS)} to non-negative numbers'}), 400
     
     try:
-        # Delete associated candidates and their files
-        candidates = Candidate.query.filter_by(job_id=job_id).all()
-        for candidate in candidates:
-            # Delete the file if it exists
-            if candidate.file_path and os.path.exists(candidate.file_path):
-                try:
-                    os.remove(candidate.file_path)
-                except OSError:
-                    pass  # File might already be deleted
-            
-            # Delete candidate record
-            db.session.delete(candidate)
+        before = scoring_fingerprint(job)
+        for field in ('title', 'description', 'required_skills', 'preferred_skills', 'score_weights'):
+            if field in data:
+                setattr(job, field, data[field])
+        if 'min_experience' in data:
+            job.min_experience = float(data['min_experience'])
+        
+        changed = sorted(name for name, value in scoring_fingerprint(job).items() if before[name] != value)
+        if 'semantic' in changed:
+            refresh_job_profile(job)
         
-        # Delete the job
-        db.session.delete(job)
+        # Scores go stale when any scoring input changed; bring them up to date in the background
+        task = None
+        if changed:
+            task = queue_rescore(job, chunk_size=current_app.config['RESCORE_CHUNK_SIZE'])
         db.session.commit()
+        if task is not None:
+            wake_workers()
         
-        return jsonify({'message': 'Job deleted successfully'}), 200
+        return jsonify({
+            'message': 'Job updated successfully',
+            'job_id': job.id,
+            'changed': changed,
+            'rescore_task_id': task.id if task else None,
+            'rescore_status_url': url_for('api.get_task', task_id=task.id) if task else None
+        }), 202 if task else 200
         
-    except Exception as e:
+    except (TypeError, ValueError) as e:
         db.session.rollback()
-        return jsonify({'error': 'Failed to delete job', 'details': str(e)}), 500
+        return jsonify({'error': 'Failed to update job', 'details': str(e)}), 400
+
+@api_bp.route('/jobs/<int:job_id>/rescore', methods=['POST'])
+@jwt_required()
+def rescore_job_candidates(job_id):
+    """Queues a rescore of the job's candidates; full=true recomputes every component."""
+    job = JobPosting.query.get_or_404(job_id)
+    if job.created_by != get_jwt_identity():
+        return jsonify({'error': 'You can only rescore jobs you created'}), 403
+    if job.status == 'deleting':
+        return jsonify({'error': 'Job is being deleted'}), 409
+    data = request.get_json(silent=True) or {}
+    
+    task = queue_rescore(job, force=bool(data.get('full')), chunk_size=current_app.config['RESCORE_CHUNK_SIZE'])
+    db.session.commit()
+    wake_workers()
+    
+    return jsonify({
+        'message': 'Rescore queued',
+        'job_id': job.id,
+        'task_id': task.id,
+        'status_url': url_for('api.get_task', task_id=task.id)
+    }), 202
+
+@api_bp.route('/jobs/<int:job_id>', methods=['DELETE'])
+@jwt_required()
+def delete_job(job_id):
+    job = JobPosting.query.get_or_404(job_id)
+    
+    # Check if user has permission to delete this job
+    current_user_id = get_jwt_identity()
+    if job.created_by != current_user_id:
+        return jsonify({'error': 'You can only delete jobs you created'}), 403
+    
+    # The rows and files are removed by a background task; the job shows
+    # status 'deleting' until it is done
+    task = queue_job_deletion(job)
+    db.session.commit()
+    wake_workers()
+    
+    return jsonify({
+        'message': 'Job deletion queued',
+        'job_id': job_id,
+        'status': job.status,
+        'task_id': task.id,
+        'status_url': url_for('api.get_task', task_id=task.id)
+    }), 202
 
 # Resume Upload and Processing
 @api_bp.route('/jobs/<int:job_id>/upload', methods=['POST'])
@@ -196,9 +342,13 @@ def delete_job(job_id):
 def upload_resume(job_id):
     # Check if job exists
     job = JobPosting.query.get_or_404(job_id)
+    if job.status == 'deleting':
+        return jsonify({'error': 'Job is being deleted'}), 409
     
     # Debug: Log request details
     current_app.logger.info(f"Upload request for job {job_id}")
+    with metrics.span('receive'):
+        request.files  # Parsing the body streams the file to the upload folder
     current_app.logger.info(f"Request files: {list(request.files.keys())}")
     current_app.logger.info(f"Request form: {list(request.form.keys())}")
     
@@ -214,6 +364,10 @@ def upload_resume(job_id):
         current_app.logger.error("No file selected")
         return jsonify({'error': 'No selected file'}), 400
     
+    if getattr(file.stream, 'too_large', False):
+        current_app.logger.error(f"File too large: {file.filename}")
+        abort(413)
+    
     # Validate file type
     if not file or not allowed_file(file.filename):
         current_app.logger.error(f"Invalid file type: {file.filename}")
@@ -221,108 +375,391 @@ def upload_resume(job_id):
             'error': f'Invalid file type. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
         }), 400
 
+    stored = []
     try:
-        # Ensure upload directory exists
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        
-        # Create secure and unique filename
         filename = secure_filename(file.filename)
-        base, ext = os.path.splitext(filename)
-        unique_filename = f"{base}_{int(time.time())}{ext}"
-        filepath = os.path.join(UPLOAD_FOLDER, unique_filename)
+        ext = os.path.splitext(filename)[1]
+        # Parsed, if it must be, before taking the lock below
+        job_profile = get_job_profile(job)
         
-        # Save the file
-        file.save(filepath)
+        # Until the candidate is committed, so a job deletion can't reap the file under it
+        with storage.storing(current_app.config['UPLOAD_FOLDER']):
+            # Store the file under its content hash; identical uploads share one copy
+            with metrics.span('save'):
+                sha256, filepath, size = storage.store_file(file.stream, current_app.config['UPLOAD_FOLDER'], ext)
+            stored.append(filepath)
+            try:
+                # Types no extractor handles (e.g. a legacy .doc renamed .docx) never become candidates
+                check_supported(filepath)
+            except UnsupportedFileType as e:
+                storage.discard_file(sha256, filepath)
+                current_app.logger.error(f"Unsupported resume {file.filename}: {e}")
+                return jsonify({'error': 'Unsupported file type', 'details': str(e)}), 400
+            resume_file = storage.get_or_create_resume_file(sha256, filepath, size)
+            duplicate = storage.find_duplicate(job_id, resume_file.id)
         
-        # Process the resume to extract text and calculate match score
-        current_app.logger.info(f"Processing resume: {filepath}")
-        processing_result = process_resume(filepath, job)
-        
-        if 'error' in processing_result:
-            current_app.logger.error(f"Resume processing failed: {processing_result['error']}")
-            # Still create the candidate record but with error status
-            candidate = Candidate(
-                original_filename=filename,
-                filename=unique_filename,
-                file_path=filepath,
-                job_id=job_id,
-                user_id=get_jwt_identity(),
-                status='error',
-                resume_text=processing_result.get('resume_text', ''),
-                match_score=0,
-                name=processing_result.get('name', 'Unknown')
-            )
-        else:
-            # Create candidate record with processed data
             candidate = Candidate(
                 original_filename=filename,
-                filename=unique_filename,
+                filename=os.path.basename(filepath),
                 file_path=filepath,
                 job_id=job_id,
                 user_id=get_jwt_identity(),
-                status='processed',
-                resume_text=processing_result.get('resume_text', ''),
-                match_score=processing_result.get('match_score', 0),
-                name=processing_result.get('name', 'Unknown')
+                status='queued',
+                resume_file_id=resume_file.id,
+                duplicate_of_id=duplicate.id if duplicate else None
             )
+            db.session.add(candidate)
         
-        db.session.add(candidate)
-        db.session.commit()
-        
-        current_app.logger.info(f"Resume processed successfully. Match score: {candidate.match_score}")
+            if resume_file.extracted_at is not None:
+                # Seen before: score from the stored extraction, no PDF or NLP pass
+                storage.apply_stored_features(candidate, resume_file, job, job_profile)
+                with metrics.span('db_commit'):
+                    db.session.commit()
+                vector_index.index_candidates([candidate.id])
+                current_app.logger.info(f"Resume {sha256[:12]} already extracted, scored inline")
+                status_code = 200
+            else:
+                # Queue the resume; a background worker extracts the text and scores it
+                db.session.flush()
+                enqueue('process_resume', candidate_id=candidate.id, job_id=job_id)
+                with metrics.span('db_commit'):
+                    db.session.commit()
+                wake_workers()
+                current_app.logger.info(f"Resume queued for processing: {filepath}")
+                status_code = 202
         
         return jsonify({
-            'message': 'Resume uploaded and processed successfully',
+            'message': 'Resume uploaded and queued for processing' if status_code == 202
+                       else 'Resume uploaded and processed successfully',
             'resume_id': candidate.id,
-            'filename': unique_filename,
+            'filename': candidate.filename,
             'job_id': job_id,
+            'status': candidate.status,
             'match_score': candidate.match_score,
-            'name': candidate.name
+            'duplicate': duplicate is not None,
+            'duplicate_of': duplicate.id if duplicate else None,
+            'status_url': url_for('api.get_resume_status', resume_id=candidate.id)
+        }), status_code
+        
+    except Exception as e:
+        current_app.logger.error(f'Error uploading resume: {str(e)}')
+        db.session.rollback()
+        _reap_stored(stored)
+        return jsonify({
+            'error': 'Failed to upload resume',
+            'details': str(e)
+        }), 500
+
+@api_bp.route('/jobs/<int:job_id>/upload/batch', methods=['POST'])
+@jwt_required()
+def upload_resume_batch(job_id):
+    job = JobPosting.query.get_or_404(job_id)
+    if job.status == 'deleting':
+        return jsonify({'error': 'Job is being deleted'}), 409
+    
+    # Batch bodies may be much larger than single uploads; set before the body is read
+    request.max_content_length = current_app.config['BATCH_MAX_CONTENT_LENGTH']
+    # Accept any mix of resumes and ZIP archives under 'files' (or 'file')
+    with metrics.span('receive'):
+        files = request.files.getlist('files') + request.files.getlist('file')
+    if not files:
+        return jsonify({'error': 'No files in request'}), 400
+    
+    current_app.logger.info(f"Batch upload for job {job_id}: {len(files)} parts")
+    
+    entries = []
+    try:
+        # Until the candidates are committed, so a job deletion can't reap their files
+        with storage.storing(current_app.config['UPLOAD_FOLDER']):
+            with metrics.span('save'):
+                batch.save_uploads(
+                    files,
+                    current_app.config['UPLOAD_FOLDER'],
+                    allowed_file,
+                    max_files=current_app.config['BATCH_MAX_FILES'],
+                    max_file_size=current_app.config['MAX_FILE_SIZE'],
+                    entries=entries
+                )
+            batch.attach_resume_files(entries, job_id)
+            with metrics.span('db_insert'):
+                batch.insert_candidates(entries, job_id, get_jwt_identity())
+        
+        # Scored once the lock is released: extraction takes a while and may start the process pool
+        try:
+            with metrics.span('score'):
+                batch.score_entries(entries, job, current_app.config)
+            with metrics.span('db_update'):
+                batch.save_results(entries)
+        except Exception as e:
+            db.session.rollback()
+            batch.fail_candidates(entries, str(e))
+            raise
+        
+        results = batch.manifest(entries)
+        processed = sum(1 for entry in results if entry['status'] == 'processed')
+        current_app.logger.info(f"Batch upload for job {job_id}: {processed}/{len(results)} processed")
+        
+        return jsonify({
+            'job_id': job_id,
+            'total': len(results),
+            'processed': processed,
+            'results': results
         })
         
     except Exception as e:
-        current_app.logger.error(f'Error processing resume: {str(e)}')
+        current_app.logger.error(f'Error processing batch upload: {str(e)}')
         db.session.rollback()
+        _reap_stored(entry['file_path'] for entry in entries if 'file_path' in entry)
         return jsonify({
-            'error': 'Failed to process resume',
+            'error': 'Failed to process batch upload',
             'details': str(e)
         }), 500
 
-@api_bp.route('/jobs/<int:job_id>/candidates', methods=['GET'])
+@api_bp.route('/score-matrix', methods=['POST'])
 @jwt_required()
-def get_job_candidates(job_id):
-    # Verify job exists
-    JobPosting.query.get_or_404(job_id)
+def get_score_matrix():
+    data = request.get_json() or {}
+    top_k = data.get('top_k')
+    memory_budget = current_app.config['SCORE_MATRIX_MEMORY_MB'] * 1024 * 1024
+    max_candidates = current_app.config['SCORE_MATRIX_MAX_CANDIDATES']
+    
+    # candidate_ids is required; job_ids defaults to every job but may not be empty
+    requested_jobs = data.get('job_ids')
+    requested_candidates = data.get('candidate_ids')
+    for field, ids in (('job_ids', requested_jobs), ('candidate_ids', requested_candidates)):
+        if ids is None and field == 'job_ids':
+            continue
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify({'error': f'{field} must be a non-empty list of ids'}), 400
+    if len(requested_candidates) > max_candidates:
+        return jsonify({
+            'error': f'At most {max_candidates} candidate_ids per request',
+            'details': 'Split larger sets across several requests'
+        }), 400
+    
+    jobs = batch_scorer.load_jobs(requested_jobs)
+    candidate_ids, vectors, terms = batch_scorer.load_resumes(requested_candidates)
+    
+    missing_jobs = sorted(set(requested_jobs or ()) - set(jobs.job_ids))
+    missing_candidates = sorted(set(requested_candidates) - set(candidate_ids))
+    if missing_jobs or missing_candidates:
+        return jsonify({
+            'error': 'Unknown jobs or unprocessed candidates requested',
+            'missing_job_ids': missing_jobs,
+            'missing_candidate_ids': missing_candidates
+        }), 404
+    
+    if top_k:
+        indices, scores = batch_scorer.top_k(vectors, terms, jobs, int(top_k), memory_budget)
+        return jsonify({
+            'job_ids': jobs.job_ids,
+            'results': {
+                str(job_id): [{
+                    'candidate_id': candidate_ids[i],
+                    'score': round(float(score), 4)
+                } for i, score in zip(indices[j], scores[j])]
+                for j, job_id in enumerate(jobs.job_ids)
+            }
+        })
+    
+    if len(candidate_ids) * jobs.size > current_app.config['SCORE_MATRIX_MAX_CELLS']:
+        return jsonify({'error': 'Score matrix too large, request top_k results instead'}), 400
+    
+    scores = batch_scorer.score_matrix(vectors, terms, jobs, memory_budget)
+    return jsonify({
+        'job_ids': jobs.job_ids,
+        'candidate_ids': candidate_ids,
+        'scores': scores.round(4).tolist()  # One row per candidate, one column per job
+    })
+
+@api_bp.route('/jobs/<int:job_id>/suggest', methods=['GET'])
+@jwt_required()
+def suggest_candidates(job_id):
+    """The k existing candidates (from any job) whose resumes best match this job."""
+    job = JobPosting.query.get_or_404(job_id)
+    k = request.args.get('k', 50, type=int)
+    if k is None or not 1 <= k <= current_app.config['SUGGEST_MAX_K']:
+        return jsonify({'error': f"k must be between 1 and {current_app.config['SUGGEST_MAX_K']}"}), 400
+    
+    profile = get_job_profile(job)
+    db.session.commit()  # Keep a freshly built profile
+    if profile.vector is None:
+        return jsonify({'error': 'Suggestions need document vectors, which are unavailable without spaCy'}), 409
+    
+    started = time.perf_counter()
+    own = {row.id for row in db.session.query(Candidate.id).filter_by(job_id=job_id)}
+    # Over-fetch so copies of the same file can be collapsed
+    try:
+        matches = vector_index.suggest(profile.vector, 2 * k, exclude=own)
+    except vector_index.IndexNotReady as e:
+        response = jsonify({'error': 'Suggestions unavailable', 'details': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    took_ms = (time.perf_counter() - started) * 1000
+    
+    rows = {
+        row.id: row for row in db.session.query(
+            Candidate.id, Candidate.name, Candidate.original_filename,
+            Candidate.job_id, Candidate.resume_file_id
+        ).filter(Candidate.id.in_([candidate_id for candidate_id, _ in matches]))
+    }
+    results, seen_files = [], set()
+    for candidate_id, similarity in matches:
+        row = rows.get(candidate_id)
+        if row is None:
+            continue  # Deleted since it was indexed
+        if row.resume_file_id is not None:
+            if row.resume_file_id in seen_files:
+                continue
+            seen_files.add(row.resume_file_id)
+        results.append({
+            'candidate_id': row.id,
+            'name': row.name,
+            'original_filename': row.original_filename,
+            'job_id': row.job_id,
+            'similarity': round(similarity, 4)
+        })
+        if len(results) == k:
+            break
+    
+    return jsonify({
+        'job_id': job_id,
+        'k': k,
+        'backend': vector_index.get_index().backend,
+        'took_ms': round(took_ms, 2),
+        'results': results
+    })
+
+def candidate_listing(job_id):
+    """
+    A job's candidates, best match first. The body stays a plain list. Paged
+    only when limit or cursor is given, so clients that fetch once still get
+    every candidate; the cursor for the next page is sent in the
+    X-Next-Cursor header.
+    """
+    # The job's change counter both checks it exists and versions the listing,
+    # so an unchanged listing is answered without querying the candidates
+    version = job_changes.change_count(job_id)
+    if version is None:
+        abort(404)
+    tag = serialization.etag(job_id, version)
+    cached = serialization.not_modified(tag)
+    if cached is not None:
+        return cached
     
-    candidates = Candidate.query.filter_by(job_id=job_id).all()
-    return jsonify([{
+    try:
+        rows, next_cursor = candidate_page(
+            job_id,
+            request.args,
+            default_limit=current_app.config['CANDIDATES_PAGE_SIZE'] if 'cursor' in request.args else None,
+            max_limit=current_app.config['CANDIDATES_MAX_PAGE_SIZE']
+        )
+    except InvalidPageRequest as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = serialization.json_array_response([{
         'id': c.id,
         'name': c.name,
         'original_filename': c.original_filename,
         'status': c.status,
         'match_score': c.match_score,
         'score': c.score,
-        'upload_date': c.upload_date.isoformat() if c.upload_date else None,
-        'processed_data': c.processed_data  # Include any processed data
-    } for c in candidates])
+        'upload_date': c.upload_date,
+        'processed_data': c.processed_data,  # Include any processed data
+        'duplicate_of': c.duplicate_of_id
+    } for c in rows])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = '<{}>; rel="next"'.format(url_for(
+            request.endpoint, job_id=job_id, **{**request.args.to_dict(), 'cursor': next_cursor}
+        ))
+    return serialization.set_etag(response, tag)
+
+@api_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_resumes():
+    """
+    Full-text search over resumes: q (words, "phrases", prefix*, AND, OR,
+    NOT/-term, parentheses), optional job_id, limit and cursor. The body is a
+    list, best match first; the next page's cursor is in X-Next-Cursor.
+    """
+    try:
+        limit = int(request.args.get('limit', current_app.config['SEARCH_PAGE_SIZE']))
+        job_id = request.args.get('job_id', type=int)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, current_app.config['SEARCH_MAX_PAGE_SIZE']))
+
+    try:
+        results, next_cursor = search_candidates(
+            request.args.get('q', ''), job_id=job_id, limit=limit, cursor=request.args.get('cursor')
+        )
+    except (InvalidQuery, InvalidPageRequest) as e:
+        return jsonify({'error': str(e)}), 400
+    except SearchUnavailable as e:
+        return jsonify({'error': str(e)}), 501
+
+    response = serialization.json_array_response(results)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = '<{}>; rel="next"'.format(url_for(
+            request.endpoint, **{**request.args.to_dict(), 'cursor': next_cursor}
+        ))
+    return response
+
+@api_bp.route('/jobs/<int:job_id>/candidates', methods=['GET'])
+@jwt_required()
+def get_job_candidates(job_id):
+    return candidate_listing(job_id)
 
 @api_bp.route('/jobs/<int:job_id>/resumes', methods=['GET'])
 @jwt_required()
 def get_job_resumes(job_id):
-    # Verify job exists
+    return candidate_listing(job_id)
+
+@api_bp.route('/jobs/<int:job_id>/events/token', methods=['POST'])
+@jwt_required()
+def create_events_token(job_id):
+    """A short-lived token for ?token= on the job's event stream, which EventSource can't send headers to."""
+    JobPosting.query.get_or_404(job_id)
+    return jsonify({
+        'token': events.stream_token(job_id, get_jwt_identity()),
+        'expires_in': current_app.config['EVENTS_TOKEN_SECONDS']
+    })
+
+@api_bp.route('/jobs/<int:job_id>/events', methods=['GET'])
+def get_job_events(job_id):
+    """
+    Server-sent events with the job's candidate status changes and scores as
+    they happen (see app/events.py). Authenticated by the Authorization header
+    or, for EventSource, a stream token from /events/token as ?token=; the
+    access token itself is never accepted in the URL. Last-Event-ID, or
+    last_event_id for a first connection, resumes after that event.
+    """
+    token = request.args.get('token')
+    if token is not None:
+        if events.stream_token_user(token, job_id) is None:
+            return jsonify({'error': 'Invalid or expired stream token'}), 401
+    else:
+        verify_jwt_in_request()
     JobPosting.query.get_or_404(job_id)
+    resume_from = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        resume_from = int(resume_from) if resume_from else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an integer'}), 400
     
-    candidates = Candidate.query.filter_by(job_id=job_id).all()
-    return jsonify([{
-        'id': c.id,
-        'name': c.name,
-        'original_filename': c.original_filename,
-        'status': c.status,
-        'match_score': c.match_score,
-        'score': c.score,
-        'upload_date': c.upload_date.isoformat() if c.upload_date else None,
-        'processed_data': c.processed_data  # Include any processed data
-    } for c in candidates])
+    try:
+        stream = events.event_stream(job_id, resume_from)
+    except events.TooManyStreams as e:
+        response = jsonify({'error': 'Too many event streams', 'details': str(e)})
+        response.headers['Retry-After'] = str(max(1, current_app.config['EVENTS_RETRY_MS'] // 1000))
+        return response, 503
+    
+    response = Response(stream, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream
+    return response
 
 @api_bp.route('/resumes/<int:resume_id>', methods=['GET'])
 @jwt_required()
@@ -338,14 +775,57 @@ def get_resume(resume_id):
         'upload_date': candidate.upload_date.isoformat() if candidate.upload_date else None,
         'job_id': candidate.job_id,
         'user_id': candidate.user_id,
-        'processed_data': candidate.processed_data
+        'processed_data': candidate.processed_data,
+        'skills': candidate.skills,
+        'experience': candidate.experience,
+        'score_breakdown': candidate.score_breakdown,
+        'duplicate_of': candidate.duplicate_of_id
     })
 
+@api_bp.route('/resumes/<int:resume_id>/status', methods=['GET'])
+@jwt_required()
+def get_resume_status(resume_id):
+    candidate = Candidate.query.get_or_404(resume_id)
+    processed_data = candidate.processed_data or {}
+    return jsonify({
+        'id': candidate.id,
+        'status': candidate.status,
+        'match_score': candidate.match_score,
+        'name': candidate.name,
+        'error': processed_data.get('error') if candidate.status == 'error' else None
+    })
+
+@api_bp.route('/tasks/<int:task_id>', methods=['GET'])
+@jwt_required()
+def get_task(task_id):
+    task = BackgroundTask.query.get_or_404(task_id)
+    return jsonify({
+        'id': task.id,
+        'kind': task.kind,
+        'status': task.status,
+        'job_id': task.job_id,
+        'candidate_id': task.candidate_id,
+        'progress': task.progress,
+        'total': task.total,
+        'result': task.result,
+        'error': task.error,
+        'created_at': task.created_at.isoformat() if task.created_at else None,
+        'started_at': task.started_at.isoformat() if task.started_at else None,
+        'finished_at': task.finished_at.isoformat() if task.finished_at else None
+    })
+
+# Prometheus metrics endpoint
+@api_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    # Unauthenticated, like /health, so Prometheus can scrape it
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Health check endpoint
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'ok',
         'version': '1.0.0',
-        'timestamp': time.time()
+        'timestamp': time.time(),
+        'extraction_cache': extraction_cache.stats()
     })
\ No newline at end of file
@@ -1,24 +1,83 @@
-import pdfplumber
+import os
 import re
-from difflib import SequenceMatcher
-
-# Try to load spaCy, but fall back to basic text processing if not available
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-    SPACY_AVAILABLE = True
-except Exception as e:
-    print(f"spaCy not available: {e}")
-    SPACY_AVAILABLE = False
-    nlp = None
-
-def extract_text_from_pdf(filepath):
-    """Extracts text from a PDF file."""
-    text = ""
-    with pdfplumber.open(filepath) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text()
-    return text
+import threading
+from . import metrics
+from .extraction import extract_text
+from .pools import in_pool_worker
+from .similarity import minhash_sketch, sequence_ratio, sketch_similarity
+from .skills import evaluate_resume
+from .vectors import cosine_similarity
+
+# Engine for the text-similarity part of calculate_basic_similarity:
+# 'minhash' (linear time, bounded memory) or 'sequence' (difflib, quadratic)
+FALLBACK_ENGINES = ('minhash', 'sequence')
+SIMILARITY_FALLBACK = os.environ.get('SIMILARITY_FALLBACK', 'minhash')
+
+# spaCy is loaded on first use, not at import: scripts and app start-up that
+# never score anything don't pay for the model. Servers call warm_up() (or set
+# SPACY_PRELOAD) so the load happens before requests, and before forking.
+SPACY_MODEL = os.environ.get('SPACY_MODEL', 'en_core_web_sm')
+# Pipeline components the similarity scorer doesn't use
+SPACY_DISABLE = ('parser', 'ner')
+
+# Batched parsing (document_vectors): documents longer than max_chars are
+# split into chunks ('chunk') or cut off ('truncate')
+LONG_DOCUMENT_MODES = ('chunk', 'truncate')
+NLP_SETTINGS = {
+    'batch_size': int(os.environ.get('NLP_BATCH_SIZE', 32)),
+    'n_process': int(os.environ.get('NLP_N_PROCESS', 1)),
+    'max_chars': int(os.environ.get('NLP_MAX_CHARS', 100000)),
+    'long_documents': os.environ.get('NLP_LONG_DOCUMENTS', 'chunk'),
+}
+
+_nlp = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+def get_nlp():
+    """Returns the spaCy pipeline, loading it once (thread-safe); None if spaCy is unavailable."""
+    global _nlp, _nlp_loaded
+    if _nlp_loaded:
+        return _nlp
+    with _nlp_lock:
+        if not _nlp_loaded:
+            try:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL, disable=list(SPACY_DISABLE))
+            except Exception as e:
+                print(f"spaCy not available: {e}")
+                _nlp = None
+            _nlp_loaded = True
+    return _nlp
+
+def spacy_available():
+    return get_nlp() is not None
+
+def warm_up():
+    """Loads the model and runs one document through it. Returns True if spaCy is available."""
+    nlp = get_nlp()
+    if nlp is not None:
+        nlp("warm up")
+    return nlp is not None
+
+def init_app(app):
+    global SIMILARITY_FALLBACK, SPACY_MODEL
+    engine = app.config['SIMILARITY_FALLBACK']
+    if engine not in FALLBACK_ENGINES:
+        raise ValueError(f"SIMILARITY_FALLBACK must be one of {FALLBACK_ENGINES}, got {engine!r}")
+    SIMILARITY_FALLBACK = engine
+    if not _nlp_loaded:
+        SPACY_MODEL = app.config['SPACY_MODEL']
+    if app.config['NLP_LONG_DOCUMENTS'] not in LONG_DOCUMENT_MODES:
+        raise ValueError(f"NLP_LONG_DOCUMENTS must be one of {LONG_DOCUMENT_MODES}")
+    NLP_SETTINGS.update({
+        'batch_size': app.config['NLP_BATCH_SIZE'],
+        'n_process': app.config['NLP_N_PROCESS'],
+        'max_chars': app.config['NLP_MAX_CHARS'],
+        'long_documents': app.config['NLP_LONG_DOCUMENTS'],
+    })
+    if app.config['SPACY_PRELOAD']:
+        warm_up()
 
 def extract_name(text):
     """Extracts a potential name from the resume text."""
@@ -31,32 +90,111 @@ def extract_name(text):
                 return line.strip()
     return "Unknown"
 
-def calculate_similarity(resume_text, job_description):
-    """Calculates the semantic similarity between two texts."""
-    if SPACY_AVAILABLE and nlp:
+def extract_keywords(text):
+    """Returns the set of lowercase words used for keyword overlap."""
+    return set(re.findall(r'\b\w+\b', text.lower()))
+
+def _split_long(text, max_chars, mode):
+    """The pieces of a document that are parsed, each at most max_chars long."""
+    if not max_chars or len(text) <= max_chars:
+        return [text]
+    if mode == 'truncate':
+        return [text[:max_chars]]
+    pieces, start = [], 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            # Cut at whitespace so no word is split between chunks
+            cut = text.rfind(' ', start, end)
+            if cut > start:
+                end = cut
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+def document_vectors(texts, batch_size=None, n_process=None):
+    """
+    spaCy vectors for many texts, in input order, parsed in batches through
+    nlp.pipe. Long documents are truncated or chunked (NLP_SETTINGS); a chunked
+    document's vector is the token-weighted mean of its chunk vectors. Returns
+    None for every text without spaCy.
+    """
+    nlp = get_nlp()
+    if nlp is None:
+        return [None] * len(texts)
+    batch_size = batch_size or NLP_SETTINGS['batch_size']
+    n_process = n_process or NLP_SETTINGS['n_process']
+    if in_pool_worker():
+        n_process = 1  # Pool children may not start processes of their own
+
+    owners, pieces = [], []
+    for i, text in enumerate(texts):
+        for piece in _split_long(text or '', NLP_SETTINGS['max_chars'], NLP_SETTINGS['long_documents']):
+            owners.append(i)
+            pieces.append(piece)
+
+    sums = [None] * len(texts)
+    weights = [0] * len(texts)
+    with metrics.span('nlp'):
+        # nlp.pipe yields docs in input order, also with n_process > 1
+        for owner, doc in zip(owners, nlp.pipe(pieces, batch_size=batch_size, n_process=n_process)):
+            weight = max(len(doc), 1)
+            vector = doc.vector * weight
+            sums[owner] = vector if sums[owner] is None else sums[owner] + vector
+            weights[owner] += weight
+    return [None if total is None else total / weight for total, weight in zip(sums, weights)]
+
+def build_features(text):
+    """
+    Parses a document once into the parts the scorers reuse:
+    its spaCy vector (None without spaCy) and its keyword set.
+    """
+    vector = None
+    try:
+        vector = document_vectors([text])[0]
+    except Exception as e:
+        print(f"spaCy parsing failed: {e}")
+    return vector, extract_keywords(text)
+
+def calculate_similarity(resume_text, job_description, job_profile=None, resume_vector=None):
+    """
+    Calculates the semantic similarity between two texts.
+    A precomputed job_profile or resume_vector saves parsing that text again.
+    """
+    nlp = get_nlp()
+    if nlp is not None:
         try:
-            resume_doc = nlp(resume_text)
-            job_doc = nlp(job_description)
-            return resume_doc.similarity(job_doc)
+            if resume_vector is None:
+                resume_vector = nlp(resume_text).vector
+            if job_profile is not None and job_profile.vector is not None:
+                job_vector = job_profile.vector
+            else:
+                job_vector = nlp(job_description).vector
+            # Same measure as Doc.similarity, but works on stored vectors
+            return cosine_similarity(resume_vector, job_vector)
         except Exception as e:
             print(f"spaCy similarity failed: {e}")
             # Fall back to basic text similarity
-            return calculate_basic_similarity(resume_text, job_description)
+            return calculate_basic_similarity(resume_text, job_description, job_profile)
     else:
-        return calculate_basic_similarity(resume_text, job_description)
+        return calculate_basic_similarity(resume_text, job_description, job_profile)
 
-def calculate_basic_similarity(resume_text, job_description):
+def calculate_basic_similarity(resume_text, job_description, job_profile=None, resume_terms=None):
     """Basic text similarity using sequence matching and keyword overlap."""
     # Convert to lowercase for comparison
     resume_lower = resume_text.lower()
     job_lower = job_description.lower()
     
     # Calculate sequence similarity
-    sequence_similarity = SequenceMatcher(None, resume_lower, job_lower).ratio()
+    if SIMILARITY_FALLBACK == 'sequence':
+        sequence_similarity = sequence_ratio(resume_lower, job_lower)
+    else:
+        job_sketch = job_profile.sketch if job_profile is not None else minhash_sketch(job_lower)
+        sequence_similarity = sketch_similarity(minhash_sketch(resume_lower), job_sketch)
     
     # Calculate keyword overlap
-    resume_words = set(re.findall(r'\b\w+\b', resume_lower))
-    job_words = set(re.findall(r'\b\w+\b', job_lower))
+    resume_words = resume_terms if resume_terms is not None else extract_keywords(resume_lower)
+    job_words = job_profile.terms if job_profile is not None else extract_keywords(job_lower)
     
     if len(job_words) == 0:
         return 0.0
@@ -70,28 +208,101 @@ def calculate_basic_similarity(resume_text, job_description):
     
     return min(combined_score, 1.0)  # Cap at 1.0
 
-def process_resume(filepath, job):
+def semantic_score(resume_text, resume_vector, resume_terms, job, job_profile=None):
+    """Semantic similarity of already extracted resume features to a job (0-1)."""
+    if resume_vector is not None:
+        return calculate_similarity(resume_text, job.description, job_profile, resume_vector)
+    return calculate_basic_similarity(resume_text, job.description, job_profile, set(resume_terms))
+
+def score_resume(resume_text, resume_vector, resume_terms, job, job_profile=None):
     """
-    Processes a resume file to extract text, calculate a match score,
-    and extract basic information.
+    Scores already extracted resume features against a job: the weighted
+    skills/experience/semantic match_score plus score_breakdown, skills and
+    experience (see app/skills.py).
     """
-    try:
-        resume_text = extract_text_from_pdf(filepath)
-        if not resume_text:
-            return {'error': 'Could not extract text from PDF.'}
+    with metrics.span('similarity'):
+        semantic = semantic_score(resume_text, resume_vector, resume_terms, job, job_profile)
+    with metrics.span('skills'):
+        return evaluate_resume(resume_text, job, semantic)
+
+def analyze_resume(resume_text, job, job_profile=None, features=None):
+    """
+    Scores extracted resume text and extracts basic information. features is
+    the (vector, keyword set) pair if the text has already been parsed.
+    """
+    # Parse the resume once; its vector and keywords are stored so the
+    # candidate can be rescored later without touching the file again
+    resume_vector, resume_terms = features if features is not None else build_features(resume_text)
 
-        # For now, our score is based on semantic similarity.
-        # This can be expanded to include keyword matching, etc.
-        score = calculate_similarity(resume_text, job.description)
+    # Weighted skills, experience and semantic similarity
+    scores = score_resume(resume_text, resume_vector, resume_terms, job, job_profile)
 
-        # Simple extraction for name
-        name = extract_name(resume_text)
+    # Simple extraction for name
+    name = extract_name(resume_text)
 
-        return {
-            'resume_text': resume_text,
-            'match_score': round(score, 4), # as decimal (0-1 range)
-            'name': name,
-        }
+    return {
+        'resume_text': resume_text,
+        'resume_vector': resume_vector,
+        'resume_terms': sorted(resume_terms),
+        'match_score': scores['match_score'], # as decimal (0-1 range)
+        'score_breakdown': scores['score_breakdown'],
+        'skills': scores['skills'],
+        'experience': scores['experience'],
+        'name': name,
+    }
+
+def process_resume(filepath, job, job_profile=None, sha256=None):
+    """
+    Processes a resume file to extract text, calculate a match score,
+    and extract basic information. sha256 is the file's hash, if known.
+    """
+    try:
+        resume_text = extract_text(filepath, sha256)
+        if not resume_text:
+            metrics.inc('resumes_processed_total', status='error')
+            return {'error': 'Could not extract text from resume.'}
+        result = analyze_resume(resume_text, job, job_profile)
+        metrics.inc('resumes_processed_total', status='processed')
+        return result
     except Exception as e:
         print(f"Error processing resume: {e}")
+        metrics.inc('resumes_processed_total', status='error')
         return {'error': str(e)}
+
+def process_resumes(filepaths, job, job_profile=None, hashes=None):
+    """
+    process_resume for several files: the extracted texts are parsed together
+    in one nlp.pipe batch. Results are in input order. hashes are the files'
+    sha256s, if known.
+    """
+    texts, results = [], []
+    for filepath, sha256 in zip(filepaths, hashes or [None] * len(filepaths)):
+        try:
+            resume_text = extract_text(filepath, sha256)
+        except Exception as e:
+            print(f"Error processing resume: {e}")
+            resume_text, result = '', {'error': str(e)}
+        else:
+            result = None if resume_text else {'error': 'Could not extract text from resume.'}
+        texts.append(resume_text)
+        results.append(result)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    try:
+        vectors = document_vectors([texts[i] for i in pending])
+    except Exception as e:
+        print(f"spaCy parsing failed: {e}")
+        vectors = [None] * len(pending)
+
+    for i, vector in zip(pending, vectors):
+        try:
+            results[i] = analyze_resume(texts[i], job, job_profile, (vector, extract_keywords(texts[i])))
+        except Exception as e:
+            print(f"Error processing resume: {e}")
+            results[i] = {'error': str(e)}
+
+    for result in results:
+        metrics.inc('resumes_processed_total', status='error' if 'error' in result else 'processed')
+    if in_pool_worker():
+        metrics.flush()  # The parent may scrape before this child records anything else
+    return results
@@ -0,0 +1,294 @@
+"""
+Full-text search over candidates' resume text and names.
+
+On SQLite the text is indexed in candidate_fts, an external-content FTS5
+table over candidate (porter stemming), kept in sync by triggers on insert,
+delete and updates of resume_text or name, so every write path (ORM, bulk
+INSERT, executemany UPDATE) keeps it current. On PostgreSQL candidate carries
+a generated resume_tsv tsvector column with a GIN index, which the database
+maintains itself. Migration b4d7e2a9c315 creates both; the DDL below is also
+attached to Candidate's table, so db.create_all()/drop_all() manage it too.
+
+Queries take words, "quoted phrases", prefix*, AND (implied between terms),
+OR, NOT/-term and parentheses. They are parsed here and rendered for the
+backend, so user input never reaches MATCH/to_tsquery unescaped. Results are
+ranked (bm25 / ts_rank_cd), paged by a (rank, id) cursor like the candidate
+listings, and carry an HTML snippet with the hits in <mark>.
+"""
+import html
+import re
+
+from sqlalchemy import DDL, event, text
+from . import db
+from .models import Candidate
+from .pagination import decode_cursor, encode_cursor
+
+MAX_TERMS = 32
+SNIPPET_TOKENS = 24
+NAME_WEIGHT = 2.0  # A hit in the name counts double in bm25
+TS_CONFIG = 'english'
+# Control characters mark hits in the snippet until the text is escaped
+HIT_START, HIT_STOP = '\x02', '\x03'
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS candidate_fts USING fts5("
+    "resume_text, name, content='candidate', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS candidate_fts_insert AFTER INSERT ON candidate BEGIN "
+    "INSERT INTO candidate_fts(rowid, resume_text, name) VALUES (new.id, new.resume_text, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS candidate_fts_delete AFTER DELETE ON candidate BEGIN "
+    "INSERT INTO candidate_fts(candidate_fts, rowid, resume_text, name) "
+    "VALUES ('delete', old.id, old.resume_text, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS candidate_fts_update AFTER UPDATE OF resume_text, name ON candidate BEGIN "
+    "INSERT INTO candidate_fts(candidate_fts, rowid, resume_text, name) "
+    "VALUES ('delete', old.id, old.resume_text, old.name); "
+    "INSERT INTO candidate_fts(rowid, resume_text, name) VALUES (new.id, new.resume_text, new.name); END",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS candidate_fts_update",
+    "DROP TRIGGER IF EXISTS candidate_fts_delete",
+    "DROP TRIGGER IF EXISTS candidate_fts_insert",
+    "DROP TABLE IF EXISTS candidate_fts",
+]
+POSTGRES_DDL = [
+    "ALTER TABLE candidate ADD COLUMN IF NOT EXISTS resume_tsv tsvector GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{TS_CONFIG}', coalesce(name, '')), 'A') || "
+    f"to_tsvector('{TS_CONFIG}', coalesce(resume_text, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_candidate_resume_tsv ON candidate USING gin (resume_tsv)",
+]
+
+for statement in SQLITE_DDL:
+    event.listen(Candidate.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in SQLITE_DROP:
+    event.listen(Candidate.__table__, 'before_drop', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(Candidate.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+class SearchUnavailable(RuntimeError):
+    pass
+
+
+_TOKEN = re.compile(r'(-?)"([^"]*)"?|(\()|(\))|([^\s()"]+)')
+_WORD = re.compile(r'\w+')
+
+
+def _tokens(query):
+    """('phrase', words) / ('(',) / (')',) / ('op', name) / ('word', word, prefix) tokens."""
+    tokens = []
+    for minus, phrase, opening, closing, bare in _TOKEN.findall(query):
+        if opening:
+            tokens.append(('(',))
+        elif closing:
+            tokens.append((')',))
+        elif bare in ('AND', 'OR', 'NOT'):
+            tokens.append(('op', bare))
+        elif bare:
+            negated = bare.startswith('-') and len(bare) > 1
+            if negated:
+                tokens.append(('op', 'NOT'))
+            words = _WORD.findall(bare.lower())
+            if len(words) == 1:
+                tokens.append(('word', words[0], bare.endswith('*')))
+            elif words:
+                # node.js, c++ -> the words the tokenizer splits them into
+                tokens.append(('phrase', words))
+        else:
+            words = _WORD.findall(phrase.lower())
+            if words:
+                if minus:
+                    tokens.append(('op', 'NOT'))
+                tokens.append(('phrase', words))
+    return tokens
+
+
+def parse_query(query):
+    """
+    Parses a search query into a tree of ('and', [nodes]), ('or', [nodes]),
+    ('not', node), ('word', word, prefix) and ('phrase', words). Raises
+    InvalidQuery.
+    """
+    tokens = _tokens(query or '')
+    if not tokens:
+        raise InvalidQuery('Query has no searchable terms')
+    if sum(1 for token in tokens if token[0] in ('word', 'phrase')) > MAX_TERMS:
+        raise InvalidQuery(f'Query has more than {MAX_TERMS} terms')
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def parse_or():
+        nonlocal position
+        nodes = [parse_and()]
+        while peek() == ('op', 'OR'):
+            position += 1
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and():
+        nonlocal position
+        nodes = [parse_unary()]
+        while peek() is not None and peek() not in (('op', 'OR'), (')',)):
+            if peek() == ('op', 'AND'):
+                position += 1
+            nodes.append(parse_unary())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_unary():
+        nonlocal position
+        token = peek()
+        if token == ('op', 'NOT'):
+            position += 1
+            return ('not', parse_unary())
+        if token == ('(',):
+            position += 1
+            node = parse_or()
+            if peek() != (')',):
+                raise InvalidQuery('Unbalanced parentheses')
+            position += 1
+            return node
+        if token is None or token[0] not in ('word', 'phrase'):
+            raise InvalidQuery(f"Expected a term, got {token[1] if token and token[0] == 'op' else 'end of query'}")
+        position += 1
+        return token
+
+    tree = parse_or()
+    if position != len(tokens):
+        raise InvalidQuery('Unbalanced parentheses')
+    return tree
+
+
+def _split_negated(nodes):
+    positive = [node for node in nodes if node[0] != 'not']
+    negated = [node[1] for node in nodes if node[0] == 'not']
+    if not positive:
+        raise InvalidQuery('A query needs at least one term that is not negated')
+    return positive, negated
+
+
+def to_fts5(node):
+    """The FTS5 MATCH expression for a parsed query; every term is quoted."""
+    kind = node[0]
+    if kind == 'word':
+        return f'"{node[1]}"' + ('*' if node[2] else '')
+    if kind == 'phrase':
+        return '"' + ' '.join(node[1]) + '"'
+    if kind == 'or':
+        return '(' + ' OR '.join(to_fts5(child) for child in node[1]) + ')'
+    positive, negated = _split_negated(node[1] if kind == 'and' else [node])
+    expression = ' AND '.join(to_fts5(child) for child in positive)
+    return '(' + expression + ''.join(f' NOT {to_fts5(child)}' for child in negated) + ')'
+
+
+def to_tsquery(node):
+    """The to_tsquery() input for a parsed query; terms are bare \\w+ words."""
+    kind = node[0]
+    if kind == 'word':
+        return node[1] + (':*' if node[2] else '')
+    if kind == 'phrase':
+        return '(' + ' <-> '.join(node[1]) + ')'
+    if kind == 'or':
+        return '(' + ' | '.join(to_tsquery(child) for child in node[1]) + ')'
+    positive, negated = _split_negated(node[1] if kind == 'and' else [node])
+    return '(' + ' & '.join([to_tsquery(child) for child in positive] + [f'!{to_tsquery(child)}' for child in negated]) + ')'
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def _snippet_html(snippet):
+    escaped = html.escape(snippet or '')
+    return escaped.replace(HIT_START, '<mark>').replace(HIT_STOP, '</mark>')
+
+
+RESULT_COLUMNS = 'c.id, c.job_id, c.name, c.original_filename, c.status, c.match_score'
+
+
+def _sqlite_search(tree, job_id, after, limit):
+    rank = f'bm25(candidate_fts, 1.0, {NAME_WEIGHT})'
+    filters, params = [], {'query': to_fts5(tree), 'limit': limit}
+    if job_id is not None:
+        filters.append('c.job_id = :job_id')
+        params['job_id'] = job_id
+    if after is not None:
+        filters.append(f'({rank} > :after_rank OR ({rank} = :after_rank AND c.id > :after_id))')
+        params['after_rank'], params['after_id'] = after
+    sql = f"""
+        SELECT {RESULT_COLUMNS}, {rank} AS rank,
+               snippet(candidate_fts, 0, :start, :stop, '…', {SNIPPET_TOKENS}) AS snippet
+        FROM candidate_fts JOIN candidate c ON c.id = candidate_fts.rowid
+        WHERE candidate_fts MATCH :query {''.join(' AND ' + f for f in filters)}
+        ORDER BY rank, c.id
+        LIMIT :limit
+    """
+    return db.session.execute(text(sql), {**params, 'start': HIT_START, 'stop': HIT_STOP}).all()
+
+
+def _postgres_search(tree, job_id, after, limit):
+    rank = "-ts_rank_cd(c.resume_tsv, q.query)"
+    filters, params = [], {'query': to_tsquery(tree), 'limit': limit, 'config': TS_CONFIG}
+    if job_id is not None:
+        filters.append('c.job_id = :job_id')
+        params['job_id'] = job_id
+    if after is not None:
+        filters.append(f'({rank} > :after_rank OR ({rank} = :after_rank AND c.id > :after_id))')
+        params['after_rank'], params['after_id'] = after
+    # The headline is only built for the page's rows
+    sql = f"""
+        WITH q AS (SELECT to_tsquery(CAST(:config AS regconfig), :query) AS query),
+        hits AS (
+            SELECT {RESULT_COLUMNS}, {rank} AS rank
+            FROM candidate c, q
+            WHERE c.resume_tsv @@ q.query {''.join(' AND ' + f for f in filters)}
+            ORDER BY rank, c.id
+            LIMIT :limit
+        )
+        SELECT hits.*, ts_headline(CAST(:config AS regconfig), coalesce(c.resume_text, ''), q.query,
+                                   :headline_options) AS snippet
+        FROM hits JOIN candidate c ON c.id = hits.id, q
+        ORDER BY hits.rank, hits.id
+    """
+    options = f'StartSel={HIT_START}, StopSel={HIT_STOP}, MaxWords={SNIPPET_TOKENS}, MinWords=8, MaxFragments=2'
+    return db.session.execute(text(sql), {**params, 'headline_options': options}).all()
+
+
+def search_candidates(query, job_id=None, limit=20, cursor=None):
+    """
+    One page of candidates matching the query, best match first. Returns
+    (results, next_cursor); each result has the candidate's listing fields,
+    its relevance (higher is better) and an HTML snippet. Raises InvalidQuery,
+    InvalidPageRequest or SearchUnavailable.
+    """
+    tree = parse_query(query)
+    after = decode_cursor(cursor) if cursor else None
+    dialect = _dialect()
+    if dialect == 'sqlite':
+        rows = _sqlite_search(tree, job_id, after, limit + 1)
+    elif dialect == 'postgresql':
+        rows = _postgres_search(tree, job_id, after, limit + 1)
+    else:
+        raise SearchUnavailable(f'Full-text search is not supported on {dialect}')
+
+    next_cursor = encode_cursor(rows[limit - 1].rank, rows[limit - 1].id) if len(rows) > limit else None
+    results = [{
+        'id': row.id,
+        'job_id': row.job_id,
+        'name': row.name,
+        'original_filename': row.original_filename,
+        'status': row.status,
+        'match_score': row.match_score,
+        'relevance': float(f'{-row.rank:.6g}'),  # Significant digits: small corpora rank near 0
+        'snippet': _snippet_html(row.snippet),
+    } for row in rows[:limit]]
+    return results, next_cursor
+
+
+def rebuild_index():
+    """Rebuilds the SQLite index from candidate (PostgreSQL's is generated); the caller commits."""
+    if _dialect() == 'sqlite':
+        db.session.execute(text("INSERT INTO candidate_fts(candidate_fts) VALUES ('rebuild')"))
@@ -0,0 +1,158 @@
+"""
+JSON responses for the API: orjson serialization, streamed arrays, ETags and
+compression.
+
+json_response() and json_array_response() serialize with orjson (datetimes
+come out in ISO 8601, as .isoformat() gives them). Arrays of at least
+STREAM_MIN_ITEMS items are sent as a stream, serialized (and compressed) a
+block of items at a time, so a large listing never exists as one string;
+the rows themselves are loaded before the view returns, so the stream needs
+no database session.
+
+Listings derive a weak ETag from the change counters in app/job_changes.py
+plus the query string. Read the counter before the rows: a change committed
+in between then only costs the next poll a full response, never a stale 304.
+A request whose If-None-Match matches gets 304 before anything else is
+queried.
+
+Responses of at least COMPRESS_MIN_BYTES are compressed with br (if the
+Brotli package is installed) or gzip, whichever the client prefers.
+"""
+import hashlib
+import zlib
+
+import orjson
+from flask import Response, request
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/csv')
+STREAM_BLOCK_ITEMS = 256  # Items serialized per chunk of a streamed array
+
+SETTINGS = {
+    'compress_min_bytes': 1024,
+    'gzip_level': 6,
+    'brotli_quality': 4,
+    'stream_min_items': 500,
+}
+
+
+def init_app(app):
+    SETTINGS.update({
+        'compress_min_bytes': app.config['RESPONSE_COMPRESS_MIN_BYTES'],
+        'gzip_level': app.config['RESPONSE_GZIP_LEVEL'],
+        'brotli_quality': app.config['RESPONSE_BROTLI_QUALITY'],
+        'stream_min_items': app.config['RESPONSE_STREAM_MIN_ITEMS'],
+    })
+    app.after_request(_compress_response)
+
+
+def dumps(obj):
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(obj, status=200):
+    return Response(dumps(obj), status=status, mimetype='application/json')
+
+
+def json_array_response(items, status=200):
+    """A JSON array of the given list of dicts, streamed when it is long."""
+    if len(items) < SETTINGS['stream_min_items']:
+        return json_response(items, status)
+
+    encoding = _accepted_encoding()
+    compressor = _compressor(encoding)
+
+    def generate():
+        for start in range(0, len(items), STREAM_BLOCK_ITEMS):
+            block = dumps(items[start:start + STREAM_BLOCK_ITEMS])
+            # Splice the blocks into one array
+            chunk = (b'[' if start == 0 else b',') + block[1:-1]
+            chunk = compressor.process(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+        yield compressor.process(b']') + compressor.finish() if compressor else b']'
+
+    response = Response(generate(), status=status, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def etag(*version):
+    """The ETag (sent weak) of this request's listing of data at the given version."""
+    digest = hashlib.sha1(repr((
+        version, request.path, sorted(request.args.items(multi=True))
+    )).encode('utf-8')).hexdigest()
+    return digest[:32]
+
+
+def not_modified(tag):
+    """A 304 response if the request's If-None-Match has the ETag, else None."""
+    if not request.if_none_match.contains_weak(tag):
+        return None
+    response = Response(status=304)
+    set_etag(response, tag)
+    return response
+
+
+def set_etag(response, tag):
+    response.set_etag(tag, weak=True)
+    # May be cached, but must be revalidated on every use
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _accepted_encoding():
+    offered = ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _compressor(encoding):
+    if encoding == 'br':
+        return brotli.Compressor(quality=SETTINGS['brotli_quality'])
+    if encoding == 'gzip':
+        return _GzipCompressor()
+    return None
+
+
+class _GzipCompressor:
+    """zlib with a gzip header, shaped like brotli.Compressor."""
+
+    def __init__(self):
+        self._zlib = zlib.compressobj(SETTINGS['gzip_level'], zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._zlib.compress(data)
+
+    def finish(self):
+        return self._zlib.flush()
+
+
+def _compress_response(response):
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+    body = response.get_data()
+    if len(body) < SETTINGS['compress_min_bytes']:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _accepted_encoding()
+    compressor = _compressor(encoding)
+    if compressor is None:
+        return response
+    response.set_data(compressor.process(body) + compressor.finish())
+    response.headers['Content-Encoding'] = encoding
+    return response
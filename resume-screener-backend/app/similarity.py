@@ -0,0 +1,69 @@
+"""
+Linear-time text similarity for the fallback scorer.
+
+difflib.SequenceMatcher compares two documents character by character and is
+roughly quadratic in their length. Here each text is reduced to a bottom-k
+MinHash sketch of its hashed character shingles in a single pass, with memory
+bounded by k, and two sketches are compared in O(k).
+"""
+import heapq
+import re
+import zlib
+from difflib import SequenceMatcher
+
+SHINGLE_SIZE = 5
+SKETCH_SIZE = 256
+
+_whitespace = re.compile(r'\s+')
+
+
+def normalize(text):
+    """Lowercases and collapses whitespace so layout differences don't count."""
+    return _whitespace.sub(' ', text.lower()).strip()
+
+
+def minhash_sketch(text, k=SKETCH_SIZE, shingle_size=SHINGLE_SIZE):
+    """
+    Returns the k smallest distinct shingle hashes of the text, sorted.
+    Only the current k candidates are held in memory.
+    """
+    text = normalize(text)
+    if not text:
+        return ()
+    if len(text) < shingle_size:
+        return (zlib.crc32(text.encode('utf-8')),)
+
+    data = text.encode('utf-8')
+    heap = []  # Max-heap (negated) of the k smallest hashes seen so far
+    members = set()
+    for i in range(len(data) - shingle_size + 1):
+        h = zlib.crc32(data[i:i + shingle_size])
+        if h in members:
+            continue
+        if len(heap) < k:
+            heapq.heappush(heap, -h)
+            members.add(h)
+        elif h < -heap[0]:
+            members.discard(-heapq.heappushpop(heap, -h))
+            members.add(h)
+    return tuple(sorted(members))
+
+
+def sketch_similarity(sketch_a, sketch_b, k=SKETCH_SIZE):
+    """
+    Estimates the Dice coefficient (2|A&B| / (|A|+|B|)) of the two shingle sets,
+    the same form as SequenceMatcher.ratio(), from their bottom-k sketches.
+    """
+    if not sketch_a or not sketch_b:
+        return 0.0
+    # The k smallest hashes of the union are a uniform sample of the union
+    union_sample = heapq.nsmallest(k, set(sketch_a).union(sketch_b))
+    a, b = set(sketch_a), set(sketch_b)
+    shared = sum(1 for h in union_sample if h in a and h in b)
+    jaccard = shared / len(union_sample)
+    return 2 * jaccard / (1 + jaccard)
+
+
+def sequence_ratio(text_a, text_b):
+    """The original character-level SequenceMatcher ratio (quadratic)."""
+    return SequenceMatcher(None, text_a, text_b).ratio()
@@ -0,0 +1,336 @@
+"""
+Skill and experience scoring.
+
+Each job's required and preferred skills (plus their aliases and a general
+skill vocabulary) are compiled into one regular expression that also matches
+experience statements ("5+ years", "2016 - present"). A single finditer pass
+over the resume text yields every skill and experience hit, so the cost does
+not grow with the number of skills a job lists.
+
+The weighted match score combines the skills, experience and semantic
+components using JobPosting.score_weights. Components a job does not define
+(no skill lists, no minimum experience) drop out and the remaining weights are
+renormalized, so such jobs keep the plain semantic score.
+
+Every score_breakdown records the job's scoring fingerprint (a hash of the
+inputs of each component), so a rescore after a job edit can tell which
+components are stale and recompute only those from the cached skills and
+experience.
+"""
+import hashlib
+import json
+import re
+from datetime import datetime
+from functools import lru_cache
+
+DEFAULT_WEIGHTS = {'skills': 0.5, 'experience': 0.3, 'semantic': 0.2}
+
+# Within the skills component, required skills dominate preferred ones
+REQUIRED_SHARE = 0.8
+
+# Canonical skill -> aliases that mean the same thing
+SKILL_ALIASES = {
+    'javascript': ['js', 'ecmascript'],
+    'typescript': [],
+    'python': [],
+    'c++': ['cpp'],
+    'c#': ['csharp'],
+    '.net': ['dotnet'],
+    'node.js': ['nodejs'],
+    'react': ['react.js', 'reactjs'],
+    'vue': ['vue.js', 'vuejs'],
+    'angular': ['angularjs'],
+    'postgresql': ['postgres', 'psql'],
+    'mysql': [],
+    'mongodb': ['mongo'],
+    'sql': [],
+    'nosql': [],
+    'redis': [],
+    'kubernetes': ['k8s'],
+    'docker': [],
+    'terraform': [],
+    'aws': ['amazon web services'],
+    'gcp': ['google cloud', 'google cloud platform'],
+    'azure': ['microsoft azure'],
+    'ci/cd': ['cicd', 'continuous integration', 'continuous delivery'],
+    'git': [],
+    'linux': ['unix'],
+    'java': [],
+    'go': ['golang'],
+    'rust': [],
+    'flask': [],
+    'django': [],
+    'spring': ['spring boot', 'spring framework'],
+    'graphql': [],
+    'rest': ['rest api', 'restful'],
+    'machine learning': [],
+    'deep learning': [],
+    'nlp': ['natural language processing'],
+    'pandas': [],
+    'numpy': [],
+    'tensorflow': [],
+    'pytorch': [],
+    'spark': ['apache spark', 'pyspark'],
+    'kafka': ['apache kafka'],
+    'agile': ['scrum', 'kanban'],
+}
+
+# Bare aliases too ambiguous to look for in resumes ("Node 4", "ML" as a
+# unit), only used to read the skill lists of jobs
+JOB_ALIASES = {
+    'node.js': ['node'],
+    'machine learning': ['ml'],
+    'pytorch': ['torch'],
+}
+
+# Skills named by ordinary English words, matched only in this exact form
+# ("Go", not "go hiking"; "Spring", not "spring 2019")
+EXACT_FORMS = {
+    'go': r'Go',
+    'rest': r'REST',
+    'rust': r'Rust',
+    'spark': r'Spark',
+    'spring': r'Spring(?!\s+(?:term|semester|quarter|break|(?:19|20)\d{2}))',
+}
+
+# Bumped when the vocabulary changes, so stored skills from older scans are rescanned
+VOCABULARY_VERSION = 2
+
+# Skill-like tokens may contain these characters ("c++", "c#", "node.js")
+_SKILL_EDGE_BEFORE = r'(?<![\w+#.])'
+_SKILL_EDGE_AFTER = r'(?![\w+#])'
+
+_YEARS_PATTERN = r'(?P<years>\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)\b'
+_RANGE_PATTERN = (
+    r'(?P<start>(?:19|20)\d{2})\s*(?:-|–|—|to)\s*'
+    r'(?P<end>(?:19|20)\d{2}|present|current|now|today)\b'
+)
+
+
+def normalize_skill(skill):
+    return ' '.join(str(skill).lower().split())
+
+
+def _canonical(skill):
+    """Maps an alias to its canonical skill name."""
+    skill = normalize_skill(skill)
+    for canonical, aliases in SKILL_ALIASES.items():
+        if skill == canonical or skill in aliases or skill in JOB_ALIASES.get(canonical, ()):
+            return canonical
+    return skill
+
+
+class SkillMatcher:
+    """One compiled pattern for a job's skills, the skill vocabulary and experience."""
+
+    def __init__(self, required, preferred):
+        self.required = [_canonical(skill) for skill in required if str(skill).strip()]
+        self.preferred = [_canonical(skill) for skill in preferred if str(skill).strip()]
+
+        # Surface form -> canonical skill
+        self.surface_forms = {}
+        for canonical in set(SKILL_ALIASES) | set(self.required) | set(self.preferred):
+            self.surface_forms[canonical] = canonical
+            for alias in SKILL_ALIASES.get(canonical, ()):
+                self.surface_forms[alias] = canonical
+
+        # Longest forms first so "google cloud platform" wins over "google cloud"
+        alternatives = '|'.join(
+            f'(?-i:{EXACT_FORMS[form]})' if form in EXACT_FORMS else re.escape(form).replace(r'\ ', r'\s+')
+            for form in sorted(self.surface_forms, key=len, reverse=True)
+        )
+        self.pattern = re.compile(
+            f'{_SKILL_EDGE_BEFORE}(?P<skill>{alternatives}){_SKILL_EDGE_AFTER}'
+            f'|{_RANGE_PATTERN}|{_YEARS_PATTERN}',
+            re.IGNORECASE
+        )
+
+    def scan(self, text):
+        """One pass over the text: (set of canonical skills found, years of experience)."""
+        found = set()
+        stated_years = 0.0
+        ranges = []
+        current_year = datetime.utcnow().year
+
+        for match in self.pattern.finditer(text):
+            if match.group('skill'):
+                found.add(self.surface_forms[normalize_skill(match.group('skill'))])
+            elif match.group('start'):
+                start = int(match.group('start'))
+                end = match.group('end').lower()
+                end = current_year if not end.isdigit() else int(end)
+                if start <= end <= current_year:
+                    ranges.append((start, end))
+            else:
+                stated_years = max(stated_years, float(match.group('years')))
+
+        return found, max(stated_years, _merged_span(ranges))
+
+
+def _merged_span(ranges):
+    """Total years covered by possibly overlapping (start, end) year ranges."""
+    total, last_end = 0, None
+    for start, end in sorted(ranges):
+        if last_end is not None and start < last_end:
+            start = last_end
+        if end > start:
+            total += end - start
+        last_end = end if last_end is None else max(last_end, end)
+    return float(total)
+
+
+@lru_cache(maxsize=256)
+def _compiled_matcher(required, preferred):
+    return SkillMatcher(required, preferred)
+
+
+def get_matcher(job):
+    """The compiled matcher for a job's current skill lists (cached)."""
+    return _compiled_matcher(
+        tuple(job.required_skills or ()),
+        tuple(job.preferred_skills or ())
+    )
+
+
+def combine_scores(components, weights=None):
+    """
+    Weighted sum of the available components (None components are skipped).
+    Returns (score, effective weights).
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    available = {
+        name: float(weights.get(name, 0) or 0)
+        for name, value in components.items() if value is not None
+    }
+    total = sum(available.values())
+    if not total:
+        # No usable weights: fall back to the semantic score alone
+        semantic = components.get('semantic')
+        return (semantic or 0.0), {'semantic': 1.0}
+
+    effective = {name: weight / total for name, weight in available.items()}
+    score = sum(components[name] * weight for name, weight in effective.items())
+    return min(max(score, 0.0), 1.0), effective
+
+
+def scoring_fingerprint(job):
+    """Per-component hashes of the job fields each score component depends on."""
+    def digest(value):
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    return {
+        'semantic': digest(job.description or ''),
+        'skills': digest([list(job.required_skills or ()), list(job.preferred_skills or ())]),
+        'experience': digest(float(job.min_experience or 0)),
+        'weights': digest(job.score_weights or DEFAULT_WEIGHTS),
+    }
+
+
+def stale_components(score_breakdown, fingerprint):
+    """The components whose inputs changed since the breakdown was computed."""
+    recorded = (score_breakdown or {}).get('fingerprint') or {}
+    return {name for name, value in fingerprint.items() if recorded.get(name) != value}
+
+
+def skills_component(found, matcher):
+    """(score or None, breakdown entry) for the canonical skills found in a resume."""
+    matched_required = [skill for skill in matcher.required if skill in found]
+    matched_preferred = [skill for skill in matcher.preferred if skill in found]
+    required_score = len(matched_required) / len(matcher.required) if matcher.required else None
+    preferred_score = len(matched_preferred) / len(matcher.preferred) if matcher.preferred else None
+
+    if required_score is not None and preferred_score is not None:
+        score = REQUIRED_SHARE * required_score + (1 - REQUIRED_SHARE) * preferred_score
+    else:
+        score = required_score if required_score is not None else preferred_score
+
+    return score, {
+        'score': None if score is None else round(score, 4),
+        'vocabulary': VOCABULARY_VERSION,
+        'matched_required': matched_required,
+        'missing_required': [skill for skill in matcher.required if skill not in found],
+        'matched_preferred': matched_preferred,
+        'missing_preferred': [skill for skill in matcher.preferred if skill not in found],
+    }
+
+
+def experience_component(years, min_experience):
+    """(score or None, breakdown entry) for a resume's years of experience."""
+    min_experience = float(min_experience or 0)
+    score = min(years / min_experience, 1.0) if min_experience > 0 else None
+    return score, {
+        'score': None if score is None else round(score, 4),
+        'years': years,
+        'required': min_experience,
+    }
+
+
+def _combine(job, skills_entry, experience_entry, semantic_score):
+    """match_score and the full score_breakdown from the three components."""
+    components = {
+        'skills': skills_entry.get('score'),
+        'experience': experience_entry.get('score'),
+        'semantic': semantic_score,
+    }
+    match_score, effective_weights = combine_scores(components, job.score_weights)
+    return round(match_score, 4), {
+        'skills': skills_entry,
+        'experience': experience_entry,
+        'semantic': {'score': round(semantic_score, 4)},
+        'weights': {name: round(weight, 4) for name, weight in effective_weights.items()},
+        'fingerprint': scoring_fingerprint(job),
+    }
+
+
+def evaluate_resume(resume_text, job, semantic_score):
+    """
+    Scores a resume against a job's skills, experience and the given semantic
+    similarity. Returns a dict with match_score, score_breakdown, skills and
+    experience.
+    """
+    matcher = get_matcher(job)
+    found, years = matcher.scan(resume_text)
+    _, skills_entry = skills_component(found, matcher)
+    _, experience_entry = experience_component(years, job.min_experience)
+    match_score, breakdown = _combine(job, skills_entry, experience_entry, semantic_score)
+
+    return {
+        'match_score': match_score,
+        'skills': sorted(found),
+        'experience': years,
+        'score_breakdown': breakdown,
+    }
+
+
+def cached_skills_cover(job, score_breakdown):
+    """
+    True if a resume's stored skills (Candidate.skills) answer the job's
+    current skill lists: every listed skill was part of the scan that produced
+    them, i.e. it is in the vocabulary or was on the job's lists back then.
+    """
+    entry = (score_breakdown or {}).get('skills') or {}
+    if entry.get('vocabulary') != VOCABULARY_VERSION:
+        return False
+    scanned = set(SKILL_ALIASES)
+    for key in ('matched_required', 'missing_required', 'matched_preferred', 'missing_preferred'):
+        scanned.update(entry.get(key) or ())
+    matcher = get_matcher(job)
+    return all(skill in scanned for skill in matcher.required + matcher.preferred)
+
+
+def rescore_breakdown(job, score_breakdown, semantic_score=None, found=None, years=None):
+    """
+    Recombines a stored score_breakdown with the components given: a new
+    semantic score, the canonical skills found in the resume and/or its years
+    of experience. Components not given are reused as stored.
+    Returns (match_score, score_breakdown).
+    """
+    skills_entry = score_breakdown.get('skills') or {}
+    experience_entry = score_breakdown.get('experience') or {}
+    if found is not None:
+        _, skills_entry = skills_component(set(found), get_matcher(job))
+    if years is not None:
+        _, experience_entry = experience_component(years, job.min_experience)
+    if semantic_score is None:
+        semantic_score = (score_breakdown.get('semantic') or {}).get('score') or 0.0
+    return _combine(job, skills_entry, experience_entry, semantic_score)
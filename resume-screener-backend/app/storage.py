@@ -0,0 +1,234 @@
+"""
+Content-addressed storage for uploaded resumes.
+
+Each distinct file is stored once under uploads/<aa>/<sha256><ext> and has one
+ResumeFile row holding its extracted text and features, shared by every
+Candidate created from it.
+
+An upload may reuse a file (and its ResumeFile) that a job deletion is about
+to reap, so the two are serialized: an upload holds storing() from storing
+its files until the rows that use them are committed, and the reaper checks
+and removes files under reaping(), which excludes it. Uploads score their
+files only after committing, so storing() is held for moments rather than
+through extraction, and never while a process pool starts; a reaper that
+still can't get the lock gives up after a timeout and its task is retried.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: uploads and reaping are only serialized within a process
+    fcntl = None
+
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .models import Candidate, ResumeFile
+from .scorer import score_resume
+from .uploads import UploadedPart
+from .vectors import unpack_vector
+
+CHUNK_SIZE = 64 * 1024
+STORE_LOCK_NAME = '.store.lock'
+LOCK_POLL_SECONDS = 0.05
+
+
+class _ProcessLock:
+    """A shared/exclusive lock within one process, where flock is unavailable."""
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    def acquire(self, shared, timeout=None):
+        """Returns False if the lock wasn't free within timeout seconds."""
+        with self._changed:
+            if not self._changed.wait_for(lambda: not (self._exclusive or (not shared and self._shared)), timeout):
+                return False
+            if shared:
+                self._shared += 1
+            else:
+                self._exclusive = True
+            return True
+
+    def release(self, shared):
+        with self._changed:
+            if shared:
+                self._shared -= 1
+            else:
+                self._exclusive = False
+            self._changed.notify_all()
+
+
+_process_lock = _ProcessLock()
+
+
+class StoreLockTimeout(TimeoutError):
+    """reaping() waited longer than its timeout for the uploads in progress."""
+
+
+@contextmanager
+def _store_lock(upload_folder, shared, timeout=None):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    if fcntl is None:
+        if not _process_lock.acquire(shared, timeout):
+            raise StoreLockTimeout(f'Uploads held the store lock for over {timeout}s')
+        try:
+            yield
+        finally:
+            _process_lock.release(shared)
+        return
+
+    os.makedirs(upload_folder, exist_ok=True)
+    mode = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+    # Opened per call and close-on-exec, and only held around short database
+    # work, so no child process is started while holding it
+    fd = os.open(os.path.join(upload_folder, STORE_LOCK_NAME), os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+    try:
+        # Polled rather than blocking, which would stall every greenlet of a gevent worker
+        while True:
+            try:
+                fcntl.flock(fd, mode)
+                break
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise StoreLockTimeout(f'Uploads held the store lock for over {timeout}s')
+                time.sleep(LOCK_POLL_SECONDS)
+        yield
+    finally:
+        os.close(fd)  # Releases the lock
+
+
+def storing(upload_folder):
+    """Held by an upload from storing its files until it commits the rows using them; shared."""
+    return _store_lock(upload_folder, shared=True)
+
+
+def reaping(upload_folder, timeout=None):
+    """
+    Held while removing unused files and their ResumeFile rows; excludes
+    storing(). Raises StoreLockTimeout after timeout seconds without it.
+    """
+    return _store_lock(upload_folder, shared=False, timeout=timeout)
+
+
+def content_path(upload_folder, sha256, ext):
+    return os.path.join(upload_folder, sha256[:2], f'{sha256}{ext.lower()}')
+
+
+def store_file(source, upload_folder, ext):
+    """
+    Streams a file-like object to its content-addressed location, hashing as it
+    goes; an UploadedPart, already on disk and hashed, is just renamed there.
+    Returns (sha256, path, size); an identical file already on disk is kept and
+    the new copy discarded.
+    """
+    if isinstance(source, UploadedPart):
+        sha256 = source.hexdigest()
+        path = content_path(upload_folder, sha256, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            source.keep(path)
+        return sha256, path, source.size
+
+    os.makedirs(upload_folder, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        path = content_path(upload_folder, sha256, ext)
+        if os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return sha256, path, size
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def discard_file(sha256, path):
+    """Deletes a stored file that was rejected, unless a ResumeFile already uses it."""
+    if ResumeFile.query.filter_by(sha256=sha256).first() is None and os.path.exists(path):
+        os.remove(path)
+
+
+def get_or_create_resume_file(sha256, path, size):
+    """Returns the ResumeFile for a hash, creating it if this is a new file."""
+    resume_file = ResumeFile.query.filter_by(sha256=sha256).first()
+    if resume_file is not None:
+        return resume_file
+
+    resume_file = ResumeFile(sha256=sha256, file_path=path, size=size)
+    try:
+        with db.session.begin_nested():
+            db.session.add(resume_file)
+    except IntegrityError:
+        # A concurrent upload of the same file created it first
+        resume_file = ResumeFile.query.filter_by(sha256=sha256).one()
+    return resume_file
+
+
+def find_duplicate(job_id, resume_file_id):
+    """The first candidate of the job created from the same file, if any."""
+    return Candidate.query.filter_by(
+        job_id=job_id, resume_file_id=resume_file_id
+    ).order_by(Candidate.id).first()
+
+
+def stored_features(resume_file):
+    """(text, vector, terms) of an already extracted file, or None."""
+    if resume_file.extracted_at is None:
+        return None
+    return (
+        resume_file.resume_text or '',
+        unpack_vector(resume_file.resume_vector),
+        set(resume_file.resume_terms or ())
+    )
+
+
+def apply_stored_features(candidate, resume_file, job, job_profile=None):
+    """Scores a candidate from its file's stored extraction; no PDF or NLP pass."""
+    resume_text, resume_vector, resume_terms = stored_features(resume_file)
+    candidate.status = 'processed'
+    candidate.resume_text = resume_text
+    candidate.resume_vector = resume_file.resume_vector
+    candidate.resume_terms = resume_file.resume_terms
+    apply_scores(candidate, score_resume(resume_text, resume_vector, resume_terms, job, job_profile))
+    candidate.name = resume_file.name or 'Unknown'
+
+
+def apply_scores(candidate, scores):
+    """Copies a score_resume/process_resume result onto a candidate."""
+    candidate.match_score = scores.get('match_score', 0)
+    candidate.score_breakdown = scores.get('score_breakdown')
+    candidate.skills = scores.get('skills') or []
+    candidate.experience = scores.get('experience') or 0
+
+
+def record_extraction(resume_file, processing_result, packed_vector):
+    """Stores a successful extraction on the shared file record."""
+    resume_file.resume_text = processing_result.get('resume_text', '')
+    resume_file.resume_vector = packed_vector
+    resume_file.resume_terms = processing_result.get('resume_terms')
+    resume_file.name = processing_result.get('name')
+    resume_file.extracted_at = datetime.utcnow()
+
@@ -0,0 +1,127 @@
+"""Background task handlers run by the worker pool, registered by init_app()."""
+from flask import current_app
+from . import db, metrics
+from .deletion import delete_job_rows, reap_files
+from .job_profile import get_job_profile
+from .models import Candidate, JobPosting, ResumeFile
+from .rescoring import rescore_job
+from .scorer import process_resume
+from .storage import StoreLockTimeout, apply_scores, apply_stored_features, record_extraction
+from .vector_index import index_candidates, rebuild_index, remove_candidates
+from .vectors import pack_vector
+from .worker import TaskRetry, register_task, report_progress
+
+
+def init_app(app):
+    register_task('process_resume', process_resume_task, process_resume_failed)
+    register_task('rescore_job', rescore_job_task)
+    register_task('delete_job', delete_job_task)
+    register_task('rebuild_vector_index', rebuild_vector_index_task)
+
+
+def process_resume_task(task):
+    """Scores a queued candidate, moving it through processing -> processed/error."""
+    candidate = db.session.get(Candidate, task.candidate_id)
+    if candidate is None:
+        # The candidate (or its job) was deleted while the task was queued
+        return
+
+    job = db.session.get(JobPosting, candidate.job_id)
+    job_profile = get_job_profile(job)
+    resume_file = db.session.get(ResumeFile, candidate.resume_file_id) if candidate.resume_file_id else None
+
+    # Another upload of the same file may have been extracted in the meantime
+    if resume_file is not None and resume_file.extracted_at is not None:
+        apply_stored_features(candidate, resume_file, job, job_profile)
+        db.session.commit()
+        index_candidates([candidate.id])
+        return
+
+    candidate.status = 'processing'
+    db.session.commit()
+
+    current_app.logger.info(f"Processing resume: {candidate.file_path}")
+    processing_result = process_resume(
+        candidate.file_path, job, job_profile, resume_file.sha256 if resume_file is not None else None
+    )
+
+    if 'error' in processing_result:
+        current_app.logger.error(f"Resume processing failed: {processing_result['error']}")
+        candidate.status = 'error'
+        candidate.resume_text = processing_result.get('resume_text', '')
+        candidate.match_score = 0
+        candidate.name = processing_result.get('name', 'Unknown')
+        candidate.processed_data = {'error': processing_result['error']}
+    else:
+        packed_vector = pack_vector(processing_result.get('resume_vector'))
+        candidate.status = 'processed'
+        candidate.resume_text = processing_result.get('resume_text', '')
+        candidate.resume_vector = packed_vector
+        candidate.resume_terms = processing_result.get('resume_terms')
+        apply_scores(candidate, processing_result)
+        candidate.name = processing_result.get('name', 'Unknown')
+        if resume_file is not None:
+            record_extraction(resume_file, processing_result, packed_vector)
+        current_app.logger.info(f"Resume processed successfully. Match score: {candidate.match_score}")
+
+    with metrics.span('db_commit'):
+        db.session.commit()
+    if candidate.status == 'processed':
+        index_candidates([candidate.id])
+
+
+def process_resume_failed(task, error):
+    """Marks the candidate as failed, so it isn't left 'processing' for good."""
+    candidate = db.session.get(Candidate, task.candidate_id) if task.candidate_id else None
+    if candidate is not None and candidate.status in ('queued', 'processing'):
+        candidate.status = 'error'
+        candidate.match_score = 0
+        candidate.processed_data = {'error': error}
+
+
+def rescore_job_task(task):
+    """Rescores a job's candidates chunk by chunk, recording progress on the task."""
+    job = db.session.get(JobPosting, task.job_id)
+    if job is None:
+        return
+
+    def report(done, total):
+        report_progress(task, done, total)
+
+    payload = task.payload or {}
+    rescored = rescore_job(
+        job,
+        chunk_size=payload.get('chunk_size', 1000),
+        force=payload.get('force', False),
+        progress=report
+    )
+    task.result = {'rescored': rescored}
+    current_app.logger.info(f"Rescored {rescored} candidates for job {job.id}")
+
+
+def delete_job_task(task):
+    """Deletes a job's rows in one transaction, then reaps the files they used."""
+    payload = task.payload or {}
+    if 'paths' not in payload:
+        candidate_ids, paths = delete_job_rows(task.job_id)
+        # Recorded in the same commit, so a retry reaps the files the rows no longer list
+        task.payload = {**payload, 'paths': paths}
+        task.result = {'candidates_deleted': len(candidate_ids)}
+        db.session.commit()
+        remove_candidates(candidate_ids)
+        current_app.logger.info(f"Deleted job {task.job_id} and {len(candidate_ids)} candidates")
+
+    def report(done, total):
+        report_progress(task, done, total)
+
+    try:
+        removed = reap_files(task.payload['paths'], progress=report)
+    except StoreLockTimeout as e:
+        raise TaskRetry(str(e)) from e  # The rows are gone; a retry only reaps
+    task.result = {**(task.result or {}), 'files_removed': removed}
+
+
+def rebuild_vector_index_task(task):
+    """Builds the nearest-neighbour index from every processed candidate."""
+    task.result = {'indexed': rebuild_index()}
+    current_app.logger.info(f"Rebuilt the vector index: {task.result['indexed']} candidates")
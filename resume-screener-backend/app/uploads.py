@@ -0,0 +1,78 @@
+"""
+Streaming multipart uploads.
+
+Werkzeug normally spools every uploaded file to memory or an anonymous temp
+file, which the route then reads back and copies into storage. UploadRequest
+instead streams each file part straight into a .part file inside the upload
+folder, hashing and counting the bytes as they arrive, so storage.store_file
+only has to rename it to its content-addressed path: the bytes are written
+once and never read back.
+
+The request body limit (MAX_CONTENT_LENGTH, or BATCH_MAX_CONTENT_LENGTH for
+batch uploads) is enforced by Werkzeug as the body streams in: bodies that
+declare a larger Content-Length are refused before anything is read, others
+fail with 413 as soon as they pass it. A file part over MAX_FILE_SIZE (ZIP
+archives excepted) is drained without being written and flagged too_large.
+Parts that aren't kept are deleted when the request closes.
+"""
+import hashlib
+import os
+import tempfile
+
+from flask import Request, current_app
+
+
+class UploadedPart:
+    """A file part being streamed to disk; file-like for Werkzeug and the routes."""
+
+    def __init__(self, folder, max_size=None):
+        os.makedirs(folder, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=folder, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = hashlib.sha256()
+        self.size = 0
+        self.max_size = max_size
+        self.too_large = False
+        self.kept = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.too_large:
+            return len(data)
+        if self.max_size and self.size > self.max_size:
+            # Keep reading so the rest of the request can be parsed, but stop storing
+            self.too_large = True
+            self._file.truncate(0)
+            return len(data)
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+    def keep(self, path):
+        """Moves the finished part to path; it is no longer readable afterwards."""
+        self._file.close()
+        os.replace(self.path, path)
+        self.kept = True
+
+    def close(self):
+        self._file.close()
+        if not self.kept and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read, seek, tell, ... for Werkzeug and zipfile
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """Request whose file parts are UploadedParts in the upload folder."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        archive = (filename or '').lower().endswith('.zip')
+        return UploadedPart(config['UPLOAD_FOLDER'], None if archive else config['MAX_FILE_SIZE'])
@@ -0,0 +1,403 @@
+"""
+Nearest-neighbour index over stored resume vectors.
+
+Unit-normalized resume vectors live in an append-only float32 file next to a
+file of the matching candidate ids. Both are memory-mapped, so every worker
+process reads the same pages instead of holding its own copy. Inserts append
+rows; deletes overwrite a row's id with -1 (a tombstone), and the files are
+rewritten without tombstones once they make up a quarter of the rows.
+meta.json records the generation, dimension and row count, so readers pick up
+changes made by other processes. Writers serialize on a file lock.
+
+Search is exact: a brute-force matrix-vector product over the mapping
+('numpy'), or a FAISS IndexFlatIP fed from the same rows ('faiss', the default
+when faiss-cpu is importable).
+
+A missing index is never built inline by a request or a scoring task: the
+first use queues a rebuild_vector_index task (build_vector_index.py builds it
+by hand), and until it has run, suggestions raise IndexNotReady and newly
+scored candidates are left to the rebuild.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+from filelock import FileLock
+from flask import current_app
+from . import db
+from .models import BackgroundTask, Candidate
+from .vectors import VECTOR_DTYPE, unpack_vector
+from .worker import enqueue, wake_workers
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    faiss = None
+    FAISS_AVAILABLE = False
+
+BACKENDS = ('auto', 'numpy', 'faiss')
+ID_DTYPE = np.int64
+TOMBSTONE = -1
+COMPACT_RATIO = 0.25
+
+# Defaults; create_app overrides them from the app config
+SETTINGS = {
+    'path': os.environ.get('VECTOR_INDEX_DIR', 'vector_index'),
+    'backend': os.environ.get('VECTOR_INDEX_BACKEND', 'auto'),
+}
+
+_index = None
+_index_lock = threading.Lock()
+
+
+class IndexNotReady(Exception):
+    """The index doesn't exist yet; a background task is building it."""
+
+
+def init_app(app):
+    global _index
+    backend = app.config['VECTOR_INDEX_BACKEND']
+    if backend not in BACKENDS:
+        raise ValueError(f"VECTOR_INDEX_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    if backend == 'faiss' and not FAISS_AVAILABLE:
+        raise ValueError("VECTOR_INDEX_BACKEND is 'faiss' but faiss-cpu is not installed")
+    SETTINGS.update({'path': app.config['VECTOR_INDEX_DIR'], 'backend': backend})
+    _index = None
+
+
+def get_index():
+    """The process-wide index for the configured directory and backend."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            use_faiss = SETTINGS['backend'] == 'faiss' or (SETTINGS['backend'] == 'auto' and FAISS_AVAILABLE)
+            _index = VectorIndex(SETTINGS['path'], 'faiss' if use_faiss else 'numpy')
+        return _index
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    keep = norms[:, 0] > 0
+    return (matrix[keep] / norms[keep]).astype(VECTOR_DTYPE), keep
+
+
+class VectorIndex:
+    """Memory-mapped vector store with exact top-k search."""
+
+    def __init__(self, path, backend='numpy'):
+        self.path = path
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(os.path.join(path, '.lock'))
+        self._state = None  # (generation, count) currently mapped
+        self._vectors = None
+        self._ids = None
+        self._deleted = 0
+        self._faiss = None
+        self._faiss_rows = 0
+
+    # Files
+
+    def _meta_path(self):
+        return os.path.join(self.path, 'meta.json')
+
+    def _vectors_path(self, generation):
+        return os.path.join(self.path, f'vectors.{generation}.f32')
+
+    def _ids_path(self, generation):
+        return os.path.join(self.path, f'ids.{generation}.i64')
+
+    def read_meta(self):
+        try:
+            with open(self._meta_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, meta):
+        temp_path = self._meta_path() + '.part'
+        with open(temp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._meta_path())
+
+    def _write_generation(self, generation, ids, vectors, dim):
+        """Writes a complete new generation and points meta.json at it."""
+        with open(self._vectors_path(generation), 'wb') as f:
+            f.write(np.ascontiguousarray(vectors, dtype=VECTOR_DTYPE).tobytes())
+        with open(self._ids_path(generation), 'wb') as f:
+            f.write(np.asarray(ids, dtype=ID_DTYPE).tobytes())
+        self._write_meta({'generation': generation, 'dim': dim, 'count': len(ids), 'deleted': 0})
+
+        # Processes still mapping older generations keep their pages (POSIX)
+        for name in os.listdir(self.path):
+            if name.startswith(('vectors.', 'ids.')) and name.split('.')[1] != str(generation):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+
+    # Reading
+
+    def _refresh(self):
+        """Re-maps the files if another process changed them. Returns the meta."""
+        meta = self.read_meta()
+        if meta is None:
+            self._state, self._vectors, self._ids, self._faiss = None, None, None, None
+            return None
+
+        state = (meta['generation'], meta['count'])
+        if state != self._state:
+            if meta['generation'] != (self._state or (None,))[0]:
+                self._faiss, self._faiss_rows = None, 0
+            count, dim = meta['count'], meta['dim']
+            if count:
+                generation = meta['generation']
+                self._vectors = np.memmap(self._vectors_path(generation), dtype=VECTOR_DTYPE,
+                                          mode='r', shape=(count, dim))
+                self._ids = np.memmap(self._ids_path(generation), dtype=ID_DTYPE,
+                                      mode='r', shape=(count,))
+            else:
+                self._vectors = np.empty((0, dim), dtype=VECTOR_DTYPE)
+                self._ids = np.empty(0, dtype=ID_DTYPE)
+            self._state = state
+        self._deleted = meta['deleted']
+        return meta
+
+    def _faiss_index(self):
+        """The FAISS index for the mapped rows, extended with any rows added since."""
+        count = self._vectors.shape[0]
+        if self._faiss is None:
+            self._faiss, self._faiss_rows = faiss.IndexFlatIP(self._vectors.shape[1]), 0
+        if self._faiss_rows < count:
+            self._faiss.add(np.ascontiguousarray(self._vectors[self._faiss_rows:count]))
+            self._faiss_rows = count
+        return self._faiss
+
+    def __len__(self):
+        with self._lock:
+            meta = self._refresh()
+        return 0 if meta is None else meta['count'] - meta['deleted']
+
+    def exists(self):
+        return self.read_meta() is not None
+
+    def search(self, vector, k, exclude=()):
+        """
+        The k most similar live entries as [(candidate_id, cosine)], best
+        first. Ids in exclude are skipped.
+        """
+        query = np.asarray(vector, dtype=VECTOR_DTYPE).ravel()
+        norm = float(np.linalg.norm(query))
+        with self._lock:
+            meta = self._refresh()
+            if meta is None or not norm or k <= 0 or query.shape[0] != meta['dim']:
+                return []
+            query = query / norm
+            ids = self._ids
+            if not ids.shape[0]:
+                return []
+            exclude = np.fromiter(exclude, dtype=ID_DTYPE) if exclude else None
+
+            if self.backend == 'faiss':
+                index = self._faiss_index()
+                fetch = min(ids.shape[0], k + self._deleted + (0 if exclude is None else exclude.shape[0]))
+                scores, rows = index.search(query.reshape(1, -1), fetch)
+                scores, rows = scores[0], rows[0]
+                keep = rows >= 0
+                scores, rows = scores[keep], rows[keep]
+                found = ids[rows]
+                keep = found != TOMBSTONE
+                if exclude is not None:
+                    keep &= ~np.isin(found, exclude)
+                return [(int(i), float(s)) for i, s in zip(found[keep][:k], scores[keep][:k])]
+
+            scores = self._vectors @ query
+            dead = ids == TOMBSTONE
+            if exclude is not None:
+                dead |= np.isin(ids, exclude)
+            scores = np.where(dead, -np.inf, scores)
+            live = int(ids.shape[0] - np.count_nonzero(dead))
+            k = min(k, live)
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(int(ids[row]), float(scores[row])) for row in top]
+
+    # Writing
+
+    def add(self, entries):
+        """
+        Adds (candidate_id, vector) pairs, replacing earlier entries for the
+        same ids. Zero vectors and vectors of another dimension are skipped.
+        """
+        entries = [(candidate_id, vector) for candidate_id, vector in entries if vector is not None]
+        if not entries:
+            return 0
+        os.makedirs(self.path, exist_ok=True)
+        with self._file_lock:
+            meta = self.read_meta()
+            if meta is not None and not meta['dim']:
+                meta = None  # Built before any vector existed: the first ones set the dimension
+            dim = meta['dim'] if meta else entries[0][1].shape[0]
+            entries = [(candidate_id, vector) for candidate_id, vector in entries if vector.shape[0] == dim]
+            if not entries:
+                return 0
+            matrix, keep = _normalize_rows(np.vstack([vector for _, vector in entries]).astype(VECTOR_DTYPE))
+            ids = np.array([candidate_id for candidate_id, _ in entries], dtype=ID_DTYPE)[keep]
+
+            if meta is None:
+                previous = self.read_meta()
+                self._write_generation((previous['generation'] + 1) if previous else 0, ids, matrix, dim)
+                return len(ids)
+
+            self._tombstone(meta, ids)
+            # Rows are written before meta.json counts them
+            with open(self._vectors_path(meta['generation']), 'ab') as f:
+                f.write(matrix.tobytes())
+            with open(self._ids_path(meta['generation']), 'ab') as f:
+                f.write(ids.tobytes())
+            meta['count'] += len(ids)
+            self._write_meta(meta)
+            self._compact_if_needed(meta)
+        return len(ids)
+
+    def remove(self, candidate_ids):
+        """Removes the entries of the given candidates."""
+        if not candidate_ids or not self.exists():
+            return 0
+        with self._file_lock:
+            meta = self.read_meta()
+            removed = self._tombstone(meta, np.fromiter(candidate_ids, dtype=ID_DTYPE))
+            if removed:
+                self._write_meta(meta)
+                self._compact_if_needed(meta)
+        return removed
+
+    def _tombstone(self, meta, candidate_ids):
+        """Marks rows of the given ids dead in place; updates meta['deleted']."""
+        if not meta['count']:
+            return 0
+        ids = np.memmap(self._ids_path(meta['generation']), dtype=ID_DTYPE,
+                        mode='r+', shape=(meta['count'],))
+        mask = np.isin(ids, candidate_ids)
+        removed = int(np.count_nonzero(mask))
+        if removed:
+            ids[mask] = TOMBSTONE
+            ids.flush()
+            meta['deleted'] += removed
+        del ids
+        return removed
+
+    def _compact_if_needed(self, meta):
+        if meta['deleted'] <= COMPACT_RATIO * meta['count']:
+            return
+        generation = meta['generation']
+        count, dim = meta['count'], meta['dim']
+        ids = np.fromfile(self._ids_path(generation), dtype=ID_DTYPE, count=count)
+        vectors = np.fromfile(self._vectors_path(generation), dtype=VECTOR_DTYPE,
+                              count=count * dim).reshape(count, dim)
+        live = ids != TOMBSTONE
+        self._write_generation(generation + 1, ids[live], vectors[live], dim)
+
+    def rebuild(self, chunks):
+        """Replaces the whole index with the (candidate_id, vector) pairs of chunks."""
+        os.makedirs(self.path, exist_ok=True)
+        ids, matrices, dim = [], [], None
+        for entries in chunks:
+            for candidate_id, vector in entries:
+                if vector is None:
+                    continue
+                dim = dim or vector.shape[0]
+                if vector.shape[0] == dim:
+                    ids.append(candidate_id)
+                    matrices.append(vector)
+        if not ids:
+            with self._file_lock:
+                meta = self.read_meta()
+                self._write_generation((meta['generation'] + 1) if meta else 0, [],
+                                       np.empty((0, 0), dtype=VECTOR_DTYPE), meta['dim'] if meta else 0)
+            return 0
+        matrix, keep = _normalize_rows(np.vstack(matrices).astype(VECTOR_DTYPE))
+        ids = np.array(ids, dtype=ID_DTYPE)[keep]
+        with self._file_lock:
+            meta = self.read_meta()
+            self._write_generation((meta['generation'] + 1) if meta else 0, ids, matrix, dim)
+        return len(ids)
+
+
+# Candidate glue
+
+def _candidate_vectors(candidate_ids=None, chunk_size=5000):
+    """Yields chunks of (id, vector) for processed candidates with a stored vector."""
+    last_id = 0
+    while True:
+        query = db.session.query(Candidate.id, Candidate.resume_vector).filter(
+            Candidate.status == 'processed',
+            Candidate.resume_vector.isnot(None),
+            Candidate.id > last_id
+        )
+        if candidate_ids is not None:
+            query = query.filter(Candidate.id.in_(candidate_ids))
+        rows = query.order_by(Candidate.id).limit(chunk_size).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield [(row.id, unpack_vector(row.resume_vector)) for row in rows]
+
+
+def rebuild_index():
+    """Rebuilds the index from every processed candidate. Returns the entry count."""
+    return get_index().rebuild(_candidate_vectors())
+
+
+def queue_rebuild():
+    """Queues a rebuild_vector_index task, unless one is already waiting, and commits."""
+    waiting = db.session.query(BackgroundTask.id).filter_by(kind='rebuild_vector_index', status='queued').first()
+    if waiting is None:
+        enqueue('rebuild_vector_index')
+        db.session.commit()
+        wake_workers()
+
+
+def index_candidates(candidate_ids):
+    """
+    Adds (or refreshes) the given committed candidates. Index failures are
+    logged and never fail the caller; a rebuild restores consistency.
+    """
+    candidate_ids = list(candidate_ids)
+    if not candidate_ids:
+        return
+    try:
+        index = get_index()
+        if not index.exists():
+            # First use: the queued rebuild reads these candidates too
+            queue_rebuild()
+            return
+        for entries in _candidate_vectors(candidate_ids):
+            index.add(entries)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f"Vector index update failed: {e}")
+
+
+def remove_candidates(candidate_ids):
+    """Drops deleted candidates from the index; failures are logged."""
+    try:
+        get_index().remove(list(candidate_ids))
+    except Exception as e:
+        current_app.logger.warning(f"Vector index update failed: {e}")
+
+
+def suggest(vector, k, exclude=()):
+    """
+    Top-k (candidate_id, similarity) for a job vector. Raises IndexNotReady,
+    having queued the build, if there is no index yet.
+    """
+    index = get_index()
+    if not index.exists():
+        queue_rebuild()
+        raise IndexNotReady('The candidate index is being built, try again shortly')
+    return index.search(vector, k, exclude)
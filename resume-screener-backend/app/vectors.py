@@ -0,0 +1,60 @@
+"""Helpers for storing and comparing document vectors."""
+import numpy as np
+
+VECTOR_DTYPE = np.float32
+
+
+def pack_vector(vector):
+    """Serializes a vector to compact float32 bytes for a LargeBinary column."""
+    if vector is None:
+        return None
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def unpack_vector(blob):
+    """Inverse of pack_vector; returns a read-only float32 array or None."""
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype=VECTOR_DTYPE)
+
+
+def cosine_similarity(a, b):
+    """Cosine similarity of two vectors, 0.0 if either is all zeros (as spaCy does)."""
+    norm = float(np.linalg.norm(a)) * float(np.linalg.norm(b))
+    if not norm:
+        return 0.0
+    return float(np.dot(a, b) / norm)
+
+
+def stack_vectors(blobs, dim=None):
+    """
+    Stacks packed vectors into an (N, dim) float32 matrix. Returns the matrix
+    and the indices of the blobs that were usable (non-empty, matching dim).
+    """
+    rows, indices = [], []
+    for i, blob in enumerate(blobs):
+        vector = unpack_vector(blob)
+        if vector is None:
+            continue
+        if dim is None:
+            dim = vector.shape[0]
+        if vector.shape[0] != dim:
+            continue
+        rows.append(vector)
+        indices.append(i)
+    if not rows:
+        return np.empty((0, dim or 0), dtype=VECTOR_DTYPE), indices
+    return np.vstack(rows), indices
+
+
+def cosine_scores(matrix, vector):
+    """Cosine similarity of every row of matrix against vector in one product."""
+    vector = np.asarray(vector, dtype=VECTOR_DTYPE)
+    vector_norm = float(np.linalg.norm(vector))
+    if not vector_norm or matrix.shape[0] == 0:
+        return np.zeros(matrix.shape[0], dtype=VECTOR_DTYPE)
+    row_norms = np.linalg.norm(matrix, axis=1)
+    dots = matrix @ vector
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(row_norms > 0, dots / (row_norms * vector_norm), 0.0)
+    return scores.astype(VECTOR_DTYPE)
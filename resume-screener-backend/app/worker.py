@@ -0,0 +1,243 @@
+"""
+Local background worker pool.
+
+Work is queued as rows in the ``background_task`` table, so no external broker
+is needed: any number of threads (and processes sharing the same database) can
+poll the table and claim tasks with an atomic UPDATE.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from . import db
+from .models import BackgroundTask
+
+REQUEUE_INTERVAL = 60  # Seconds between checks for stale tasks by one pool
+
+# Registered task handlers, keyed by BackgroundTask.kind
+_handlers = {}
+# Called as handler(task, error) when a task of that kind fails
+_failure_handlers = {}
+
+
+class TaskRetry(Exception):
+    """Raised by a handler to queue its task again, until it has had WORKER_MAX_ATTEMPTS."""
+
+
+def register_task(kind, handler, failure_handler=None):
+    """
+    Registers the handler for tasks of the given kind and, optionally, a
+    function that cleans up after one fails, called as failure_handler(task,
+    error) once the task's changes were rolled back.
+    """
+    _handlers[kind] = handler
+    if failure_handler is not None:
+        _failure_handlers[kind] = failure_handler
+
+
+def enqueue(kind, payload=None, candidate_id=None, job_id=None):
+    """
+    Adds a task to the current session. The caller commits, so the task
+    becomes visible to the workers together with the rows it refers to.
+    """
+    task = BackgroundTask(
+        kind=kind,
+        status='queued',
+        payload=payload or {},
+        candidate_id=candidate_id,
+        job_id=job_id
+    )
+    db.session.add(task)
+    return task
+
+
+def wake_workers():
+    """Wakes idle workers of this process so a freshly committed task starts at once."""
+    pool = current_app.extensions.get('worker_pool')
+    if pool:
+        pool.notify()
+
+
+def claim_next_task():
+    """Atomically moves the oldest queued task to 'processing' and returns it."""
+    while True:
+        task_id = db.session.query(BackgroundTask.id).filter_by(
+            status='queued'
+        ).order_by(BackgroundTask.id).limit(1).scalar()
+        if task_id is None:
+            return None
+
+        claimed = BackgroundTask.query.filter_by(id=task_id, status='queued').update({
+            'status': 'processing',
+            'started_at': datetime.utcnow(),
+            'attempts': BackgroundTask.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+
+        # Another worker got there first, try the next one
+        if claimed:
+            return db.session.get(BackgroundTask, task_id)
+
+
+def run_task(task):
+    """Runs a claimed task through its handler and records the outcome."""
+    handler = _handlers.get(task.kind)
+    try:
+        if handler is None:
+            raise ValueError(f'No handler registered for task kind {task.kind!r}')
+        handler(task)
+        task.status = 'done'
+        task.error = None
+    except TaskRetry as e:
+        db.session.rollback()
+        if task.attempts < current_app.config['WORKER_MAX_ATTEMPTS']:
+            current_app.logger.warning(f'Task {task.id} ({task.kind}) will be retried: {e}')
+            task.status = 'queued'
+            task.error = str(e)
+            db.session.commit()
+            return
+        _run_failure_handler(task, str(e))
+        task.status = 'error'
+        task.error = str(e)
+    except Exception as e:
+        current_app.logger.exception(f'Task {task.id} ({task.kind}) failed')
+        db.session.rollback()
+        _run_failure_handler(task, str(e))
+        task.status = 'error'
+        task.error = str(e)
+    task.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _run_failure_handler(task, error):
+    failure_handler = _failure_handlers.get(task.kind)
+    if failure_handler is None:
+        return
+    try:
+        failure_handler(task, error)
+    except Exception:
+        current_app.logger.exception(f'Failure handler of task {task.id} ({task.kind}) failed')
+        db.session.rollback()
+
+
+def report_progress(task, done, total):
+    """
+    Records a long-running task's progress and commits. It doubles as the
+    task's heartbeat: started_at is moved on, so a task that keeps reporting
+    is never taken for stale.
+    """
+    task.progress = done
+    task.total = total
+    task.started_at = datetime.utcnow()
+    db.session.commit()
+
+
+def requeue_stale_tasks(stale_seconds, max_attempts):
+    """
+    Returns tasks left in 'processing' by a crashed worker, without a
+    heartbeat for stale_seconds, to the queue. Those that already had
+    max_attempts fail instead. Returns (requeued, failed).
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+    stale = (BackgroundTask.status == 'processing', BackgroundTask.started_at < cutoff)
+
+    failed = 0
+    for task in BackgroundTask.query.filter(*stale, BackgroundTask.attempts >= max_attempts).all():
+        error = f'Gave up after {task.attempts} attempts'
+        # Conditional, so a task another process just failed or heard from is left alone
+        claimed = BackgroundTask.query.filter(BackgroundTask.id == task.id, *stale).update({
+            'status': 'error', 'error': error, 'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if claimed:
+            _run_failure_handler(task, error)
+            failed += 1
+        db.session.commit()
+
+    requeued = BackgroundTask.query.filter(*stale, BackgroundTask.attempts < max_attempts).update(
+        {'status': 'queued'}, synchronize_session=False
+    )
+    db.session.commit()
+    return requeued, failed
+
+
+class WorkerPool:
+    """A fixed number of daemon threads that poll the task table."""
+
+    def __init__(self, app, size=2, poll_interval=1.0):
+        self.app = app
+        self.size = size
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.size):
+            thread = threading.Thread(target=self._run, name=f'resume-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _requeue_if_due(self):
+        # One thread of the pool checks now and then, not only at startup, so
+        # tasks of a process that died meanwhile are picked up too
+        with self._requeue_lock:
+            if time.monotonic() < self._next_requeue:
+                return
+            self._next_requeue = time.monotonic() + REQUEUE_INTERVAL
+        try:
+            requeued, failed = requeue_stale_tasks(
+                self.app.config['WORKER_STALE_SECONDS'], self.app.config['WORKER_MAX_ATTEMPTS']
+            )
+            if requeued or failed:
+                self.app.logger.info(f'Requeued {requeued} and failed {failed} stale background tasks')
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.warning(f'Could not requeue stale tasks: {e}')
+
+    def _run(self):
+        while not self._stop.is_set():
+            task_found = False
+            # A fresh app context per iteration gives every task its own session
+            with self.app.app_context():
+                self._requeue_if_due()
+                try:
+                    task = claim_next_task()
+                    if task is not None:
+                        task_found = True
+                        run_task(task)
+                except Exception as e:
+                    db.session.rollback()
+                    self.app.logger.error(f'Worker poll failed: {e}')
+
+            if not task_found:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+
+def start_workers(app):
+    """Starts the worker pool for the given app, once per app."""
+    pool = app.extensions.get('worker_pool')
+    if pool is None:
+        pool = WorkerPool(
+            app,
+            size=app.config['WORKER_THREADS'],
+            poll_interval=app.config['WORKER_POLL_INTERVAL']
+        )
+        app.extensions['worker_pool'] = pool
+    pool.start()
+    return pool
@@ -0,0 +1,114 @@
+"""
+Measures each registered extractor on synthetic PDF and DOCX resumes.
+
+For every file type: sniffing alone, cold extraction (cache disabled), warm
+extraction (served from the extraction cache) and the peak Python memory
+traced while extracting one document. DOCX is also run through a full DOM
+parse of document.xml as a baseline for the streaming extractor.
+
+    python -m benchmarks.bench_extraction [--docs 50] [--pages 3] [--chars 3000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.etree import ElementTree
+
+from app import extraction, extraction_cache, metrics
+from benchmarks.common import make_rng, synthetic_text, write_docx, write_pdf, write_results
+
+
+def make_documents(directory, docs, pages, chars):
+    rng = make_rng()
+    paths = {'pdf': [], 'docx': []}
+    for i in range(docs):
+        texts = [synthetic_text(chars, rng) for _ in range(pages)]
+        pdf_path = os.path.join(directory, f'resume_{i}.pdf')
+        write_pdf(pdf_path, texts)
+        paths['pdf'].append(pdf_path)
+
+        docx_path = os.path.join(directory, f'resume_{i}.docx')
+        # About one paragraph per 300 characters, like a real resume
+        write_docx(docx_path, [text[start:start + 300] for text in texts for start in range(0, len(text), 300)])
+        paths['docx'].append(docx_path)
+    return paths
+
+
+def docx_dom(filepath):
+    """Baseline: the whole document.xml parsed into a tree at once."""
+    with zipfile.ZipFile(filepath) as archive:
+        root = ElementTree.fromstring(archive.read(extraction.DOCX_BODY))
+    return '\n'.join(
+        ''.join(t.text or '' for t in p.iter(extraction.W + 't'))
+        for p in root.iter(extraction.W + 'p')
+    )
+
+
+def timed(func, paths):
+    start = time.perf_counter()
+    for path in paths:
+        func(path)
+    seconds = time.perf_counter() - start
+    return {
+        'docs_per_sec': round(len(paths) / seconds, 2),
+        'ms_per_doc': round(1000 * seconds / len(paths), 3),
+    }
+
+
+def peak_kib(func, path):
+    tracemalloc.start()
+    try:
+        func(path)
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def run(docs, pages, chars):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_documents(directory, docs, pages, chars)
+        extraction_cache.SETTINGS['path'] = os.path.join(directory, 'cache')
+        metrics.SETTINGS['dir'] = os.path.join(directory, 'metrics')
+
+        for file_type, files in paths.items():
+            modes = [('sniff', extraction.sniff_file_type)]
+            extract = extraction._extractors[file_type].extract
+            modes.append(('cold', extract))
+            if file_type == 'docx':
+                modes.append(('dom_baseline', docx_dom))
+
+            for mode, func in modes:
+                results.append({
+                    'type': file_type,
+                    'mode': mode,
+                    **timed(func, files),
+                    'peak_kib': peak_kib(func, files[0]),
+                    'bytes_per_doc': round(sum(os.path.getsize(f) for f in files) / len(files)),
+                })
+                print(results[-1])
+
+            for path in files:
+                extraction.extract_text(path)  # Fill the cache
+            results.append({'type': file_type, 'mode': 'cached', **timed(extraction.extract_text, files)})
+            print(results[-1])
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--docs', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--chars', type=int, default=3000, help='Characters per page')
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.docs, args.pages, args.chars)
+    print(f"Results written to {write_results('extraction', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures spaCy throughput: one document at a time versus batched nlp.pipe.
+
+'one_at_a_time' is calculate_similarity on each resume, which parses both the
+resume and the job description per call; 'single' parses each resume once with
+nlp(text); 'batched' runs scorer.document_vectors for each batch size and
+process count. Batched vectors are checked against the single-document ones to
+confirm order and values are unchanged.
+
+    python -m benchmarks.bench_nlp [--docs 200] [--chars 6000] [--batch-sizes 8 32 128] [--processes 1 2]
+"""
+import argparse
+import time
+
+import numpy as np
+from app import scorer
+from benchmarks.common import make_rng, synthetic_text, write_results
+
+
+def throughput(func, docs):
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    return round(docs / seconds, 2), round(seconds, 3), result
+
+
+def run(docs, chars, batch_sizes, processes):
+    nlp = scorer.get_nlp()
+    if nlp is None:
+        raise SystemExit('spaCy and its model are required for this benchmark')
+
+    rng = make_rng()
+    job_description = synthetic_text(3000, rng, tech_share=0.3)
+    texts = [synthetic_text(chars, rng, tech_share=0.05 + 0.4 * i / max(docs - 1, 1)) for i in range(docs)]
+    scorer.warm_up()
+
+    results = []
+    rate, seconds, _ = throughput(
+        lambda: [scorer.calculate_similarity(text, job_description) for text in texts], docs
+    )
+    results.append({'mode': 'one_at_a_time', 'docs_per_sec': rate, 'seconds': seconds})
+    print(results[-1])
+
+    rate, seconds, reference = throughput(lambda: [nlp(text).vector for text in texts], docs)
+    results.append({'mode': 'single', 'docs_per_sec': rate, 'seconds': seconds})
+    print(results[-1])
+
+    for n_process in processes:
+        for batch_size in batch_sizes:
+            rate, seconds, vectors = throughput(
+                lambda: scorer.document_vectors(texts, batch_size=batch_size, n_process=n_process), docs
+            )
+            max_diff = max(float(np.max(np.abs(a - b))) for a, b in zip(vectors, reference))
+            results.append({
+                'mode': 'batched',
+                'batch_size': batch_size,
+                'n_process': n_process,
+                'docs_per_sec': rate,
+                'seconds': seconds,
+                'speedup_vs_one_at_a_time': round(rate / results[0]['docs_per_sec'], 2),
+                'max_vector_diff': round(max_diff, 6),
+            })
+            print(results[-1])
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--chars', type=int, default=6000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[8, 32, 128])
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.docs, args.chars, args.batch_sizes, args.processes)
+    print(f"Results written to {write_results('nlp', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Measures the ingest and scoring pipeline end to end: per-stage latency,
+docs/sec and peak RSS at several corpus sizes, on the spaCy and fallback paths.
+
+For each corpus size a set of synthetic PDF resumes (reportlab) and a job are
+generated, then every (path, size) case runs in a fresh process so its peak
+RSS is its own:
+
+- stages: process_resume's steps timed one by one for each resume: extract
+  (extraction cache off), nlp (build_features), similarity (semantic_score:
+  calculate_similarity with spaCy, calculate_basic_similarity without) and
+  skills (evaluate_resume)
+- route: POST /jobs/<id>/upload through the Flask test client against a
+  temporary SQLite database, then the background task that processes it
+
+Compare two runs with benchmarks.compare.
+
+    python -m benchmarks.bench_pipeline [--sizes 10 50 200] [--paths spacy fallback] [--pages 2]
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import (
+    make_rng, peak_rss_mb, percentile, synthetic_job, synthetic_resume, write_pdf, write_results
+)
+
+STAGES = ('extract', 'nlp', 'similarity', 'skills')
+ROUTE_STAGES = ('upload_route', 'process_task')
+
+
+def make_corpus(directory, docs, pages, chars_per_page):
+    rng = make_rng()
+    paths = []
+    for i in range(docs):
+        text = synthetic_resume(pages * chars_per_page, rng, tech_share=0.05 + 0.4 * i / max(docs - 1, 1))
+        path = os.path.join(directory, f'resume_{i}.pdf')
+        write_pdf(path, [text[start:start + chars_per_page] for start in range(0, len(text), chars_per_page)])
+        paths.append(path)
+    return paths, synthetic_job(3000, rng)
+
+
+def summarize(timings, docs):
+    rows = []
+    for stage, values in timings.items():
+        rows.append({
+            'stage': stage,
+            'median_ms': round(statistics.median(values) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'docs_per_sec': round(docs / sum(values), 2),
+        })
+    total = [sum(parts) for parts in zip(*timings.values())]
+    rows.append({
+        'stage': 'total',
+        'median_ms': round(statistics.median(total) * 1000, 3),
+        'p95_ms': round(percentile(total, 0.95) * 1000, 3),
+        'docs_per_sec': round(docs / sum(total), 2),
+    })
+    return rows
+
+
+def _timed(timings, stage, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[stage].append(time.perf_counter() - start)
+    return result
+
+
+def run_case(path, files, job_fields, workdir):
+    """One (path, corpus) case; runs in its own process."""
+    os.chdir(workdir)  # Uploads are stored under ./uploads
+
+    from config import ScriptConfig
+
+    class BenchConfig(ScriptConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+        EXTRACTION_CACHE_ENABLED = False
+        METRICS_DIR = os.path.join(workdir, 'metrics')
+        VECTOR_INDEX_DIR = os.path.join(workdir, 'vector_index')
+        JWT_VERIFY_SUB = False  # Identities are ints; newer PyJWT rejects them as 'sub'
+
+    from app import create_app, db, extraction, scorer
+    from app.job_profile import get_job_profile
+    from app.models import JobPosting, User
+    from app.skills import evaluate_resume
+    from app.worker import claim_next_task, run_task
+
+    if path == 'fallback':
+        scorer._nlp, scorer._nlp_loaded = None, True  # As if spaCy weren't installed
+    elif not scorer.warm_up():
+        return {'skipped': 'spaCy model unavailable'}
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        user = User(email='bench@example.com', name='Bench')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {user.get_auth_token()}'}
+
+        job_id = client.post('/api/jobs', json=job_fields, headers=headers).get_json()['job_id']
+        job = db.session.get(JobPosting, job_id)
+        profile = get_job_profile(job)
+
+        timings = {stage: [] for stage in STAGES}
+        for filepath in files:
+            text = _timed(timings, 'extract', extraction.extract_text, filepath)
+            vector, terms = _timed(timings, 'nlp', scorer.build_features, text)
+            semantic = _timed(timings, 'similarity', scorer.semantic_score, text, vector, terms, job, profile)
+            _timed(timings, 'skills', evaluate_resume, text, job, semantic)
+        rows = [{'mode': 'stages', **row} for row in summarize(timings, len(files))]
+
+        def upload(filepath):
+            with open(filepath, 'rb') as f:
+                response = client.post(f'/api/jobs/{job_id}/upload', headers=headers,
+                                       data={'file': (f, os.path.basename(filepath))})
+            assert response.status_code == 202, response.get_json()
+
+        def process():
+            run_task(claim_next_task())
+
+        timings = {stage: [] for stage in ROUTE_STAGES}
+        for filepath in files:
+            _timed(timings, 'upload_route', upload, filepath)
+            _timed(timings, 'process_task', process)
+        rows += [{'mode': 'route', **row} for row in summarize(timings, len(files))]
+
+    return {'rows': rows, 'peak_rss_mb': peak_rss_mb()}
+
+
+def _put_result(queue, func, args):
+    try:
+        queue.put(func(*args))
+    except Exception as e:
+        queue.put({'error': repr(e)})
+        raise
+
+
+def in_fresh_process(func, *args):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_put_result, args=(queue, func, args))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def run(sizes, paths, pages, chars_per_page):
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            files, job_fields = make_corpus(directory, size, pages, chars_per_page)
+            for path in paths:
+                with tempfile.TemporaryDirectory() as workdir:
+                    outcome = in_fresh_process(run_case, path, files, job_fields, workdir)
+                case = {'path': path, 'docs': size, 'pages': pages}
+                if 'rows' not in outcome:
+                    results.append({**case, **outcome})
+                    print(results[-1])
+                    continue
+                for row in outcome['rows']:
+                    results.append({**case, **row})
+                    print(results[-1])
+                results.append({**case, 'mode': 'process', 'peak_rss_mb': outcome['peak_rss_mb']})
+                print(results[-1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 200], help='Resumes per corpus')
+    parser.add_argument('--paths', nargs='+', choices=['spacy', 'fallback'], default=['spacy', 'fallback'])
+    parser.add_argument('--pages', type=int, default=2, help='Pages per resume')
+    parser.add_argument('--chars-per-page', type=int, default=3000)
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.paths, args.pages, args.chars_per_page)
+    print(f"Results written to {write_results('pipeline', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
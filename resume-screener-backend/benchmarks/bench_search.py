@@ -0,0 +1,147 @@
+"""
+Compares full-text search (app.search, FTS5 on SQLite) with the LIKE scan it
+replaces, on a temporary SQLite database of synthetic resumes.
+
+For each query the LIKE version ANDs/ORs/NOTs one '%term%' condition per
+word or phrase of the parsed query, so both return roughly the same rows
+(LIKE has no stemming or word boundaries). Reported per query and method:
+
+- first_page_ms: the first page of results (FTS: ranked with snippets)
+- count_ms: counting every match
+- matches: the count
+
+    python -m benchmarks.bench_search [--docs 100000] [--chars 2000] [--page-size 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import and_, func, not_, or_, select, text
+
+from benchmarks.common import make_rng, peak_rss_mb, synthetic_resume, time_call, write_results
+
+QUERIES = [
+    'kubernetes',
+    'kubernetes AND terraform',
+    'kafka OR redis',
+    '"machine learning"',
+    'python -java',
+    'kube*',
+    '(docker OR kubernetes) aws NOT azure',
+]
+INSERT_CHUNK = 5000
+
+
+def like_condition(node, column):
+    """The LIKE equivalent of a parse_query tree."""
+    kind = node[0]
+    if kind == 'word':
+        return column.like(f'%{node[1]}%')
+    if kind == 'phrase':
+        return column.like('%' + ' '.join(node[1]) + '%')
+    if kind == 'not':
+        return not_(like_condition(node[1], column))
+    combine = and_ if kind == 'and' else or_
+    return combine(*(like_condition(child, column) for child in node[1]))
+
+
+def populate(db, docs, chars, user_id, job_id):
+    from app.models import Candidate
+
+    rng = make_rng()
+    start = time.perf_counter()
+    for first in range(0, docs, INSERT_CHUNK):
+        rows = []
+        for _ in range(first, min(first + INSERT_CHUNK, docs)):
+            resume = synthetic_resume(chars, rng, tech_share=rng.uniform(0.05, 0.3))
+            rows.append({
+                'name': resume.split('\n', 1)[0], 'resume_text': resume, 'skills': [], 'education': [],
+                'work_history': [], 'job_id': job_id, 'user_id': user_id, 'status': 'processed',
+            })
+        db.session.execute(Candidate.__table__.insert(), rows)
+        db.session.commit()
+    return time.perf_counter() - start
+
+
+def run(docs, chars, page_size, repeat):
+    from config import ScriptConfig
+
+    with tempfile.TemporaryDirectory() as workdir:
+        class BenchConfig(ScriptConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+            METRICS_DIR = os.path.join(workdir, 'metrics')
+            VECTOR_INDEX_DIR = os.path.join(workdir, 'vector_index')
+
+        from app import create_app, db
+        from app.models import Candidate, JobPosting, User
+        from app.search import parse_query, search_candidates, to_fts5
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            user = User(email='bench@example.com', name='Bench')
+            user.set_password('bench')
+            db.session.add(user)
+            db.session.commit()
+            job = JobPosting(title='Software Engineer', description='Bench', created_by=user.id)
+            db.session.add(job)
+            db.session.commit()
+
+            # Triggers index each row as it's inserted
+            seconds = populate(db, docs, chars, user.id, job.id)
+            results = [{'query': 'insert+index', 'method': 'fts', 'docs': docs, 'seconds': round(seconds, 3)}]
+            print(results[-1])
+
+            for query in QUERIES:
+                tree = parse_query(query)
+                like = like_condition(tree, Candidate.resume_text)
+
+                def fts_page():
+                    return search_candidates(query, limit=page_size)[0]
+
+                def fts_count():
+                    return db.session.execute(
+                        text('SELECT count(*) FROM candidate_fts WHERE candidate_fts MATCH :query'),
+                        {'query': to_fts5(tree)}
+                    ).scalar()
+
+                def like_page():
+                    return db.session.execute(
+                        select(Candidate.id, Candidate.name).where(like).order_by(Candidate.id).limit(page_size)
+                    ).all()
+
+                def like_count():
+                    return db.session.execute(select(func.count()).select_from(Candidate).where(like)).scalar()
+
+                for method, page, count in (('fts', fts_page, fts_count), ('like', like_page, like_count)):
+                    page_seconds, _ = time_call(page, repeat=repeat)
+                    count_seconds, matches = time_call(count, repeat=repeat)
+                    results.append({
+                        'query': query, 'method': method, 'docs': docs,
+                        'first_page_ms': round(page_seconds * 1000, 3),
+                        'count_ms': round(count_seconds * 1000, 3),
+                        'matches': matches,
+                    })
+                    print(results[-1])
+            results.append({'query': 'process', 'method': 'all', 'docs': docs, 'peak_rss_mb': peak_rss_mb()})
+            db.session.remove()
+            db.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--docs', type=int, default=100_000, help='Resumes in the database')
+    parser.add_argument('--chars', type=int, default=2000, help='Characters per resume')
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.docs, args.chars, args.page_size, args.repeat)
+    print(f"Results written to {write_results('search', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
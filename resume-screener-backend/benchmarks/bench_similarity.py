@@ -0,0 +1,70 @@
+"""
+Compares the fallback similarity engines of calculate_basic_similarity.
+
+Scores the same synthetic resume/job pairs with the legacy difflib engine and
+the MinHash engine, and reports per-size latency plus score agreement.
+
+    python -m benchmarks.bench_similarity [--sizes 2000 8000 30000] [--pairs 20]
+"""
+import argparse
+import statistics
+
+from app import scorer
+from benchmarks.common import make_rng, pearson, spearman, synthetic_text, time_call, write_results
+
+
+def score_with(engine, resume_text, job_description):
+    previous = scorer.SIMILARITY_FALLBACK
+    scorer.SIMILARITY_FALLBACK = engine
+    try:
+        return scorer.calculate_basic_similarity(resume_text, job_description)
+    finally:
+        scorer.SIMILARITY_FALLBACK = previous
+
+
+def run(sizes, pairs, repeat):
+    rng = make_rng()
+    job_description = synthetic_text(3000, rng, tech_share=0.3)
+    results = []
+
+    for size in sizes:
+        row = {'resume_chars': size, 'pairs': pairs}
+        scores = {engine: [] for engine in scorer.FALLBACK_ENGINES}
+        timings = {engine: [] for engine in scorer.FALLBACK_ENGINES}
+        for i in range(pairs):
+            # Vary the skill density so scores spread across the range
+            resume_text = synthetic_text(size, rng, tech_share=0.05 + 0.5 * i / max(pairs - 1, 1))
+            for engine in scorer.FALLBACK_ENGINES:
+                seconds, score = time_call(score_with, engine, resume_text, job_description, repeat=repeat)
+                timings[engine].append(seconds)
+                scores[engine].append(score)
+
+        for engine in scorer.FALLBACK_ENGINES:
+            row[f'{engine}_median_ms'] = round(statistics.median(timings[engine]) * 1000, 3)
+            row[f'{engine}_mean_score'] = round(statistics.fmean(scores[engine]), 4)
+        row['mean_abs_diff'] = round(statistics.fmean(
+            abs(a - b) for a, b in zip(scores['minhash'], scores['sequence'])
+        ), 4)
+        row['pearson'] = pearson(scores['minhash'], scores['sequence'])
+        row['spearman'] = spearman(scores['minhash'], scores['sequence'])
+        row['speedup'] = round(row['sequence_median_ms'] / max(row['minhash_median_ms'], 1e-9), 2)
+        results.append(row)
+        print(row)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2000, 8000, 30000, 60000])
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='Results JSON path (default: benchmarks/results/)')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.pairs, args.repeat)
+    print(f"Results written to {write_results('similarity', results, args.output)}")
+
+
+if __name__ == '__main__':
+    main()
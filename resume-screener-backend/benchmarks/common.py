@@ -0,0 +1,192 @@
+"""Shared helpers for the benchmark scripts."""
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import textwrap
+import time
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Skill-ish vocabulary so synthetic job descriptions and resumes overlap realistically
+TECH_WORDS = [
+    'python', 'java', 'javascript', 'typescript', 'react', 'flask', 'django', 'sql',
+    'postgresql', 'docker', 'kubernetes', 'terraform', 'aws', 'azure', 'gcp', 'linux',
+    'git', 'rest', 'api', 'microservices', 'machine', 'learning', 'pandas', 'numpy',
+    'spark', 'kafka', 'redis', 'graphql', 'ci', 'cd', 'agile', 'scrum', 'testing',
+]
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Patel', 'Kim', 'Nguyen', 'Okafor', 'Silva']
+COMMON_WORDS = [
+    'the', 'and', 'with', 'for', 'team', 'experience', 'developed', 'designed', 'led',
+    'built', 'managed', 'years', 'project', 'projects', 'data', 'system', 'systems',
+    'customer', 'performance', 'improved', 'delivered', 'worked', 'engineer', 'senior',
+    'software', 'responsible', 'across', 'platform', 'services', 'using', 'including',
+]
+
+
+def synthetic_text(n_chars, rng, tech_share=0.2, vocabulary=None):
+    """Random resume-like text of about n_chars characters."""
+    vocabulary = vocabulary or TECH_WORDS
+    words, length = [], 0
+    while length < n_chars:
+        word = rng.choice(vocabulary) if rng.random() < tech_share else rng.choice(COMMON_WORDS)
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.08:
+            words.append('\n')
+    return ' '.join(words)
+
+
+def write_pdf(path, pages, lines_per_page=60):
+    """Writes a text PDF with reportlab, one page per string in pages."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for text in pages:
+        lines = []
+        for paragraph in text.split('\n'):
+            lines.extend(textwrap.wrap(paragraph, 95) or [''])
+        body = pdf.beginText(50, 750)
+        body.setFont('Helvetica', 9)
+        for line in lines[:lines_per_page]:
+            body.textLine(line)
+        pdf.drawText(body)
+        pdf.showPage()
+    pdf.save()
+
+
+def write_docx(path, paragraphs):
+    """Writes a minimal DOCX with one paragraph per string."""
+    body = ''.join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>' for text in paragraphs
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType='
+            '"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        archive.writestr('word/document.xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+
+
+def synthetic_resume(n_chars, rng, tech_share=0.2):
+    """
+    A resume of about n_chars characters with the parts the scorer looks for:
+    a name line, a skills section and dated experience entries.
+    """
+    start = rng.randint(2005, 2018)
+    end = min(start + rng.randint(1, 8), 2024)
+    header = (
+        f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}\n"
+        f"Skills: {', '.join(rng.sample(TECH_WORDS, 8))}\n"
+        f"Experience\nSoftware Engineer {start} - {end}\n"
+    )
+    return header + synthetic_text(max(n_chars - len(header), 0), rng, tech_share)
+
+
+def synthetic_job(n_chars, rng):
+    """A job posting (the fields POST /jobs takes) with a description of about n_chars."""
+    skills = rng.sample(TECH_WORDS, 8)
+    return {
+        'title': 'Software Engineer',
+        'description': synthetic_text(n_chars, rng, tech_share=0.3),
+        'required_skills': skills[:5],
+        'preferred_skills': skills[5:],
+        'min_experience': rng.randint(1, 5),
+    }
+
+
+def percentile(values, share):
+    """The value at the given share (0-1) of the sorted values, nearest rank."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(share * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / 1024 / 1024, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / 1024 / (1024 if platform.system() == 'Darwin' else 1), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_rng(seed=42):
+    return random.Random(seed)
+
+
+def time_call(func, *args, repeat=3):
+    """Runs func repeat times and returns (median seconds, last result)."""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def pearson(xs, ys):
+    if len(xs) < 2 or statistics.pstdev(xs) == 0 or statistics.pstdev(ys) == 0:
+        return None
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / len(xs)
+    return cov / (statistics.pstdev(xs) * statistics.pstdev(ys))
+
+
+def spearman(xs, ys):
+    def ranks(values):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        result = [0] * len(values)
+        for rank, i in enumerate(order):
+            result[i] = rank
+        return result
+    return pearson(ranks(xs), ranks(ys))
+
+
+def write_results(name, results, output=None):
+    """Writes results as JSON (with run metadata) and returns the path."""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'{name}_{stamp}.json')
+    payload = {
+        'benchmark': name,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git_revision': git_revision(),
+        'results': results,
+    }
+    with open(output, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return output
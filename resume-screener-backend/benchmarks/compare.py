@@ -0,0 +1,89 @@
+"""
+Compares two benchmark result files and flags regressions.
+
+Rows are matched on their identifying fields (strings and integers such as
+path, docs or stage). Throughput fields (docs_per_sec, speedup) are better
+higher; latency and memory fields (*_ms, seconds, peak_*) are better lower.
+Exits with status 1 if any metric got worse by more than the threshold.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.1]
+"""
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = ('docs_per_sec', 'speedup')
+LOWER_IS_BETTER = ('_ms', 'seconds', 'peak_')
+
+
+def direction(field):
+    """1 if higher is better, -1 if lower is better, None if not a compared metric."""
+    if any(field.startswith(name) for name in HIGHER_IS_BETTER):
+        return 1
+    if any(part in field for part in LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def row_key(row):
+    return tuple(sorted(
+        (field, value) for field, value in row.items()
+        if direction(field) is None and isinstance(value, (str, int)) and not isinstance(value, bool)
+    ))
+
+
+def load(path):
+    with open(path) as f:
+        payload = json.load(f)
+    return payload, {row_key(row): row for row in payload['results']}
+
+
+def compare(baseline, candidate, threshold):
+    """(changes, regressions): one entry per metric present in both runs."""
+    changes, regressions = [], []
+    for key, old_row in baseline.items():
+        new_row = candidate.get(key)
+        if new_row is None:
+            continue
+        for field, old in old_row.items():
+            sign = direction(field)
+            new = new_row.get(field)
+            if sign is None or not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+                continue
+            change = (new - old) / abs(old)
+            entry = {'key': dict(key), 'metric': field, 'baseline': old, 'candidate': new, 'change': round(change, 4)}
+            changes.append(entry)
+            if sign * change < -threshold:
+                regressions.append(entry)
+    return changes, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change treated as a regression')
+    args = parser.parse_args()
+
+    old_payload, baseline = load(args.baseline)
+    new_payload, candidate = load(args.candidate)
+    if old_payload['benchmark'] != new_payload['benchmark']:
+        raise SystemExit(f"Different benchmarks: {old_payload['benchmark']} vs {new_payload['benchmark']}")
+    print(f"{old_payload['benchmark']}: {old_payload.get('git_revision')} -> {new_payload.get('git_revision')}")
+
+    changes, regressions = compare(baseline, candidate, args.threshold)
+    for entry in changes:
+        key = ' '.join(f'{field}={value}' for field, value in entry['key'].items())
+        flag = '  REGRESSION' if entry in regressions else ''
+        print(f"{key:<60} {entry['metric']:<14} {entry['baseline']:>12} -> {entry['candidate']:<12} "
+              f"{entry['change']:+.1%}{flag}")
+
+    unmatched = len(set(baseline) ^ set(candidate))
+    if unmatched:
+        print(f"{unmatched} rows only in one of the runs were skipped")
+    print(f"{len(regressions)} regressions beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import argparse
+from app import create_app
+from app.vector_index import get_index, rebuild_index
+from config import ScriptConfig
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the nearest-neighbour index of resume vectors from the database.')
+    parser.parse_args()
+
+    app = create_app(ScriptConfig)
+    with app.app_context():
+        count = rebuild_index()
+        index = get_index()
+        print(f"Indexed {count} candidate vectors in {index.path} ({index.backend} backend).")
+        return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -13,3 +13,109 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     CORS_HEADERS = 'Content-Type'
+
+    # Background worker pool that scores uploaded resumes. Off by default, so
+    # flask db and other commands don't start it; gunicorn.conf.py and run.py
+    # start it in the servers
+    WORKER_AUTOSTART = os.environ.get('WORKER_AUTOSTART', 'false').lower() == 'true'
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 2))
+    WORKER_POLL_INTERVAL = float(os.environ.get('WORKER_POLL_INTERVAL', 1.0))
+    WORKER_STALE_SECONDS = int(os.environ.get('WORKER_STALE_SECONDS', 900))  # Without a heartbeat
+    WORKER_MAX_ATTEMPTS = int(os.environ.get('WORKER_MAX_ATTEMPTS', 3))  # A stale task fails after this many
+
+    # Uploads stream straight to UPLOAD_FOLDER; bodies over the limit get a 413
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+    MAX_FILE_SIZE = int(os.environ.get('MAX_FILE_MB', 16)) * 1024 * 1024  # Per resume, also ZIP members
+    MAX_CONTENT_LENGTH = MAX_FILE_SIZE + 64 * 1024  # Single upload body: one file plus form overhead
+    BATCH_MAX_CONTENT_LENGTH = int(os.environ.get('BATCH_MAX_UPLOAD_MB', 512)) * 1024 * 1024
+    STORE_LOCK_TIMEOUT = float(os.environ.get('STORE_LOCK_TIMEOUT', 60))  # Seconds a job deletion waits for uploads, then retries
+
+    # Bulk upload endpoint
+    BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 2000))
+    BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 0)) or None  # Defaults to the number of cores
+    BATCH_MP_CONTEXT = os.environ.get('BATCH_MP_CONTEXT')  # forkserver or spawn; fork is rejected
+
+    # Number of parsed job descriptions kept in memory per process
+    JOB_PROFILE_CACHE_SIZE = int(os.environ.get('JOB_PROFILE_CACHE_SIZE', 256))
+
+    # Batch N x M scoring
+    SCORE_MATRIX_MEMORY_MB = int(os.environ.get('SCORE_MATRIX_MEMORY_MB', 256))
+    SCORE_MATRIX_MAX_CELLS = int(os.environ.get('SCORE_MATRIX_MAX_CELLS', 1000000))  # Larger requests must use top_k
+    SCORE_MATRIX_MAX_CANDIDATES = int(os.environ.get('SCORE_MATRIX_MAX_CANDIDATES', 10000))  # Per request; page over larger sets
+
+    # Text similarity used when spaCy is unavailable: 'minhash' or 'sequence' (legacy difflib)
+    SIMILARITY_FALLBACK = os.environ.get('SIMILARITY_FALLBACK', 'minhash')
+
+    # Extraction budgets; longer documents are truncated, larger ones rejected
+    EXTRACT_MAX_PAGES = int(os.environ.get('EXTRACT_MAX_PAGES', 50))
+    EXTRACT_MAX_CHARS = int(os.environ.get('EXTRACT_MAX_CHARS', 200000))
+    EXTRACT_TIMEOUT = float(os.environ.get('EXTRACT_TIMEOUT', 30))  # Seconds per PDF
+    EXTRACT_PDF_MAX_MB = int(os.environ.get('EXTRACT_PDF_MAX_MB', 32))  # File size
+    EXTRACT_DOCX_TIMEOUT = float(os.environ.get('EXTRACT_DOCX_TIMEOUT', 10))  # Seconds per DOCX
+    EXTRACT_DOCX_MAX_MB = int(os.environ.get('EXTRACT_DOCX_MAX_MB', 64))  # Uncompressed XML
+    EXTRACT_PARALLEL_MIN_PAGES = int(os.environ.get('EXTRACT_PARALLEL_MIN_PAGES', 20))  # Page-parallel above this
+
+    # Extracted text cached on disk by file hash and extractor version
+    EXTRACTION_CACHE_ENABLED = os.environ.get('EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+    EXTRACTION_CACHE_DIR = os.environ.get('EXTRACTION_CACHE_DIR', os.path.join(basedir, 'extraction_cache'))
+    EXTRACTION_CACHE_MAX_MB = int(os.environ.get('EXTRACTION_CACHE_MAX_MB', 512))
+
+    # Metrics snapshots merged by /api/metrics, one file per process
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(basedir, 'metrics'))
+    # Requests are profiled with cProfile into PROFILE_DIR while this file exists
+    PROFILE_FLAG_FILE = os.environ.get('PROFILE_FLAG_FILE', os.path.join(basedir, 'profile.flag'))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(basedir, 'profiles'))
+
+    # Candidate listings
+    CANDIDATES_PAGE_SIZE = int(os.environ.get('CANDIDATES_PAGE_SIZE', 100))  # For a cursor without a limit; no cursor or limit lists all
+    CANDIDATES_MAX_PAGE_SIZE = int(os.environ.get('CANDIDATES_MAX_PAGE_SIZE', 1000))
+
+    # JSON responses: compressed (br or gzip) from this size, arrays streamed from this length
+    RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+    RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+    RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 4))
+    RESPONSE_STREAM_MIN_ITEMS = int(os.environ.get('RESPONSE_STREAM_MIN_ITEMS', 500))
+
+    # Job summaries with candidate aggregates (/api/jobs/summary)
+    JOB_SUMMARY_PAGE_SIZE = int(os.environ.get('JOB_SUMMARY_PAGE_SIZE', 50))
+    JOB_SUMMARY_MAX_PAGE_SIZE = int(os.environ.get('JOB_SUMMARY_MAX_PAGE_SIZE', 500))
+
+    # Live job event streams (/api/jobs/<id>/events)
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5))  # Seconds; events from other processes
+    EVENTS_KEEPALIVE = float(os.environ.get('EVENTS_KEEPALIVE', 15))  # Seconds between comments on an idle stream
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 1000))  # Queued per stream before it catches up from the table
+    EVENTS_RETENTION_HOURS = int(os.environ.get('EVENTS_RETENTION_HOURS', 24))
+    EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 3000))  # Client reconnect delay
+    # Open streams per process. Each holds a request thread unless served by
+    # gevent; gunicorn.conf.py sets it from its thread count or worker class
+    EVENTS_MAX_STREAMS = int(os.environ.get('EVENTS_MAX_STREAMS', 100))
+    EVENTS_MAX_STREAM_SECONDS = int(os.environ.get('EVENTS_MAX_STREAM_SECONDS', 300))  # Then the client reconnects
+    EVENTS_TOKEN_SECONDS = int(os.environ.get('EVENTS_TOKEN_SECONDS', 60))  # Stream tokens must be used within this
+
+    # Full-text search over resumes (/api/search)
+    SEARCH_PAGE_SIZE = int(os.environ.get('SEARCH_PAGE_SIZE', 20))
+    SEARCH_MAX_PAGE_SIZE = int(os.environ.get('SEARCH_MAX_PAGE_SIZE', 100))
+
+    # Nearest-neighbour index over resume vectors (/jobs/<id>/suggest)
+    VECTOR_INDEX_DIR = os.environ.get('VECTOR_INDEX_DIR', os.path.join(basedir, 'vector_index'))
+    VECTOR_INDEX_BACKEND = os.environ.get('VECTOR_INDEX_BACKEND', 'auto')  # auto, numpy or faiss
+    SUGGEST_MAX_K = int(os.environ.get('SUGGEST_MAX_K', 500))
+
+    # spaCy model, loaded on first use unless SPACY_PRELOAD is set (gunicorn.conf.py sets it)
+    SPACY_MODEL = os.environ.get('SPACY_MODEL', 'en_core_web_sm')
+    SPACY_PRELOAD = os.environ.get('SPACY_PRELOAD', 'false').lower() == 'true'
+
+    # Batched spaCy parsing (nlp.pipe) for bulk upload, rescoring and backfills
+    NLP_BATCH_SIZE = int(os.environ.get('NLP_BATCH_SIZE', 32))
+    NLP_N_PROCESS = int(os.environ.get('NLP_N_PROCESS', 1))  # Outside the batch process pool
+    NLP_MAX_CHARS = int(os.environ.get('NLP_MAX_CHARS', 100000))  # Longer documents are chunked or truncated
+    NLP_LONG_DOCUMENTS = os.environ.get('NLP_LONG_DOCUMENTS', 'chunk')  # chunk or truncate
+
+    # Candidates rescored per chunk (and per batched UPDATE) after a job changes
+    RESCORE_CHUNK_SIZE = int(os.environ.get('RESCORE_CHUNK_SIZE', 1000))
+
+
+class ScriptConfig(Config):
+    """Configuration for maintenance scripts that never process uploads."""
+    WORKER_AUTOSTART = False
+    SPACY_PRELOAD = False
@@ -1,8 +1,9 @@
 from app import create_app, db
+from config import ScriptConfig
 
 
 def clear_alembic_version() -> None:
-    app = create_app()
+    app = create_app(ScriptConfig)
     with app.app_context():
         conn = db.engine.connect()
         trans = conn.begin()
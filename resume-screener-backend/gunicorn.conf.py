@@ -0,0 +1,64 @@
+"""
+Gunicorn settings for serving the API: gunicorn -c gunicorn.conf.py run:app
+
+The app, and with it the spaCy model, is loaded once in the master before the
+workers are forked, so every worker shares the model's memory copy-on-write
+instead of loading its own copy. Background worker threads don't survive a
+fork, so they are started in each worker after it is forked.
+
+Every open event stream (/api/jobs/<id>/events) holds a worker thread with
+the default gthread workers. Threads mostly wait on streams, so there are
+GUNICORN_THREADS (16) of them per worker, and EVENTS_MAX_STREAMS defaults to
+all but EVENTS_RESERVED_THREADS (4) of them; the rest serve the API. Fanning
+out to many more listeners needs GUNICORN_WORKER_CLASS=gevent: streams then
+cost a greenlet each, and the limit is raised to EVENTS_MAX_STREAMS_GEVENT.
+Scoring in the same process blocks the other greenlets while it runs, so such
+a server is best run with WORKER_AUTOSTART=false next to one that does the
+scoring.
+"""
+import gc
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+if worker_class == 'gevent':
+    # Before the app is loaded, so its threads and sockets are cooperative too
+    from gevent import monkey
+    monkey.patch_all()
+    os.environ.setdefault('EVENTS_MAX_STREAMS', os.environ.get('EVENTS_MAX_STREAMS_GEVENT', '1000'))
+else:
+    reserved = int(os.environ.get('EVENTS_RESERVED_THREADS', 4))
+    os.environ.setdefault('EVENTS_MAX_STREAMS', str(max(1, threads - reserved)))
+
+# Read by config.Config when the master loads the app; the master itself
+# never runs background workers
+start_background_workers = os.environ.get('WORKER_AUTOSTART', 'true').lower() == 'true'
+os.environ.setdefault('SPACY_PRELOAD', 'true')
+os.environ['WORKER_AUTOSTART'] = 'false'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+
+def on_starting(server):
+    from app import metrics
+
+    # Counters start from zero with the server
+    metrics.reset()
+
+
+def when_ready(server):
+    # Objects loaded so far are never collected; keeping the collector from
+    # touching them keeps their pages shared after fork
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if not start_background_workers:
+        return
+    from app.worker import start_workers
+
+    # With preload_app this is the app the master already loaded
+    start_workers(server.app.wsgi())
@@ -0,0 +1,44 @@
+"""add indexes for candidate listings, deletes and the task queue
+
+Revision ID: 2f6d8b4e1a07
+Revises: 9e3b5a2f7c18
+Create Date: 2025-10-06 14:52:38.104672
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6d8b4e1a07'
+down_revision = '9e3b5a2f7c18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Listings order by match_score DESC NULLS LAST, id DESC. SQLite already
+    # sorts NULLs last in a DESC index and has no NULLS clause in CREATE INDEX.
+    if bind.dialect.name == 'postgresql':
+        score_order = sa.text('match_score DESC NULLS LAST')
+    else:
+        score_order = sa.text('match_score DESC')
+    op.create_index('ix_candidate_job_id_match_score', 'candidate',
+                    ['job_id', score_order, sa.text('id DESC')], unique=False)
+
+    op.create_index('ix_candidate_job_id_status', 'candidate', ['job_id', 'status'], unique=False)
+    op.create_index('ix_candidate_user_id', 'candidate', ['user_id'], unique=False)
+    op.create_index('ix_candidate_resume_file_id_job_id', 'candidate', ['resume_file_id', 'job_id'], unique=False)
+    op.create_index(op.f('ix_job_posting_created_by'), 'job_posting', ['created_by'], unique=False)
+    op.create_index(op.f('ix_background_task_status'), 'background_task', ['status'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_background_task_status'), table_name='background_task')
+    op.drop_index(op.f('ix_job_posting_created_by'), table_name='job_posting')
+    op.drop_index('ix_candidate_resume_file_id_job_id', table_name='candidate')
+    op.drop_index('ix_candidate_user_id', table_name='candidate')
+    op.drop_index('ix_candidate_job_id_status', table_name='candidate')
+    op.drop_index('ix_candidate_job_id_match_score', table_name='candidate')
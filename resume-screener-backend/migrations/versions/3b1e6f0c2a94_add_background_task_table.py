@@ -0,0 +1,44 @@
+"""add background_task table
+
+Revision ID: 3b1e6f0c2a94
+Revises: 8fa638ac9ae7
+Create Date: 2025-09-24 10:12:03.417281
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1e6f0c2a94'
+down_revision = '8fa638ac9ae7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('background_task',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('candidate_id', sa.Integer(), nullable=True),
+        sa.Column('job_id', sa.Integer(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('background_task', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_background_task_candidate_id'), ['candidate_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_background_task_job_id'), ['job_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('background_task', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_background_task_job_id'))
+        batch_op.drop_index(batch_op.f('ix_background_task_candidate_id'))
+
+    op.drop_table('background_task')
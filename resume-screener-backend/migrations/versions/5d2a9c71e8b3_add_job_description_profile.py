@@ -0,0 +1,31 @@
+"""add precomputed description profile to job_posting
+
+Revision ID: 5d2a9c71e8b3
+Revises: 3b1e6f0c2a94
+Create Date: 2025-09-26 16:41:22.908114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2a9c71e8b3'
+down_revision = '3b1e6f0c2a94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing jobs get their profile built lazily on the next upload
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('description_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('description_vector', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('description_terms', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.drop_column('description_terms')
+        batch_op.drop_column('description_vector')
+        batch_op.drop_column('description_hash')
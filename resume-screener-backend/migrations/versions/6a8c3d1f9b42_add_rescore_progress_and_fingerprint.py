@@ -0,0 +1,38 @@
+"""add job scoring fingerprint and background task progress
+
+Revision ID: 6a8c3d1f9b42
+Revises: 2f6d8b4e1a07
+Create Date: 2025-10-09 11:07:45.318226
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a8c3d1f9b42'
+down_revision = '2f6d8b4e1a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Scores computed before this carry no fingerprint; a job's first rescore
+    # recomputes all of their components
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scoring_fingerprint', sa.JSON(), nullable=True))
+
+    with op.batch_alter_table('background_task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('progress', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('total', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('result', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('background_task', schema=None) as batch_op:
+        batch_op.drop_column('result')
+        batch_op.drop_column('total')
+        batch_op.drop_column('progress')
+
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.drop_column('scoring_fingerprint')
@@ -0,0 +1,29 @@
+"""add stored resume vector and terms to candidate
+
+Revision ID: 7c4f1e8a0d56
+Revises: 5d2a9c71e8b3
+Create Date: 2025-09-29 11:05:47.231940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4f1e8a0d56'
+down_revision = '5d2a9c71e8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing candidates are backfilled from resume_text by the next rescore
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('resume_vector', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('resume_terms', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.drop_column('resume_terms')
+        batch_op.drop_column('resume_vector')
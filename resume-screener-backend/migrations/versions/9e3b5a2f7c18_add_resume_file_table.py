@@ -0,0 +1,51 @@
+"""add content-addressed resume_file table
+
+Revision ID: 9e3b5a2f7c18
+Revises: 7c4f1e8a0d56
+Create Date: 2025-10-02 09:27:14.660318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3b5a2f7c18'
+down_revision = '7c4f1e8a0d56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resume_file',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=True),
+        sa.Column('resume_text', sa.Text(), nullable=True),
+        sa.Column('resume_vector', sa.LargeBinary(), nullable=True),
+        sa.Column('resume_terms', sa.JSON(), nullable=True),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('extracted_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sha256')
+    )
+
+    # Existing candidates keep their per-upload files and are not linked
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('resume_file_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_candidate_resume_file_id', 'resume_file', ['resume_file_id'], ['id'])
+        batch_op.create_foreign_key('fk_candidate_duplicate_of_id', 'candidate', ['duplicate_of_id'], ['id'],
+                                    ondelete='SET NULL')
+
+
+def downgrade():
+    with op.batch_alter_table('candidate', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_candidate_duplicate_of_id', type_='foreignkey')
+        batch_op.drop_constraint('fk_candidate_resume_file_id', type_='foreignkey')
+        batch_op.drop_column('duplicate_of_id')
+        batch_op.drop_column('resume_file_id')
+
+    op.drop_table('resume_file')
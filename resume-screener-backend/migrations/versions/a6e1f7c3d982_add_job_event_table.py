@@ -0,0 +1,39 @@
+"""add job_event table for live per-job event streams
+
+Revision ID: a6e1f7c3d982
+Revises: f2c8d4a1b739
+Create Date: 2025-10-18 10:42:27.308516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e1f7c3d982'
+down_revision = 'f2c8d4a1b739'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('job_event', schema=None) as batch_op:
+        batch_op.create_index('ix_job_event_job_id_id', ['job_id', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_job_event_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('job_event', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_job_event_created_at'))
+        batch_op.drop_index('ix_job_event_job_id_id')
+
+    op.drop_table('job_event')
@@ -0,0 +1,64 @@
+"""add full-text search over candidate resume text
+
+Revision ID: b4d7e2a9c315
+Revises: 6a8c3d1f9b42
+Create Date: 2025-10-13 15:21:09.604117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d7e2a9c315'
+down_revision = '6a8c3d1f9b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # External-content FTS5 index kept in sync by triggers. Note that a
+        # batch_alter_table on candidate recreates the table and drops the
+        # triggers; a migration that does so must create them again.
+        op.execute(
+            "CREATE VIRTUAL TABLE candidate_fts USING fts5("
+            "resume_text, name, content='candidate', content_rowid='id', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER candidate_fts_insert AFTER INSERT ON candidate BEGIN "
+            "INSERT INTO candidate_fts(rowid, resume_text, name) VALUES (new.id, new.resume_text, new.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER candidate_fts_delete AFTER DELETE ON candidate BEGIN "
+            "INSERT INTO candidate_fts(candidate_fts, rowid, resume_text, name) "
+            "VALUES ('delete', old.id, old.resume_text, old.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER candidate_fts_update AFTER UPDATE OF resume_text, name ON candidate BEGIN "
+            "INSERT INTO candidate_fts(candidate_fts, rowid, resume_text, name) "
+            "VALUES ('delete', old.id, old.resume_text, old.name); "
+            "INSERT INTO candidate_fts(rowid, resume_text, name) VALUES (new.id, new.resume_text, new.name); END"
+        )
+        # Index the existing candidates
+        op.execute("INSERT INTO candidate_fts(candidate_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        # Computed for existing rows as the column is added
+        op.execute(
+            "ALTER TABLE candidate ADD COLUMN resume_tsv tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "to_tsvector('english', coalesce(resume_text, ''))) STORED"
+        )
+        op.execute("CREATE INDEX ix_candidate_resume_tsv ON candidate USING gin (resume_tsv)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS candidate_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS candidate_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS candidate_fts_insert")
+        op.execute("DROP TABLE IF EXISTS candidate_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_candidate_resume_tsv")
+        op.execute("ALTER TABLE candidate DROP COLUMN IF EXISTS resume_tsv")
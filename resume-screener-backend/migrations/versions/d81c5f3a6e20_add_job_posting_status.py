@@ -0,0 +1,26 @@
+"""add job posting status for background deletion
+
+Revision ID: d81c5f3a6e20
+Revises: b4d7e2a9c315
+Create Date: 2025-10-15 10:42:18.730561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81c5f3a6e20'
+down_revision = 'b4d7e2a9c315'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='active'))
+
+
+def downgrade():
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.drop_column('status')
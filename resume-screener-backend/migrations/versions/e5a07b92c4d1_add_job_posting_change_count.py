@@ -0,0 +1,26 @@
+"""add job posting change counter for listing ETags
+
+Revision ID: e5a07b92c4d1
+Revises: d81c5f3a6e20
+Create Date: 2025-10-16 09:13:52.184630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a07b92c4d1'
+down_revision = 'd81c5f3a6e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_count', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('job_posting', schema=None) as batch_op:
+        batch_op.drop_column('change_count')
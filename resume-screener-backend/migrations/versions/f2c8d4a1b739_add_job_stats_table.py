@@ -0,0 +1,74 @@
+"""add job_stats table with per-job candidate aggregates
+
+Revision ID: f2c8d4a1b739
+Revises: e5a07b92c4d1
+Create Date: 2025-10-17 14:36:05.912743
+
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8d4a1b739'
+down_revision = 'e5a07b92c4d1'
+branch_labels = None
+depends_on = None
+
+# As in app/job_stats.py
+SCORE_BUCKETS = 100
+SCORED_STATUS = 'processed'
+
+
+def upgrade():
+    job_stats = op.create_table('job_stats',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('candidate_count', sa.Integer(), nullable=False),
+        sa.Column('status_counts', sa.JSON(), nullable=False),
+        sa.Column('scored_count', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('max_score', sa.Float(), nullable=True),
+        sa.Column('score_histogram', sa.JSON(), nullable=False),
+        sa.Column('last_upload_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['job_posting.id'], ),
+        sa.PrimaryKeyConstraint('job_id')
+    )
+
+    # Aggregate the existing candidates, one pass over the table
+    bind = op.get_bind()
+    stats = {}
+    for (job_id,) in bind.execute(sa.text('SELECT id FROM job_posting')):
+        stats[job_id] = {
+            'job_id': job_id, 'candidate_count': 0, 'status_counts': defaultdict(int), 'scored_count': 0,
+            'score_sum': 0.0, 'max_score': None, 'score_histogram': [0] * SCORE_BUCKETS,
+            'last_upload_at': None, 'updated_at': datetime.utcnow(),
+        }
+    rows = bind.execute(sa.text('SELECT job_id, status, match_score, upload_date FROM candidate'))
+    for job_id, status, score, uploaded_at in rows:
+        entry = stats.get(job_id)
+        if entry is None:
+            continue
+        entry['candidate_count'] += 1
+        entry['status_counts'][status] += 1
+        if status == SCORED_STATUS and score is not None:
+            entry['scored_count'] += 1
+            entry['score_sum'] += score
+            entry['max_score'] = score if entry['max_score'] is None else max(entry['max_score'], score)
+            entry['score_histogram'][min(max(int(score * SCORE_BUCKETS), 0), SCORE_BUCKETS - 1)] += 1
+        if uploaded_at is not None:
+            if isinstance(uploaded_at, str):  # SQLite hands back text
+                uploaded_at = datetime.fromisoformat(uploaded_at)
+            if entry['last_upload_at'] is None or uploaded_at > entry['last_upload_at']:
+                entry['last_upload_at'] = uploaded_at
+    for entry in stats.values():
+        entry['status_counts'] = dict(entry['status_counts'])
+    if stats:
+        op.bulk_insert(job_stats, list(stats.values()))
+
+
+def downgrade():
+    op.drop_table('job_stats')
@@ -0,0 +1,36 @@
+import argparse
+from app import create_app, db
+from app.models import JobPosting
+from app.rescoring import queue_rescore, rescore_job
+from config import ScriptConfig
+
+def main():
+    parser = argparse.ArgumentParser(description='Bring match scores for a job up to date from stored resume features.')
+    parser.add_argument('job_id', type=int, help='Job posting to rescore')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Candidates scored per batch')
+    parser.add_argument('--full', action='store_true', help='Recompute every score component, not only stale ones')
+    parser.add_argument('--background', action='store_true', help='Queue the rescore for the server workers and exit')
+    args = parser.parse_args()
+
+    app = create_app(ScriptConfig)
+    with app.app_context():
+        job = db.session.get(JobPosting, args.job_id)
+        if job is None:
+            print(f"Job {args.job_id} not found.")
+            return 1
+
+        if args.background:
+            task = queue_rescore(job, force=args.full, chunk_size=args.chunk_size)
+            db.session.commit()
+            print(f"Queued rescore task {task.id} for job {job.id}.")
+            return 0
+
+        def report(done, total):
+            print(f"  {done}/{total} candidates checked", flush=True)
+
+        count = rescore_job(job, chunk_size=args.chunk_size, force=args.full, progress=report)
+        print(f"Rescored {count} candidates for job {job.id}.")
+        return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,8 +1,9 @@
 import os
 from app import create_app, db
+from config import ScriptConfig
 
 def reset_database():
-    app = create_app()
+    app = create_app(ScriptConfig)
     with app.app_context():
         # Drop all tables
         db.drop_all()
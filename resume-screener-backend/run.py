@@ -1,6 +1,15 @@
+import os
+
 from app import create_app, db
 
 app = create_app()
 
 if __name__ == '__main__':
+    from app import metrics
+    metrics.reset()
+    # The development server scores uploads itself; with the reloader only
+    # its child process, which serves the requests, runs the workers
+    if os.environ.get('WORKER_AUTOSTART', 'true').lower() == 'true' and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from app.worker import start_workers
+        start_workers(app)
     app.run(debug=True)
@@ -0,0 +1,53 @@
+import argparse
+import csv
+import sys
+
+import numpy as np
+from app import create_app
+from app import batch_scorer
+from config import ScriptConfig
+
+def main():
+    parser = argparse.ArgumentParser(description='Score stored resumes against jobs as an N x M matrix.')
+    parser.add_argument('--jobs', type=int, nargs='*', help='Job ids to score against (default: all jobs)')
+    parser.add_argument('--candidates', type=int, nargs='*', help='Candidate ids to score (default: all processed)')
+    parser.add_argument('--top-k', type=int, help='Only report the k best candidates per job')
+    parser.add_argument('--memory-mb', type=int, default=256, help='Working memory budget per chunk')
+    parser.add_argument('--output', help='Write the matrix to this .npy or .csv file (default: CSV on stdout)')
+    args = parser.parse_args()
+
+    app = create_app(ScriptConfig)
+    with app.app_context():
+        jobs = batch_scorer.load_jobs(args.jobs)
+        candidate_ids, vectors, terms = batch_scorer.load_resumes(args.candidates)
+    memory_budget = args.memory_mb * 1024 * 1024
+
+    out = open(args.output, 'w', newline='') if args.output and not args.output.endswith('.npy') else sys.stdout
+    try:
+        if args.top_k:
+            indices, scores = batch_scorer.top_k(vectors, terms, jobs, args.top_k, memory_budget)
+            writer = csv.writer(out)
+            writer.writerow(['job_id', 'rank', 'candidate_id', 'score'])
+            for j, job_id in enumerate(jobs.job_ids):
+                for rank, (i, score) in enumerate(zip(indices[j], scores[j]), start=1):
+                    writer.writerow([job_id, rank, candidate_ids[i], f'{score:.4f}'])
+            return 0
+
+        scores = batch_scorer.score_matrix(vectors, terms, jobs, memory_budget)
+        if args.output and args.output.endswith('.npy'):
+            np.save(args.output, scores)
+            print(f"Saved {scores.shape[0]} x {scores.shape[1]} scores to {args.output} "
+                  f"(rows: candidates {candidate_ids[:1]}..., columns: jobs {jobs.job_ids})")
+            return 0
+
+        writer = csv.writer(out)
+        writer.writerow(['candidate_id'] + jobs.job_ids)
+        for candidate_id, row in zip(candidate_ids, scores):
+            writer.writerow([candidate_id] + [f'{score:.4f}' for score in row])
+        return 0
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+"""
+Shared fixtures. Every test gets its own app on a temporary SQLite database,
+with the upload folder, caches and indexes under tmp_path, one user and one
+job. The worker pool isn't started; tests run queued tasks with run_queued().
+"""
+import io
+import zipfile
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from app import create_app, db as _db, job_profile
+from app.models import JobPosting, User
+from app.worker import claim_next_task, run_task
+from config import ScriptConfig
+
+
+@pytest.fixture
+def config(tmp_path):
+    class TestConfig(ScriptConfig):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        EXTRACTION_CACHE_DIR = str(tmp_path / 'extraction_cache')
+        METRICS_DIR = str(tmp_path / 'metrics')
+        VECTOR_INDEX_DIR = str(tmp_path / 'vector_index')
+        PROFILE_FLAG_FILE = str(tmp_path / 'profile.flag')
+        PROFILE_DIR = str(tmp_path / 'profiles')
+        JWT_VERIFY_SUB = False  # Identities are ints; newer PyJWT rejects them as 'sub'
+        BATCH_WORKERS = 2
+    return TestConfig
+
+
+@pytest.fixture
+def app(config):
+    job_profile._cache.clear()  # Keyed by job id, which every test's database reuses
+    app = create_app(config)
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.engine.dispose()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(db):
+    user = User(email='recruiter@example.com', name='Recruiter')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def headers(user):
+    return {'Authorization': f'Bearer {user.get_auth_token()}'}
+
+
+@pytest.fixture
+def job(db, user):
+    job = JobPosting(
+        title='Python Developer',
+        description='Python developer with Flask, SQL and Docker experience',
+        required_skills=['Python', 'Flask', 'SQL'],
+        created_by=user.id
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def make_pdf(*pages):
+    """A PDF with one page per string, as bytes."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for text in pages:
+        y = 800
+        for line in text.splitlines() or ['']:
+            pdf.drawString(40, y, line)
+            y -= 14
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def make_zip(files):
+    """A ZIP archive of {name: bytes}, as bytes."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def upload(client, headers, job_id, data, filename='resume.pdf'):
+    return client.post(
+        f'/api/jobs/{job_id}/upload',
+        data={'file': (io.BytesIO(data), filename)},
+        headers=headers,
+        content_type='multipart/form-data'
+    )
+
+
+def run_queued():
+    """Runs queued background tasks until none are left; returns how many ran."""
+    count = 0
+    while True:
+        task = claim_next_task()
+        if task is None:
+            return count
+        run_task(task)
+        count += 1
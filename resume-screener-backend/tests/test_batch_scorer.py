@@ -0,0 +1,73 @@
+import numpy as np
+
+from app.batch_scorer import JobMatrix, score_matrix, top_k
+from app.job_profile import JobProfile
+from app.models import Candidate
+from app.vectors import pack_vector
+
+
+def profile(job_id, terms, vector=None):
+    vector = None if vector is None else np.asarray(vector, dtype=np.float32)
+    return JobProfile(job_id, '', vector, frozenset(terms), None)
+
+
+def test_keyword_overlap_without_vectors():
+    jobs = JobMatrix([profile(1, {'python', 'flask'}), profile(2, {'java'})])
+    scores = score_matrix([None, None], [['python'], ['python', 'flask', 'java']], jobs)
+    assert scores.tolist() == [[0.5, 0.0], [1.0, 1.0]]
+
+
+def test_vectors_override_keywords_where_both_sides_have_one():
+    jobs = JobMatrix([profile(1, {'python'}, [1, 0]), profile(2, {'python'})])
+    scores = score_matrix([pack_vector([1, 1]), None], [['go'], ['python']], jobs)
+    assert np.allclose(scores, [[np.sqrt(0.5), 0.0], [1.0, 1.0]])
+
+
+def test_chunking_and_top_k_agree_with_the_full_matrix():
+    rng = np.random.default_rng(1)
+    jobs = JobMatrix([profile(j, {'t%d' % j}, rng.normal(size=16)) for j in range(4)])
+    vectors = [pack_vector(v) for v in rng.normal(size=(50, 16))]
+    terms = [[] for _ in vectors]
+
+    full = score_matrix(vectors, terms, jobs)
+    assert np.allclose(score_matrix(vectors, terms, jobs, memory_budget=1), full, atol=1e-6)
+
+    indices, scores = top_k(vectors, terms, jobs, 5, memory_budget=200)
+    assert indices.shape == (4, 5)
+    for j in range(4):
+        assert np.allclose(scores[j], np.sort(full[:, j])[::-1][:5])
+        assert np.allclose(full[indices[j], j], scores[j])
+
+
+def test_top_k_larger_than_the_set():
+    jobs = JobMatrix([profile(1, {'python'})])
+    indices, scores = top_k([None, None], [['python'], []], jobs, 10)
+    assert indices.tolist() == [[0, 1]]
+    assert scores.tolist() == [[1.0, 0.0]]
+
+
+def test_score_matrix_endpoint(client, headers, job, db, app):
+    candidate = Candidate(job_id=job.id, user_id=job.created_by, status='processed',
+                          resume_terms=['python', 'flask'])
+    db.session.add(candidate)
+    db.session.commit()
+
+    response = client.post('/api/score-matrix', json={'candidate_ids': [candidate.id]}, headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['job_ids'], body['candidate_ids']) == ([job.id], [candidate.id])
+    assert 0 < body['scores'][0][0] <= 1
+
+    top = client.post('/api/score-matrix', json={'candidate_ids': [candidate.id], 'top_k': 3},
+                      headers=headers).get_json()
+    assert top['results'][str(job.id)][0]['candidate_id'] == candidate.id
+
+    assert client.post('/api/score-matrix', json={}, headers=headers).status_code == 400
+    assert client.post('/api/score-matrix', json={'candidate_ids': [candidate.id], 'job_ids': []},
+                       headers=headers).status_code == 400
+    missing = client.post('/api/score-matrix', json={'candidate_ids': [candidate.id, 999]}, headers=headers)
+    assert missing.status_code == 404
+    assert missing.get_json()['missing_candidate_ids'] == [999]
+
+    app.config['SCORE_MATRIX_MAX_CANDIDATES'] = 1
+    assert client.post('/api/score-matrix', json={'candidate_ids': [1, 2]}, headers=headers).status_code == 400
@@ -0,0 +1,81 @@
+import io
+import os
+
+import pytest
+
+from app import batch, create_app
+from app.models import Candidate, ResumeFile
+from conftest import make_pdf, make_zip
+
+
+def post_batch(client, headers, job_id, files):
+    return client.post(
+        f'/api/jobs/{job_id}/upload/batch',
+        data={'files': [(io.BytesIO(data), name) for name, data in files]},
+        headers=headers,
+        content_type='multipart/form-data'
+    )
+
+
+def stored_files(folder):
+    return [name for _, _, names in os.walk(folder) for name in names if name.endswith('.pdf')]
+
+
+def test_files_and_zip_members_are_scored(app, client, headers, job, db):
+    alice = make_pdf('Alice Smith\nPython Flask SQL')
+    bob = make_pdf('Bob Jones\nJava Spring')
+    archive = make_zip({'resumes/bob.pdf': bob, 'resumes/alice-again.pdf': alice, 'notes.txt': b'x'})
+
+    response = post_batch(client, headers, job.id, [('alice.pdf', alice), ('batch.zip', archive)])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['total'], body['processed']) == (4, 3)
+
+    results = {entry['filename']: entry for entry in body['results']}
+    assert results['notes.txt']['status'] == 'skipped'
+    assert results['alice.pdf']['duplicate'] is False
+    assert results['alice-again.pdf']['duplicate_of'] == results['alice.pdf']['resume_id']
+    assert results['alice.pdf']['match_score'] > results['bob.pdf']['match_score']
+    assert 'file_path' not in results['alice.pdf']
+
+    assert Candidate.query.filter_by(job_id=job.id, status='processed').count() == 3
+    assert ResumeFile.query.count() == 2  # Alice's copies share one stored file
+    assert len(stored_files(app.config['UPLOAD_FOLDER'])) == 2
+
+
+def test_bad_zip_and_empty_request(client, headers, job):
+    assert post_batch(client, headers, job.id, []).status_code == 400
+    body = post_batch(client, headers, job.id, [('broken.zip', b'not a zip')]).get_json()
+    assert body['results'] == [{'filename': 'broken.zip', 'status': 'skipped', 'error': 'Invalid ZIP archive'}]
+
+
+def test_scoring_failure_fails_the_inserted_candidates(client, headers, job, monkeypatch):
+    def crash(entries, job, config):
+        raise RuntimeError('pool died')
+    monkeypatch.setattr(batch, 'score_entries', crash)
+
+    response = post_batch(client, headers, job.id, [('alice.pdf', make_pdf('Alice Smith\nPython'))])
+    assert response.status_code == 500
+
+    candidate = Candidate.query.one()
+    assert candidate.status == 'error'
+    assert candidate.processed_data == {'error': 'pool died'}
+    assert os.path.exists(candidate.file_path)  # Still used by the candidate
+
+
+def test_failure_before_insert_removes_stored_files(app, client, headers, job, monkeypatch):
+    def crash(entries, job_id):
+        raise RuntimeError('database went away')
+    monkeypatch.setattr(batch, 'attach_resume_files', crash)
+
+    response = post_batch(client, headers, job.id, [('alice.pdf', make_pdf('Alice Smith\nPython'))])
+    assert response.status_code == 500
+    assert Candidate.query.count() == 0
+    assert stored_files(app.config['UPLOAD_FOLDER']) == []
+
+
+def test_fork_start_method_is_rejected(config):
+    class ForkConfig(config):
+        BATCH_MP_CONTEXT = 'fork'
+    with pytest.raises(ValueError, match='BATCH_MP_CONTEXT'):
+        create_app(ForkConfig)
@@ -0,0 +1,80 @@
+import json
+import sys
+
+import pytest
+
+from app import extraction
+from benchmarks import bench_similarity, compare
+from benchmarks.common import (make_rng, percentile, synthetic_resume, write_docx, write_pdf,
+                               write_results)
+
+
+def rows(*results):
+    return {compare.row_key(row): row for row in results}
+
+
+def test_metric_directions():
+    assert compare.direction('docs_per_sec') == 1
+    assert compare.direction('speedup') == 1
+    assert compare.direction('p95_ms') == -1
+    assert compare.direction('peak_rss_mb') == -1
+    assert compare.direction('path') is None
+    assert compare.row_key({'path': 'spacy', 'docs': 10, 'p95_ms': 4.0}) == (('docs', 10), ('path', 'spacy'))
+
+
+def test_regressions_beyond_the_threshold():
+    baseline = rows({'stage': 'nlp', 'p95_ms': 100.0, 'docs_per_sec': 50.0},
+                    {'stage': 'extract', 'p95_ms': 10.0, 'docs_per_sec': 200.0})
+    candidate = rows({'stage': 'nlp', 'p95_ms': 105.0, 'docs_per_sec': 40.0},
+                     {'stage': 'extract', 'p95_ms': 5.0, 'docs_per_sec': 400.0},
+                     {'stage': 'skills', 'p95_ms': 1.0})
+    changes, regressions = compare.compare(baseline, candidate, threshold=0.1)
+    assert len(changes) == 4
+    assert [(entry['key'], entry['metric'], entry['change']) for entry in regressions] == [
+        ({'stage': 'nlp'}, 'docs_per_sec', -0.2)
+    ]
+
+
+def test_command_exits_non_zero_on_a_regression(tmp_path, monkeypatch, capsys):
+    baseline = write_results('bench', [{'stage': 'nlp', 'p95_ms': 10.0}], str(tmp_path / 'a.json'))
+    slower = write_results('bench', [{'stage': 'nlp', 'p95_ms': 12.0}], str(tmp_path / 'b.json'))
+    monkeypatch.setattr(sys, 'argv', ['compare', baseline, slower])
+    with pytest.raises(SystemExit) as exit:
+        compare.main()
+    assert exit.value.code == 1
+    assert 'REGRESSION' in capsys.readouterr().out
+
+    monkeypatch.setattr(sys, 'argv', ['compare', baseline, slower, '--threshold', '0.5'])
+    with pytest.raises(SystemExit) as exit:
+        compare.main()
+    assert exit.value.code == 0
+
+
+def test_results_carry_run_metadata(tmp_path):
+    path = write_results('bench_x', [{'docs': 1}], str(tmp_path / 'out.json'))
+    with open(path) as f:
+        payload = json.load(f)
+    assert payload['benchmark'] == 'bench_x'
+    assert payload['results'] == [{'docs': 1}]
+    assert {'timestamp', 'python', 'cpu_count', 'git_revision'} <= set(payload)
+
+
+def test_corpus_is_reproducible_and_extractable(app, tmp_path):
+    assert synthetic_resume(500, make_rng(7)) == synthetic_resume(500, make_rng(7))
+    text = synthetic_resume(500, make_rng(7))
+    name = text.split('\n')[0]
+
+    write_pdf(str(tmp_path / 'r.pdf'), [text])
+    write_docx(str(tmp_path / 'r.docx'), text.split('\n'))
+    assert extraction.extract_text(str(tmp_path / 'r.pdf')).startswith(name)
+    assert extraction.extract_text(str(tmp_path / 'r.docx')).startswith(name)
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.95), percentile(values, 1.0)) == (50, 95, 100)
+
+
+def test_similarity_benchmark_runs(capsys):
+    [row] = bench_similarity.run([300], pairs=3, repeat=1)
+    assert {'minhash_median_ms', 'sequence_median_ms', 'speedup', 'spearman'} <= set(row)
@@ -0,0 +1,101 @@
+import os
+
+from app import storage
+from app.models import BackgroundTask, Candidate, JobPosting, ResumeFile, User
+from app.worker import claim_next_task, run_task
+from conftest import make_pdf, run_queued, upload
+
+JANE = make_pdf('Jane Doe\nPython Flask SQL')
+JOHN = make_pdf('John Roe\nJava Spring')
+
+
+def add_job(db, job, title='Java Developer'):
+    other = JobPosting(title=title, description='Java Spring developer', created_by=job.created_by)
+    db.session.add(other)
+    db.session.commit()
+    return other
+
+
+def delete(client, headers, job_id):
+    return client.delete(f'/api/jobs/{job_id}', headers=headers)
+
+
+def test_deletion_is_queued(client, headers, job, db):
+    response = delete(client, headers, job.id)
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status'] == 'deleting'
+    assert delete(client, headers, job.id).get_json()['task_id'] == body['task_id']
+
+    # Still visible until the task has run, but closed to uploads
+    assert client.get(f'/api/jobs/{job.id}', headers=headers).get_json()['status'] == 'deleting'
+    assert upload(client, headers, job.id, JANE).status_code == 409
+
+    other = User(email='other@example.com', name='Other')
+    db.session.add(other)
+    db.session.commit()
+    assert delete(client, headers={'Authorization': f'Bearer {other.get_auth_token()}'},
+                  job_id=job.id).status_code == 403
+
+
+def test_task_removes_rows_and_unshared_files(client, headers, job, db):
+    upload(client, headers, job.id, JANE)
+    upload(client, headers, job.id, JOHN)
+    upload(client, headers, job.id, JANE, filename='copy.pdf')
+    other = add_job(db, job)
+    upload(client, headers, other.id, JANE)
+    run_queued()
+    paths = {candidate.name: candidate.file_path for candidate in Candidate.query.filter_by(job_id=job.id)}
+
+    job_id = job.id
+    task_id = delete(client, headers, job_id).get_json()['task_id']
+    run_queued()
+
+    task = db.session.get(BackgroundTask, task_id)
+    assert task.status == 'done'
+    assert task.result == {'candidates_deleted': 3, 'files_removed': 1}
+    assert db.session.get(JobPosting, job_id) is None
+    assert Candidate.query.filter_by(job_id=job_id).count() == 0
+    assert not os.path.exists(paths['John Roe'])
+    assert os.path.exists(paths['Jane Doe'])  # Still used by the other job
+    assert [row.file_path for row in ResumeFile.query] == [paths['Jane Doe']]
+
+
+def test_reaper_waits_for_uploads_and_keeps_what_they_stored(app, client, headers, job, db):
+    upload(client, headers, job.id, JANE)
+    run_queued()
+    path = Candidate.query.one().file_path
+    other = add_job(db, job)
+    app.config['STORE_LOCK_TIMEOUT'] = 0.05
+    job_id = job.id
+    task_id = delete(client, headers, job_id).get_json()['task_id']
+
+    # An upload is between storing its file and committing its candidate
+    with storage.storing(app.config['UPLOAD_FOLDER']):
+        run_task(claim_next_task())
+        task = db.session.get(BackgroundTask, task_id)
+        assert (task.status, task.attempts) == ('queued', 1)
+        assert 'store lock' in task.error
+        assert db.session.get(JobPosting, job_id) is None  # The rows went before the wait
+        assert os.path.exists(path)
+
+        # Meanwhile the same file is uploaded to another job
+        assert upload(client, headers, other.id, JANE).status_code == 200
+
+    run_queued()
+    task = db.session.get(BackgroundTask, task_id)
+    assert (task.status, task.attempts) == ('done', 2)
+    assert task.result['files_removed'] == 0
+    assert os.path.exists(path)
+    assert ResumeFile.query.one().file_path == path
+
+
+def test_reaper_gives_up_after_max_attempts(app, client, headers, job, db):
+    upload(client, headers, job.id, JANE)
+    run_queued()
+    app.config.update(STORE_LOCK_TIMEOUT=0.01, WORKER_MAX_ATTEMPTS=2)
+    task_id = delete(client, headers, job.id).get_json()['task_id']
+
+    with storage.storing(app.config['UPLOAD_FOLDER']):
+        assert run_queued() == 2
+    assert db.session.get(BackgroundTask, task_id).status == 'error'
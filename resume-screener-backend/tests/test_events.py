@@ -0,0 +1,167 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import events
+from app.models import Candidate, JobEvent
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Streams that end as soon as they have caught up, unless a test says otherwise."""
+    for name, value in (('max_stream_seconds', 0), ('keepalive', 0.05), ('poll_interval', 0.05)):
+        monkeypatch.setitem(events.SETTINGS, name, value)
+    return events.SETTINGS
+
+
+def parse(body):
+    """The (id, event, data) of each SSE message, keepalives and retry skipped."""
+    messages = []
+    for block in body.decode('utf-8').split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if line and not line.startswith((':', 'retry')))
+        if fields:
+            messages.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return messages
+
+
+def add(db, job, status='queued', score=None):
+    candidate = Candidate(job_id=job.id, user_id=job.created_by, status=status, match_score=score)
+    db.session.add(candidate)
+    db.session.commit()
+    return candidate
+
+
+def stream(client, headers, job_id, last_event_id=None):
+    extra = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+    return client.get(f'/api/jobs/{job_id}/events', headers={**headers, **extra})
+
+
+def test_changes_are_written_as_events(db, job):
+    candidate = add(db, job)
+    candidate.status, candidate.match_score = 'processed', 0.75
+    db.session.commit()
+    candidate_id = candidate.id
+    db.session.delete(candidate)
+    job.status = 'closed'
+    db.session.commit()
+
+    rows = JobEvent.query.order_by(JobEvent.id).all()
+    assert [(row.kind, row.data) for row in rows] == [
+        ('candidate', {'id': candidate_id, 'status': 'queued', 'previous_status': None, 'match_score': None}),
+        ('candidate', {'id': candidate_id, 'status': 'processed', 'previous_status': 'queued', 'match_score': 0.75}),
+        ('job', {'status': 'closed'}),
+        ('candidate', {'id': candidate_id, 'status': 'deleted', 'previous_status': 'processed', 'match_score': None}),
+    ]
+
+
+def test_stream_starts_ready_at_the_newest_event(client, headers, db, job, settings):
+    add(db, job)
+    newest = events.newest_event_id(job.id)
+    response = stream(client, headers, job.id)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.data.startswith(b'retry: %d\n\n' % settings['retry_ms'])
+    assert parse(response.data) == [(newest, 'ready', {'job_id': job.id})]
+
+
+def test_resume_sends_the_missed_events_in_order(client, headers, db, job, settings):
+    first = add(db, job)
+    after = events.newest_event_id(job.id)
+    second = add(db, job)
+    first.status = 'processing'
+    db.session.commit()
+
+    messages = parse(stream(client, headers, job.id, last_event_id=after).data)
+    assert messages[0] == (after, 'ready', {'job_id': job.id})
+    assert [(kind, data['id'], data['status']) for _, kind, data in messages[1:]] == [
+        ('candidate', second.id, 'queued'), ('candidate', first.id, 'processing')
+    ]
+    ids = [event_id for event_id, _, _ in messages]
+    assert ids == sorted(ids) and ids[-1] == events.newest_event_id(job.id)
+
+    # ?last_event_id= does the same for a first connection
+    by_query = client.get(f'/api/jobs/{job.id}/events?last_event_id={after}', headers=headers)
+    assert parse(by_query.data) == messages
+    assert stream(client, headers, job.id, last_event_id='abc').status_code == 400
+
+
+def test_resume_after_pruned_events_resets(client, headers, db, job, settings):
+    add(db, job)
+    pruned = events.newest_event_id(job.id)
+    assert events.prune(datetime.utcnow() + timedelta(seconds=1)) == 1
+    add(db, job)
+    newest = events.newest_event_id(job.id)
+
+    messages = parse(stream(client, headers, job.id, last_event_id=pruned).data)
+    assert messages == [(newest, 'reset', {'job_id': job.id})]
+
+    # Nothing retained at all: still a reset
+    events.prune(datetime.utcnow() + timedelta(seconds=1))
+    assert parse(stream(client, headers, job.id, last_event_id=newest).data) == [(0, 'reset', {'job_id': job.id})]
+
+
+def test_deleted_job_ends_the_stream(client, headers, db, job, settings):
+    settings['max_stream_seconds'] = 30
+    after = events.newest_event_id(job.id)
+    events.record(job.id, status='deleted')
+    db.session.commit()
+    started = time.monotonic()
+    messages = parse(stream(client, headers, job.id, last_event_id=after).data)
+    assert messages[-1][1:] == ('job', {'status': 'deleted'})
+    assert time.monotonic() - started < 5
+
+
+def test_live_events_reach_the_stream(app, client, headers, db, job, settings):
+    settings['max_stream_seconds'] = 10
+    response = stream(client, headers, job.id)
+    chunks = response.iter_encoded()
+    assert parse(next(chunks))[0][1] == 'ready'
+
+    candidate = add(db, job)
+    received = []
+    for chunk in chunks:
+        received += parse(chunk)
+        if received:
+            break
+    response.close()
+    assert [(kind, data['id']) for _, kind, data in received] == [('candidate', candidate.id)]
+    assert app.extensions['event_hub']._listeners == {}
+
+
+def test_lagging_listener_catches_up_from_the_table():
+    listener = events.Listener(1, size=2)
+    for event_id in (1, 2, 3, 4):
+        listener.put(event_id)
+    assert listener.get(0) is events.LAGGING
+    assert listener.get(0) is None
+    listener.put(5)
+    assert listener.get(0) == 5
+
+
+def test_stream_limit(client, headers, job, settings):
+    settings['max_streams'] = 0
+    response = stream(client, headers, job.id)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(settings['retry_ms'] // 1000)
+
+
+def test_stream_tokens(client, headers, db, job, settings):
+    response = client.post(f'/api/jobs/{job.id}/events/token', headers=headers)
+    assert response.status_code == 200
+    token = response.get_json()['token']
+
+    opened = client.get(f'/api/jobs/{job.id}/events?token={token}')
+    assert opened.status_code == 200
+    assert parse(opened.data)[0][1] == 'ready'
+
+    assert client.get(f'/api/jobs/{job.id + 1}/events?token={token}').status_code == 401  # Another job's stream
+    assert client.get(f'/api/jobs/{job.id}/events?token={token}x').status_code == 401
+    assert client.get(f'/api/jobs/{job.id}/events').status_code == 401
+    # The access token is not accepted in the URL
+    access_token = headers['Authorization'].split()[1]
+    assert client.get(f'/api/jobs/{job.id}/events?jwt={access_token}').status_code == 401
+
+    settings['token_seconds'] = -1
+    assert client.get(f'/api/jobs/{job.id}/events?token={token}').status_code == 401
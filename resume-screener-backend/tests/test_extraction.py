@@ -0,0 +1,121 @@
+import itertools
+from types import SimpleNamespace
+
+import docx
+import pytest
+
+from app import extraction
+from app.extraction import ExtractionError, UnsupportedFileType, extract_text_from_pdf
+from conftest import make_pdf, make_zip, run_queued, upload
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    def write(*pages, name='resume.pdf'):
+        path = tmp_path / name
+        path.write_bytes(make_pdf(*pages))
+        return str(path)
+    return write
+
+
+def test_pages_are_joined_in_order(app, pdf_file):
+    path = pdf_file('page one', 'page two', 'page three')
+    assert extract_text_from_pdf(path).split('\n') == ['page one', 'page two', 'page three']
+
+
+def test_page_and_character_limits(app, pdf_file):
+    path = pdf_file(*[f'page {i}' for i in range(5)])
+    assert extract_text_from_pdf(path, max_pages=2) == 'page 0\npage 1'
+    assert extract_text_from_pdf(path, max_chars=10) == 'page 0\npag'
+
+
+def test_files_over_the_size_budget_are_rejected(app, pdf_file, monkeypatch):
+    monkeypatch.setitem(extraction.BUDGETS['pdf'], 'max_bytes', 100)
+    with pytest.raises(ExtractionError, match='extraction budget'):
+        extract_text_from_pdf(pdf_file('too big'))
+
+
+def test_time_budget_returns_the_pages_so_far(app, pdf_file, monkeypatch):
+    clock = itertools.count()  # Each reading of the clock is a second later
+    monkeypatch.setattr(extraction, 'time', SimpleNamespace(monotonic=lambda: next(clock)))
+    flags = {}
+    text = extract_text_from_pdf(pdf_file('first', 'second', 'third'), timeout=1.5, flags=flags)
+    assert text == 'first'
+    assert flags == {'timed_out': True}
+
+
+def test_long_documents_are_extracted_in_parallel(app, pdf_file, monkeypatch):
+    pages = [f'page {i}' for i in range(6)]
+    path = pdf_file(*pages)
+    serial = extract_text_from_pdf(path)
+    monkeypatch.setitem(extraction.LIMITS, 'parallel_min_pages', 2)
+    calls = []
+    iter_pages_parallel = extraction._iter_pages_parallel
+
+    def recording(*args):
+        calls.append(args)
+        return iter_pages_parallel(*args)
+    monkeypatch.setattr(extraction, '_iter_pages_parallel', recording)
+
+    assert extract_text_from_pdf(path) == serial == '\n'.join(pages)
+    assert len(calls) == 1
+
+
+@pytest.fixture
+def docx_file(tmp_path):
+    def write(paragraphs, header=None, name='resume.docx'):
+        document = docx.Document()
+        if header:
+            document.sections[0].header.paragraphs[0].text = header
+        for text in paragraphs:
+            document.add_paragraph(text)
+        path = tmp_path / name
+        document.save(str(path))
+        return str(path)
+    return write
+
+
+def test_docx_text_starts_with_its_headers(app, docx_file):
+    path = docx_file(['Python developer', 'Flask and SQL'], header='Jane Doe - jane@example.com')
+    assert extraction.check_supported(path) == 'docx'
+    assert extraction.extract_text(path) == 'Jane Doe - jane@example.com\nPython developer\nFlask and SQL'
+
+
+def test_docx_budgets(app, docx_file, monkeypatch):
+    path = docx_file(['x' * 50] * 20)
+    assert len(extraction.extract_text_from_docx(path, max_chars=60)) == 60
+    monkeypatch.setitem(extraction.BUDGETS['docx'], 'max_bytes', 100)
+    with pytest.raises(ExtractionError, match='extraction budget'):
+        extraction.extract_text_from_docx(path)
+
+
+@pytest.mark.parametrize('content, file_type', [
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' + b'\0' * 100, 'doc'),
+    (b'{\\rtf1\\ansi Jane}', 'rtf'),
+    (make_zip({'notes.txt': b'not a resume'}), 'zip'),
+    (b'PK\x03\x04 truncated', None),
+    (b'plain text resume', None),
+])
+def test_unsupported_types_are_sniffed_and_rejected(app, tmp_path, content, file_type):
+    path = tmp_path / 'resume.docx'
+    path.write_bytes(content)
+    assert extraction.sniff_file_type(str(path)) == file_type
+    with pytest.raises(UnsupportedFileType) as error:
+        extraction.check_supported(str(path))
+    assert error.value.file_type == file_type
+    assert 'upload a PDF or DOCX' in str(error.value)
+
+
+def test_type_is_sniffed_not_taken_from_the_name(app, tmp_path):
+    path = tmp_path / 'resume.docx'
+    path.write_bytes(b'junk\n' + make_pdf('Actually a PDF'))
+    assert extraction.extract_text(str(path)) == 'Actually a PDF'
+
+
+def test_uploaded_docx_is_scored(client, headers, job, docx_file):
+    with open(docx_file(['Jane Doe', 'Python Flask SQL']), 'rb') as f:
+        response = upload(client, headers, job.id, f.read(), filename='jane.docx')
+    assert response.status_code == 202
+    run_queued()
+    status = client.get(response.get_json()['status_url'], headers=headers).get_json()
+    assert status['status'] == 'processed'
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from app import extraction, extraction_cache
+from app.extraction_cache import cached_extract
+from conftest import make_pdf
+
+
+@pytest.fixture
+def cache(app, monkeypatch):
+    monkeypatch.setattr(extraction_cache, '_size', None)  # Scanned again for this test's directory
+    return extraction_cache
+
+
+def extractor(text, complete=True):
+    calls = []
+
+    def extract(path):
+        calls.append(path)
+        return text, complete
+    return extract, calls
+
+
+def test_repeat_extraction_is_served_from_the_cache(cache, tmp_path):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'resume bytes')
+    extract, calls = extractor('Jane Doe')
+
+    assert cached_extract(str(path), 'pdf:1', extract) == 'Jane Doe'
+    assert cached_extract(str(path), 'pdf:1', extract) == 'Jane Doe'
+    assert len(calls) == 1
+
+    # Another extractor version, or another file, is a miss
+    cached_extract(str(path), 'pdf:2', extract)
+    cached_extract(str(path), 'pdf:1', extract, sha256='0' * 64)
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize('text, complete', [('partial', False), ('', True)])
+def test_incomplete_and_empty_texts_are_not_cached(cache, tmp_path, text, complete):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'resume bytes')
+    extract, calls = extractor(text, complete)
+    cached_extract(str(path), 'pdf:1', extract)
+    cached_extract(str(path), 'pdf:1', extract)
+    assert len(calls) == 2
+
+
+def test_disabled_cache_always_extracts(cache, tmp_path, monkeypatch):
+    monkeypatch.setitem(cache.SETTINGS, 'enabled', False)
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(b'resume bytes')
+    extract, calls = extractor('text')
+    cached_extract(str(path), 'pdf:1', extract)
+    cached_extract(str(path), 'pdf:1', extract)
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    texts = {f'{i:064x}': os.urandom(400).hex() for i in range(4)}
+    for i, (sha256, text) in enumerate(texts.items()):
+        cache.put(sha256, 'k', text)
+        os.utime(cache.entry_path(sha256, 'k'), (1000 + i, 1000 + i))
+    used, oldest, *newer = texts
+    assert cache.get(used, 'k') == texts[used]  # Refreshes its mtime
+
+    size = os.path.getsize(cache.entry_path(oldest, 'k'))
+    monkeypatch.setitem(cache.SETTINGS, 'max_bytes', int(size * 4.5))
+    cache.put('f' * 64, 'k', os.urandom(400).hex())
+
+    # Five entries over a limit of 4.5: the least recently used one goes
+    assert cache.get(oldest, 'k') is None
+    assert cache.get(used, 'k') == texts[used]
+    assert all(cache.get(sha256, 'k') == texts[sha256] for sha256 in newer)
+    assert cache.stats()['evictions'] >= 1
+
+
+def test_extract_text_reuses_the_cache_until_the_limits_change(cache, tmp_path, monkeypatch):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(make_pdf('Jane Doe resume'))
+    calls = []
+    extract_pdf = extraction._extractors['pdf'].extract
+
+    def counting(filepath, flags=None):
+        calls.append(filepath)
+        return extract_pdf(filepath, flags=flags)
+    monkeypatch.setattr(extraction._extractors['pdf'], 'extract', counting)
+
+    assert extraction.extract_text(str(path)) == 'Jane Doe resume'
+    assert extraction.extract_text(str(path)) == 'Jane Doe resume'
+    assert len(calls) == 1
+    monkeypatch.setitem(extraction.LIMITS, 'max_chars', 4)
+    assert extraction.extract_text(str(path)) == 'Jane'
+    assert len(calls) == 2
+
+
+def test_health_reports_cache_stats(client, cache):
+    stats = client.get('/api/health').get_json()['extraction_cache']
+    assert {'hits', 'misses', 'hit_rate', 'max_bytes'} <= set(stats)
@@ -0,0 +1,46 @@
+from app import job_profile, scorer
+from app.job_profile import content_hash, get_job_profile
+from app.models import JobPosting
+
+
+def count_parses(monkeypatch):
+    calls = []
+    build_features = scorer.build_features
+
+    def counting(text):
+        calls.append(text)
+        return build_features(text)
+    monkeypatch.setattr(scorer, 'build_features', counting)
+    return calls
+
+
+def test_created_job_stores_its_profile(client, headers, db):
+    response = client.post('/api/jobs', json={'title': 'Data', 'description': 'Pandas and SQL analyst'},
+                           headers=headers)
+    job = db.session.get(JobPosting, response.get_json()['job_id'])
+    assert job.description_hash == content_hash('Pandas and SQL analyst')
+    assert {'pandas', 'sql', 'analyst'} <= set(job.description_terms)
+
+
+def test_description_is_parsed_once(job, monkeypatch):
+    calls = count_parses(monkeypatch)
+    first = get_job_profile(job)
+    assert get_job_profile(job) is first
+    assert len(calls) == 1
+
+    # A new process starts with an empty LRU and reads the profile off the row
+    job_profile._cache.clear()
+    assert get_job_profile(job).terms == first.terms
+    assert len(calls) == 1
+
+
+def test_edited_description_gets_a_new_profile(client, headers, job, db, monkeypatch):
+    old = get_job_profile(job)
+    calls = count_parses(monkeypatch)
+    client.put(f'/api/jobs/{job.id}', json={'description': 'Go and Kubernetes engineer'}, headers=headers)
+
+    db.session.refresh(job)
+    profile = get_job_profile(job)
+    assert profile.content_hash != old.content_hash
+    assert 'kubernetes' in profile.terms
+    assert calls == ['Go and Kubernetes engineer']
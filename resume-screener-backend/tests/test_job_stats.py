@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import defer
+
+from app import job_stats
+from app.models import Candidate, JobPosting, JobStats
+
+FIELDS = ('candidate_count', 'status_counts', 'scored_count', 'max_score', 'score_histogram', 'last_upload_at')
+START = datetime(2024, 1, 1)
+
+
+def add(db, job, score, status='processed', minutes=0):
+    candidate = Candidate(job_id=job.id, user_id=job.created_by, status=status, match_score=score,
+                          upload_date=START + timedelta(minutes=minutes))
+    db.session.add(candidate)
+    db.session.commit()
+    return candidate
+
+
+def stored(db, job_id):
+    db.session.expire_all()
+    row = db.session.get(JobStats, job_id)
+    return {field: getattr(row, field) for field in FIELDS}, row.score_sum
+
+
+def assert_matches_candidates(db, job_id):
+    """The incrementally kept row equals the aggregates computed from scratch."""
+    values, score_sum = stored(db, job_id)
+    computed = job_stats.compute(db.session.connection(), job_id)
+    assert values == {field: computed[field] for field in FIELDS}
+    assert score_sum == pytest.approx(computed['score_sum'])
+
+
+def test_new_job_starts_at_zero(db, job):
+    values, score_sum = stored(db, job.id)
+    assert values['candidate_count'] == values['scored_count'] == 0
+    assert (values['max_score'], score_sum) == (None, 0)
+
+
+def test_aggregates_follow_inserts_updates_and_deletes(db, job):
+    top = add(db, job, 0.9, minutes=1)
+    middle = add(db, job, 0.5, minutes=2)
+    queued = add(db, job, None, status='queued', minutes=3)
+    add(db, job, 0.3, minutes=0)
+    values, score_sum = stored(db, job.id)
+    assert values['status_counts'] == {'processed': 3, 'queued': 1}
+    assert (values['scored_count'], values['max_score'], score_sum) == (3, 0.9, pytest.approx(1.7))
+    assert values['last_upload_at'] == START + timedelta(minutes=3)
+
+    queued.status, queued.match_score = 'processed', 0.7
+    middle.match_score = 0.6
+    db.session.commit()
+    assert_matches_candidates(db, job.id)
+
+    # Removing the maximum and the latest upload reads them back from the candidates
+    db.session.delete(top)
+    db.session.delete(queued)
+    db.session.commit()
+    values, _ = stored(db, job.id)
+    assert (values['max_score'], values['last_upload_at']) == (0.6, START + timedelta(minutes=2))
+    assert_matches_candidates(db, job.id)
+
+
+def test_max_survives_removing_one_of_a_tie(db, job):
+    first = add(db, job, 0.8)
+    add(db, job, 0.8)
+    add(db, job, 0.4)
+    db.session.delete(first)
+    db.session.commit()
+    assert stored(db, job.id)[0]['max_score'] == 0.8
+
+    lowered = Candidate.query.filter_by(match_score=0.8).one()
+    lowered.match_score = 0.2
+    db.session.commit()
+    assert stored(db, job.id)[0]['max_score'] == 0.4
+
+
+def test_max_is_cleared_with_the_last_score(db, job):
+    only = add(db, job, 0.8)
+    only.status = 'error'
+    db.session.commit()
+    values, score_sum = stored(db, job.id)
+    assert (values['scored_count'], values['max_score'], score_sum) == (0, None, 0)
+
+
+def test_expired_values_are_still_taken_out(db, job):
+    candidate = add(db, job, 0.9)
+    add(db, job, 0.1)
+    db.session.expire(candidate)
+    candidate.match_score = 0.2
+    db.session.commit()
+    assert_matches_candidates(db, job.id)
+
+    # Deleted without its columns loaded: the job is rebuilt
+    candidate_id, job_id = candidate.id, job.id
+    db.session.expunge_all()
+    db.session.delete(db.session.get(Candidate, candidate_id, options=[defer(Candidate.match_score)]))
+    db.session.commit()
+    assert_matches_candidates(db, job_id)
+
+
+def test_bulk_changes_are_recorded(db, job):
+    add(db, job, 0.5)
+    rows = [{'job_id': job.id, 'user_id': job.created_by, 'status': 'queued', 'upload_date': START + timedelta(hours=1)}
+            for _ in range(3)]
+    db.session.execute(Candidate.__table__.insert(), rows)
+    job_stats.record(job.id, added=[('queued', None, row['upload_date']) for row in rows])
+    db.session.commit()
+    assert_matches_candidates(db, job.id)
+
+    db.session.execute(Candidate.__table__.update().where(Candidate.match_score == 0.5).values(match_score=0.25))
+    job_stats.record(job.id, rescored=[(0.5, 0.25)])
+    db.session.commit()
+    assert_matches_candidates(db, job.id)
+
+
+def test_rebuild_repairs_a_row(db, job):
+    add(db, job, 0.5)
+    add(db, job, 0.7)
+    db.session.query(JobStats).update({'candidate_count': 99, 'max_score': 0.1})
+    db.session.commit()
+    job_stats.rebuild(job.id)
+    db.session.commit()
+    assert_matches_candidates(db, job.id)
+
+
+def test_percentiles_from_the_histogram():
+    histogram = [0] * job_stats.SCORE_BUCKETS
+    for score in (0.105, 0.205, 0.305, 0.405):
+        histogram[job_stats.score_bucket(score)] += 1
+    assert job_stats.percentile(histogram, 4, 0.5) == 0.21
+    assert job_stats.percentile(histogram, 4, 1.0, max_score=0.405) == 0.405
+    assert job_stats.percentile(histogram, 0, 0.5) is None
+    assert job_stats.score_bucket(1.0) == job_stats.SCORE_BUCKETS - 1
+
+
+def test_summary_endpoint(client, headers, db, job):
+    for score in (0.2, 0.4, 0.6, 0.8):
+        add(db, job, score)
+    add(db, job, None, status='error')
+    newer = JobPosting(title='Go Developer', description='Go', created_by=job.created_by)
+    db.session.add(newer)
+    db.session.commit()
+
+    response = client.get('/api/jobs/summary', headers=headers)
+    assert response.status_code == 200
+    empty, summary = response.get_json()
+    assert (empty['id'], summary['id']) == (newer.id, job.id)
+    assert empty['candidates'] == {'total': 0, 'by_status': {}}
+    assert summary['candidates'] == {'total': 5, 'by_status': {'processed': 4, 'error': 1}}
+    scores = summary['scores']
+    assert (scores['count'], scores['max'], scores['mean']) == (4, 0.8, 0.5)
+    assert scores['p50'] <= scores['p75'] <= scores['p90'] <= 0.8
+
+    first = client.get('/api/jobs/summary?limit=1', headers=headers)
+    assert [row['id'] for row in first.get_json()] == [newer.id]
+    second = client.get(f"/api/jobs/summary?limit=1&cursor={first.headers['X-Next-Cursor']}", headers=headers)
+    assert [row['id'] for row in second.get_json()] == [job.id]
+    assert 'X-Next-Cursor' not in second.headers
+    assert client.get('/api/jobs/summary?cursor=bogus', headers=headers).status_code == 400
@@ -0,0 +1,77 @@
+import json
+import os
+
+import pytest
+
+from app import metrics
+from conftest import make_pdf, upload
+
+
+@pytest.fixture
+def registry(app, monkeypatch):
+    """An empty registry for this process, flushing to this test's directory."""
+    monkeypatch.setattr(metrics, '_counters', {})
+    monkeypatch.setattr(metrics, '_histograms', {})
+    return metrics
+
+
+def test_spans_fill_the_stage_histogram(registry):
+    for seconds in (0.0005, 0.02, 100):
+        registry.observe('resume_stage_seconds', seconds, stage='extract')
+    with registry.span('nlp'):
+        pass
+
+    lines = registry.render().splitlines()
+    assert '# TYPE resume_stage_seconds histogram' in lines
+    assert 'resume_stage_seconds_bucket{stage="extract",le="0.001"} 1' in lines
+    assert 'resume_stage_seconds_bucket{stage="extract",le="0.025"} 2' in lines
+    assert 'resume_stage_seconds_bucket{stage="extract",le="60.0"} 2' in lines
+    assert 'resume_stage_seconds_bucket{stage="extract",le="+Inf"} 3' in lines
+    assert 'resume_stage_seconds_count{stage="extract"} 3' in lines
+    assert 'resume_stage_seconds_sum{stage="extract"} 100.0205' in lines
+    assert 'resume_stage_seconds_count{stage="nlp"} 1' in lines
+
+
+def test_snapshots_of_other_processes_are_added(registry, app):
+    registry.inc('resumes_processed_total', status='processed')
+    other = {'counters': [['resumes_processed_total', [['status', 'processed']], 2]], 'histograms': []}
+    os.makedirs(app.config['METRICS_DIR'], exist_ok=True)
+    with open(os.path.join(app.config['METRICS_DIR'], 'metrics.1.1.json'), 'w') as f:
+        json.dump(other, f)
+
+    assert 'resumes_processed_total{status="processed"} 3' in registry.render().splitlines()
+
+    registry.reset()
+    registry._counters.clear()
+    assert 'resumes_processed_total' not in registry.render()
+
+
+def test_label_values_are_escaped(registry):
+    registry.inc('extract_chars_total', type='a"b\\c')
+    assert 'extract_chars_total{type="a\\"b\\\\c"} 1' in registry.render()
+
+
+def test_endpoint_serves_request_timings(registry, client):
+    client.get('/api/health')
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert ('http_request_duration_seconds_count{endpoint="health_check",method="GET",status="200"} 1'
+            in response.get_data(as_text=True).splitlines())
+
+
+def test_upload_records_its_stages(registry, client, headers, job):
+    upload(client, headers, job.id, make_pdf('Jane Doe'))
+    text = registry.render()
+    for stage in ('receive', 'save', 'sniff', 'db_commit'):
+        assert f'resume_stage_seconds_count{{stage="{stage}"}} 1' in text
+
+
+def test_flag_file_turns_on_profiling(registry, client, app):
+    assert 'X-Profile' not in client.get('/api/health').headers
+
+    with open(app.config['PROFILE_FLAG_FILE'], 'w') as f:
+        f.write('health_check\n')
+    profiled = client.get('/api/health')
+    assert os.path.exists(os.path.join(app.config['PROFILE_DIR'], profiled.headers['X-Profile']))
+    assert 'X-Profile' not in client.get('/api/metrics').headers
@@ -0,0 +1,145 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+import spacy
+
+from app import create_app, scorer
+from conftest import make_pdf
+
+
+class FakeDoc:
+    def __init__(self, text):
+        self.text = text
+        self.vector = np.array([len(text), 1.0], dtype=np.float32)
+
+    def __len__(self):
+        return len(self.text.split())
+
+
+class FakeNlp:
+    """Stands in for a spaCy pipeline: a document's vector is (its length, 1)."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, text):
+        return FakeDoc(text)
+
+    def pipe(self, texts, batch_size=1000, n_process=1):
+        texts = list(texts)
+        self.batches.append((texts, batch_size, n_process))
+        return (FakeDoc(text) for text in texts)
+
+
+@pytest.fixture
+def fresh_nlp(monkeypatch):
+    """Forgets the loaded model for the test, and counts spacy.load() calls."""
+    loads = []
+
+    def load(name, disable=()):
+        loads.append((name, tuple(disable)))
+        time.sleep(0.05)  # Long enough for concurrent callers to pile up
+        return FakeNlp()
+    monkeypatch.setattr(scorer, '_nlp', None)
+    monkeypatch.setattr(scorer, '_nlp_loaded', False)
+    monkeypatch.setattr(spacy, 'load', load)
+    return loads
+
+
+def test_app_start_up_does_not_load_spacy():
+    code = (
+        'import sys\n'
+        'from app import create_app, scorer\n'
+        'from config import ScriptConfig\n'
+        'create_app(ScriptConfig)\n'
+        'assert not scorer._nlp_loaded and "spacy" not in sys.modules\n'
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_model_is_loaded_once_on_first_use(fresh_nlp):
+    threads = [threading.Thread(target=scorer.get_nlp) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert isinstance(scorer.get_nlp(), FakeNlp)
+    assert fresh_nlp == [(scorer.SPACY_MODEL, scorer.SPACY_DISABLE)]
+
+
+def test_preload_warms_up_at_start_up(config, fresh_nlp):
+    class PreloadConfig(config):
+        SPACY_PRELOAD = True
+    create_app(PreloadConfig)
+    assert len(fresh_nlp) == 1
+    assert scorer.spacy_available()
+
+
+def test_missing_model_is_not_retried(fresh_nlp, monkeypatch):
+    def missing(name, disable=()):
+        fresh_nlp.append(name)
+        raise OSError("Can't find model")
+    monkeypatch.setattr(spacy, 'load', missing)
+    assert scorer.get_nlp() is None
+    assert scorer.warm_up() is False
+    assert len(fresh_nlp) == 1
+
+
+@pytest.fixture
+def fake_nlp(monkeypatch):
+    nlp = FakeNlp()
+    monkeypatch.setattr(scorer, '_nlp', nlp)
+    monkeypatch.setattr(scorer, '_nlp_loaded', True)
+    monkeypatch.setitem(scorer.NLP_SETTINGS, 'batch_size', 4)
+    return nlp
+
+
+def test_documents_are_parsed_in_one_batch_in_order(fake_nlp):
+    texts = ['one', 'three words here', 'two words']
+    vectors = scorer.document_vectors(texts)
+    assert [vector[0] for vector in vectors] == [3, 16, 9]
+    assert fake_nlp.batches == [(texts, 4, 1)]
+
+
+def test_long_documents_are_chunked_or_truncated(fake_nlp, monkeypatch):
+    monkeypatch.setitem(scorer.NLP_SETTINGS, 'max_chars', 10)
+    text = 'aaaa bbbb cccc dddd'
+    vector = scorer.document_vectors([text])[0]
+    pieces = fake_nlp.batches[-1][0]
+    assert pieces == ['aaaa bbbb', ' cccc dddd']
+    # Token-weighted mean of the chunk vectors (2 tokens each)
+    assert vector.tolist() == [9.5, 1.0]
+
+    monkeypatch.setitem(scorer.NLP_SETTINGS, 'long_documents', 'truncate')
+    scorer.document_vectors([text])
+    assert fake_nlp.batches[-1][0] == ['aaaa bbbb ']
+
+
+def test_pool_children_parse_in_process(fake_nlp, monkeypatch):
+    monkeypatch.setattr(scorer, 'in_pool_worker', lambda: True)
+    scorer.document_vectors(['a'], n_process=4)
+    assert fake_nlp.batches[-1][2] == 1
+
+
+def test_without_spacy_every_vector_is_none(monkeypatch):
+    monkeypatch.setattr(scorer, '_nlp', None)
+    monkeypatch.setattr(scorer, '_nlp_loaded', True)
+    assert scorer.document_vectors(['a', 'b']) == [None, None]
+
+
+def test_process_resumes_parses_the_batch_together(app, job, fake_nlp, tmp_path):
+    paths = []
+    for i, text in enumerate(['Alice Python', '', 'Bob Flask SQL']):
+        path = tmp_path / f'{i}.pdf'
+        path.write_bytes(make_pdf(text))
+        paths.append(str(path))
+    results = scorer.process_resumes(paths, job)
+    assert 'error' in results[1]
+    assert [result['resume_text'] for result in (results[0], results[2])] == ['Alice Python', 'Bob Flask SQL']
+    assert len(fake_nlp.batches) == 1
+    assert fake_nlp.batches[0][0] == ['Alice Python', 'Bob Flask SQL']
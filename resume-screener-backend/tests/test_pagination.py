@@ -0,0 +1,75 @@
+import pytest
+
+from app.models import Candidate
+from app.pagination import InvalidPageRequest, decode_cursor, encode_cursor
+
+SCORES = [0.5, 0.9, None, 0.5, 0.2, None, 0.5, 0.9]
+
+
+@pytest.fixture
+def candidates(db, job):
+    rows = [Candidate(job_id=job.id, user_id=job.created_by, match_score=score,
+                      status='processed' if score is not None else 'queued') for score in SCORES]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def listing(client, headers, job_id, **args):
+    return client.get(f'/api/jobs/{job_id}/candidates', query_string=args, headers=headers)
+
+
+def expected_order(candidates):
+    """Best score first, unscored last, newest first within a score."""
+    return [c.id for c in sorted(candidates, key=lambda c: (c.match_score is None, -(c.match_score or 0), -c.id))]
+
+
+def test_unpaged_listing_returns_everything_in_order(client, headers, job, candidates, app):
+    app.config['CANDIDATES_PAGE_SIZE'] = 2
+    response = listing(client, headers, job.id)
+    assert [row['id'] for row in response.get_json()] == expected_order(candidates)
+    assert 'X-Next-Cursor' not in response.headers
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 5])
+def test_cursor_walk_covers_ties_and_unscored_rows_once(client, headers, job, candidates, limit):
+    seen, args = [], {'limit': limit}
+    while True:
+        response = listing(client, headers, job.id, **args)
+        page = response.get_json()
+        assert len(page) <= limit
+        seen.extend(row['id'] for row in page)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+        assert 'rel="next"' in response.headers['Link']
+        args = {'limit': limit, 'cursor': cursor}
+    assert seen == expected_order(candidates)
+
+
+def test_cursor_without_limit_uses_the_page_size(client, headers, job, candidates, app):
+    app.config['CANDIDATES_PAGE_SIZE'] = 3
+    first = listing(client, headers, job.id, limit=1)
+    page = listing(client, headers, job.id, cursor=first.headers['X-Next-Cursor']).get_json()
+    assert [row['id'] for row in page] == expected_order(candidates)[1:4]
+
+
+def test_filters(client, headers, job, candidates):
+    scored = listing(client, headers, job.id, status='processed', min_score=0.5).get_json()
+    assert sorted(row['match_score'] for row in scored) == [0.5, 0.5, 0.5, 0.9, 0.9]
+    assert [row['match_score'] for row in listing(client, headers, job.id, max_score=0.3).get_json()] == [0.2]
+    assert len(listing(client, headers, job.id, status='queued,error').get_json()) == 2
+
+
+def test_bad_requests(client, headers, job, candidates):
+    assert listing(client, headers, job.id, limit='ten').status_code == 400
+    assert listing(client, headers, job.id, cursor='not-a-cursor').status_code == 400
+    assert listing(client, headers, job.id, min_score='high').status_code == 400
+    assert listing(client, headers, 999).status_code == 404
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(0.25, 7)) == (0.25, 7)
+    assert decode_cursor(encode_cursor(None, 3)) == (None, 3)
+    with pytest.raises(InvalidPageRequest):
+        decode_cursor(encode_cursor('x', 'y'))
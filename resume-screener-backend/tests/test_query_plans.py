@@ -0,0 +1,11 @@
+import pytest
+
+from check_query_plans import CHECKS, compile_sql, sqlite_plan
+
+
+@pytest.mark.parametrize('description, build_query, expected, ordered', CHECKS, ids=[check[0] for check in CHECKS])
+def test_hot_queries_use_their_indexes(db, description, build_query, expected, ordered):
+    indexes, sorts, plan = sqlite_plan(compile_sql(build_query()))
+    assert indexes & expected, plan
+    if ordered:
+        assert not sorts, plan
@@ -0,0 +1,120 @@
+import numpy as np
+
+from app.job_profile import content_hash
+from app.models import BackgroundTask, Candidate, User
+from app.rescoring import rescore_job
+from app.skills import evaluate_resume
+from app.vectors import cosine_similarity, pack_vector, unpack_vector
+from conftest import run_queued
+
+
+def add_candidate(db, job, text, vector=None, semantic=0.0):
+    scores = evaluate_resume(text, job, semantic)
+    candidate = Candidate(
+        job_id=job.id,
+        user_id=job.created_by,
+        status='processed',
+        resume_text=text,
+        resume_vector=pack_vector(vector),
+        resume_terms=sorted(set(text.lower().split())),
+        match_score=scores['match_score'],
+        score_breakdown=scores['score_breakdown'],
+        skills=scores['skills'],
+        experience=scores['experience']
+    )
+    db.session.add(candidate)
+    db.session.commit()
+    return candidate
+
+
+def set_job_vector(db, job, vector):
+    """Stores a description vector on the job, as ingest does when spaCy is installed."""
+    job.description_hash = content_hash(job.description)
+    job.description_terms = sorted(set(job.description.lower().split()))
+    job.description_vector = pack_vector(vector)
+    db.session.commit()
+
+
+def test_rescore_uses_stored_vectors(db, job):
+    set_job_vector(db, job, [1.0, 0.0, 0.0])
+    near = add_candidate(db, job, 'Python Flask', vector=[0.9, 0.1, 0.0])
+    far = add_candidate(db, job, 'Python Flask', vector=[0.0, 0.0, 1.0], semantic=0.9)
+
+    assert rescore_job(job, force=True) == 2
+
+    for candidate in (near, far):
+        db.session.refresh(candidate)
+        expected = cosine_similarity(unpack_vector(candidate.resume_vector), np.array([1.0, 0.0, 0.0]))
+        assert candidate.score_breakdown['semantic']['score'] == round(expected, 4)
+    assert near.match_score > far.match_score
+
+
+def test_rescore_skips_up_to_date_candidates(db, job):
+    set_job_vector(db, job, [1.0, 0.0])
+    add_candidate(db, job, 'Python', vector=[1.0, 0.0])
+    assert rescore_job(job, force=True) == 1
+    assert rescore_job(job) == 0
+
+
+def test_progress_is_reported_per_chunk(db, job):
+    set_job_vector(db, job, [1.0, 0.0])
+    for _ in range(5):
+        add_candidate(db, job, 'Python', vector=[1.0, 1.0])
+    calls = []
+    rescore_job(job, chunk_size=2, force=True, progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(0, 5), (2, 5), (4, 5), (5, 5)]
+
+
+def test_weight_change_recombines_without_the_text(client, headers, job, db):
+    candidate = add_candidate(db, job, 'Python Flask SQL, 3 years', semantic=0.2)
+    Candidate.query.filter_by(id=candidate.id).update({'resume_text': None})
+    db.session.commit()
+
+    response = client.put(f'/api/jobs/{job.id}', json={'score_weights': {'skills': 1}}, headers=headers)
+    assert response.status_code == 202
+    run_queued()
+
+    db.session.refresh(candidate)
+    assert candidate.status == 'processed'
+    assert candidate.match_score == 1.0
+    assert candidate.score_breakdown['weights']['skills'] == 1.0
+    task = db.session.get(BackgroundTask, response.get_json()['rescore_task_id'])
+    assert (task.status, task.result) == ('done', {'rescored': 1})
+
+
+def test_new_skill_rescans_the_stored_text(client, headers, job, db):
+    candidate = add_candidate(db, job, 'Python and Haskell')
+    assert 'haskell' not in candidate.skills
+
+    client.put(f'/api/jobs/{job.id}', json={'required_skills': ['Haskell']}, headers=headers)
+    run_queued()
+
+    db.session.refresh(candidate)
+    assert candidate.skills == ['haskell', 'python']
+    assert candidate.score_breakdown['skills']['matched_required'] == ['haskell']
+
+
+def test_candidates_without_text_or_breakdown_become_errors(db, job):
+    candidate = add_candidate(db, job, 'Python')
+    Candidate.query.filter_by(id=candidate.id).update({'resume_text': None, 'score_breakdown': None})
+    db.session.commit()
+
+    rescore_job(job)
+
+    db.session.refresh(candidate)
+    assert (candidate.status, candidate.match_score) == ('error', 0)
+    assert candidate.processed_data == {'error': 'No resume text to rescore from'}
+
+
+def test_rescore_endpoint(client, headers, job, db):
+    response = client.post(f'/api/jobs/{job.id}/rescore', json={}, headers=headers)
+    assert response.status_code == 202
+    again = client.post(f'/api/jobs/{job.id}/rescore', json={'full': True}, headers=headers)
+    assert again.get_json()['task_id'] == response.get_json()['task_id']
+    assert BackgroundTask.query.one().payload['force'] is True
+
+    other = User(email='other@example.com', name='Other')
+    db.session.add(other)
+    db.session.commit()
+    other_headers = {'Authorization': f'Bearer {other.get_auth_token()}'}
+    assert client.post(f'/api/jobs/{job.id}/rescore', headers=other_headers).status_code == 403
@@ -0,0 +1,130 @@
+import pytest
+
+from app import search
+from app.models import Candidate, JobPosting
+from app.search import InvalidQuery, parse_query, to_fts5, to_tsquery
+
+RESUMES = {
+    'Jane Doe': 'Senior Python developer, built Flask services and data pipelines',
+    'John Roe': 'Java engineer working with Spring and Kubernetes',
+    'Ann Lee': 'Python and Django developer, some Java',
+    'Bob Ray': 'Machine learning with PyTorch, programming in Python',
+}
+
+
+@pytest.fixture
+def candidates(db, job):
+    rows = [Candidate(job_id=job.id, user_id=job.created_by, name=name, resume_text=text, status='processed')
+            for name, text in RESUMES.items()]
+    db.session.add_all(rows)
+    db.session.commit()
+    return {row.name: row.id for row in rows}
+
+
+def names(results):
+    return sorted(result['name'] for result in results)
+
+
+def test_query_parsing():
+    assert parse_query('python') == ('word', 'python', False)
+    assert parse_query('"Flask Services" py*') == ('and', [('phrase', ['flask', 'services']), ('word', 'py', True)])
+    assert parse_query('java OR (python AND -django)') == ('or', [
+        ('word', 'java', False),
+        ('and', [('word', 'python', False), ('not', ('word', 'django', False))]),
+    ])
+    assert parse_query('node.js') == ('phrase', ['node', 'js'])
+
+
+@pytest.mark.parametrize('query', ['', '   ', '"" ()', '(python', 'python)', 'python OR', 'NOT', 'AND java'])
+def test_invalid_queries(query):
+    with pytest.raises(InvalidQuery):
+        parse_query(query)
+
+
+def test_rendered_queries_quote_every_term():
+    tree = parse_query('python -"spring boot" OR kube*')
+    assert to_fts5(tree) == '(("python" NOT "spring boot") OR "kube"*)'
+    assert to_tsquery(tree) == '((python & !(spring <-> boot)) | kube:*)'
+    with pytest.raises(InvalidQuery):
+        to_fts5(parse_query('-python'))
+
+
+def test_search_queries(client, headers, candidates):
+    def search_for(query):
+        response = client.get('/api/search', query_string={'q': query}, headers=headers)
+        assert response.status_code == 200
+        return names(response.get_json())
+
+    assert search_for('python') == ['Ann Lee', 'Bob Ray', 'Jane Doe']
+    assert search_for('python -java') == ['Bob Ray', 'Jane Doe']
+    assert search_for('"flask services"') == ['Jane Doe']
+    assert search_for('"services flask"') == []
+    assert search_for('kube*') == ['John Roe']
+    assert search_for('django OR pytorch') == ['Ann Lee', 'Bob Ray']
+    assert search_for('java AND (spring OR django)') == ['Ann Lee', 'John Roe']
+    assert search_for('developers') == ['Ann Lee', 'Jane Doe']  # Stemmed
+    assert search_for('doe') == ['Jane Doe']
+
+
+def test_results_carry_relevance_and_escaped_snippet(db, client, headers, job, candidates):
+    db.session.add(Candidate(job_id=job.id, user_id=job.created_by, name='Eve',
+                             resume_text='<b>Rust</b> and Python', status='processed'))
+    db.session.commit()
+    [result] = client.get('/api/search?q=rust', headers=headers).get_json()
+    assert result['relevance'] > 0
+    assert result['snippet'] == '&lt;b&gt;<mark>Rust</mark>&lt;/b&gt; and Python'
+
+
+def test_index_follows_updates_and_deletes(db, client, headers, candidates):
+    jane = db.session.get(Candidate, candidates['Jane Doe'])
+    jane.resume_text = 'Go developer'
+    db.session.delete(db.session.get(Candidate, candidates['Bob Ray']))
+    db.session.commit()
+    assert names(client.get('/api/search?q=python', headers=headers).get_json()) == ['Ann Lee']
+
+    search.rebuild_index()
+    db.session.commit()
+    assert names(client.get('/api/search?q=go', headers=headers).get_json()) == ['Jane Doe']
+
+
+def test_search_by_job(db, client, headers, job, candidates):
+    other = JobPosting(title='Data', description='Data engineer', created_by=job.created_by)
+    db.session.add(other)
+    db.session.commit()
+    db.session.add(Candidate(job_id=other.id, user_id=job.created_by, name='Kim', resume_text='Python', status='processed'))
+    db.session.commit()
+
+    everywhere = client.get('/api/search?q=python', headers=headers).get_json()
+    on_job = client.get(f'/api/search?q=python&job_id={other.id}', headers=headers).get_json()
+    assert len(everywhere) == 4
+    assert names(on_job) == ['Kim']
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3])
+def test_cursor_walks_every_match_once(client, headers, candidates, limit):
+    seen, cursor = [], None
+    while True:
+        params = {'q': 'python OR java', 'limit': limit, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/api/search', query_string=params, headers=headers)
+        page = response.get_json()
+        assert len(page) <= limit
+        seen += page
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert sorted(result['id'] for result in seen) == sorted(candidates.values())
+    relevance = [result['relevance'] for result in seen]
+    assert relevance == sorted(relevance, reverse=True)
+
+
+def test_bad_requests(client, headers, candidates):
+    assert client.get('/api/search?q=(python', headers=headers).status_code == 400
+    assert client.get('/api/search?q=python&cursor=bogus', headers=headers).status_code == 400
+    assert client.get('/api/search?q=python&limit=x', headers=headers).status_code == 400
+    assert client.get('/api/search?q=python').status_code == 401
+
+
+def test_unsupported_database(client, headers, monkeypatch):
+    monkeypatch.setattr(search, '_dialect', lambda: 'mysql')
+    response = client.get('/api/search?q=python', headers=headers)
+    assert response.status_code == 501
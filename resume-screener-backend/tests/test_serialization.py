@@ -0,0 +1,111 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from app import job_changes, serialization
+from app.models import Candidate
+
+BROTLI = pytest.param('br', marks=pytest.mark.skipif(not serialization.BROTLI_AVAILABLE, reason='Brotli not installed'))
+
+
+def decompress(encoding, data):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        return serialization.brotli.decompress(data)
+    return data
+
+
+@pytest.fixture
+def candidates(db, job):
+    rows = [Candidate(job_id=job.id, user_id=job.created_by, name=f'Candidate {i}', status='processed',
+                      match_score=i / 10, resume_text='Python ' * 50) for i in range(8)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def test_dumps_matches_isoformat():
+    moment = datetime(2024, 5, 1, 12, 30, 5, 123456)
+    assert json.loads(serialization.dumps({'at': moment, 1: 'x'})) == {'at': moment.isoformat(), '1': 'x'}
+
+
+def test_unchanged_listing_is_not_modified(client, headers, job, candidates):
+    url = f'/api/jobs/{job.id}/candidates'
+    first = client.get(url, headers=headers)
+    tag = first.headers['ETag']
+    assert tag.startswith('W/')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    cached = client.get(url, headers={**headers, 'If-None-Match': tag})
+    assert (cached.status_code, cached.data, cached.headers['ETag']) == (304, b'', tag)
+
+    # Another query string is another listing
+    assert client.get(url + '?limit=2', headers={**headers, 'If-None-Match': tag}).status_code == 200
+
+
+def test_changes_change_the_etag(client, headers, db, job, candidates):
+    url = f'/api/jobs/{job.id}/candidates'
+    tags = [client.get(url, headers=headers).headers['ETag']]
+
+    candidates[0].match_score = 0.95
+    db.session.commit()
+    tags.append(client.get(url, headers=headers).headers['ETag'])
+
+    # Bulk statements bypass the session and touch the job themselves
+    db.session.execute(Candidate.__table__.update().values(status='error'))
+    job_changes.touch(job.id)
+    db.session.commit()
+    tags.append(client.get(url, headers=headers).headers['ETag'])
+
+    db.session.delete(candidates[1])
+    db.session.commit()
+    response = client.get(url, headers={**headers, 'If-None-Match': tags[-1]})
+    assert response.status_code == 200
+    tags.append(response.headers['ETag'])
+    assert len(set(tags)) == 4
+
+    # /jobs follows every job
+    jobs_tag = client.get('/api/jobs', headers=headers).headers['ETag']
+    candidates[2].name = 'Renamed'
+    db.session.commit()
+    assert client.get('/api/jobs', headers={**headers, 'If-None-Match': jobs_tag}).status_code == 200
+
+
+@pytest.mark.parametrize('encoding', ['gzip', BROTLI])
+def test_large_responses_are_compressed(client, headers, job, candidates, monkeypatch, encoding):
+    url = f'/api/jobs/{job.id}/candidates'
+    plain = client.get(url, headers=headers)
+    assert 'Content-Encoding' not in plain.headers
+
+    monkeypatch.setitem(serialization.SETTINGS, 'compress_min_bytes', 200)
+    compressed = client.get(url, headers={**headers, 'Accept-Encoding': encoding})
+    assert compressed.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert json.loads(decompress(encoding, compressed.data)) == plain.get_json()
+
+    # Below the threshold, or not accepted, it is sent as is
+    monkeypatch.setitem(serialization.SETTINGS, 'compress_min_bytes', len(plain.data) + 1)
+    assert 'Content-Encoding' not in client.get(url, headers={**headers, 'Accept-Encoding': encoding}).headers
+
+
+@pytest.mark.parametrize('encoding', [None, 'gzip', BROTLI])
+def test_long_arrays_are_streamed(client, headers, job, candidates, monkeypatch, encoding):
+    url = f'/api/jobs/{job.id}/candidates'
+    expected = client.get(url, headers=headers).get_json()
+
+    monkeypatch.setitem(serialization.SETTINGS, 'stream_min_items', 5)
+    monkeypatch.setattr(serialization, 'STREAM_BLOCK_ITEMS', 3)
+    response = client.get(url, headers={**headers, **({'Accept-Encoding': encoding} if encoding else {})})
+    assert response.is_streamed
+    assert response.headers.get('Content-Encoding') == encoding
+    assert json.loads(decompress(encoding, response.data)) == expected
+
+
+def test_not_modified_is_checked_before_the_rows(client, headers, job, candidates, monkeypatch):
+    url = f'/api/jobs/{job.id}/candidates'
+    tag = client.get(url, headers=headers).headers['ETag']
+    monkeypatch.setattr(serialization, 'json_array_response', lambda *args: pytest.fail('rows serialized'))
+    assert client.get(url, headers={**headers, 'If-None-Match': tag}).status_code == 304
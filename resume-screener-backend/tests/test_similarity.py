@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from app import create_app, scorer
+from app.similarity import SKETCH_SIZE, minhash_sketch, sequence_ratio, sketch_similarity
+
+
+def words(count, seed):
+    rng = random.Random(seed)
+    return ' '.join(''.join(rng.choice('abcdefghij') for _ in range(6)) for _ in range(count))
+
+
+def test_sketch_is_bounded_and_sorted():
+    sketch = minhash_sketch(words(2000, 0))
+    assert len(sketch) == SKETCH_SIZE
+    assert list(sketch) == sorted(sketch)
+    assert minhash_sketch('') == ()
+    assert len(minhash_sketch('abc')) == 1
+
+
+def test_layout_and_case_do_not_count():
+    assert minhash_sketch('Python  Developer\n\nFlask') == minhash_sketch('python developer flask')
+
+
+def test_similarity_extremes():
+    text = words(300, 1)
+    assert sketch_similarity(minhash_sketch(text), minhash_sketch(text)) == 1.0
+    assert sketch_similarity(minhash_sketch(text), minhash_sketch(words(300, 2))) < 0.2
+    assert sketch_similarity((), minhash_sketch(text)) == 0.0
+
+
+def test_estimate_tracks_sequence_ratio():
+    base = words(400, 3).split()
+    for keep in (0.25, 0.5, 0.75):
+        edited = base[:int(len(base) * keep)] + words(int(len(base) * (1 - keep)), 4).split()
+        a, b = ' '.join(base), ' '.join(edited)
+        estimate = sketch_similarity(minhash_sketch(a), minhash_sketch(b))
+        assert estimate == pytest.approx(sequence_ratio(a, b), abs=0.15)
+
+
+def test_fallback_engine_is_configurable(monkeypatch):
+    resume, job = 'python flask developer', 'senior python developer'
+    monkeypatch.setattr(scorer, 'SIMILARITY_FALLBACK', 'sequence')
+    sequence = scorer.calculate_basic_similarity(resume, job)
+    monkeypatch.setattr(scorer, 'SIMILARITY_FALLBACK', 'minhash')
+    minhash = scorer.calculate_basic_similarity(resume, job)
+    assert 0 < minhash <= 1 and 0 < sequence <= 1
+    assert minhash != sequence
+
+
+def test_unknown_fallback_engine_is_rejected(config):
+    class BadConfig(config):
+        SIMILARITY_FALLBACK = 'levenshtein'
+    with pytest.raises(ValueError, match='SIMILARITY_FALLBACK'):
+        create_app(BadConfig)
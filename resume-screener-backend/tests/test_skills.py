@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.skills import (SkillMatcher, combine_scores, evaluate_resume, scoring_fingerprint,
+                        stale_components)
+
+
+def job(required=(), preferred=(), min_experience=0, weights=None, description='Engineer'):
+    return SimpleNamespace(required_skills=list(required), preferred_skills=list(preferred),
+                           min_experience=min_experience, score_weights=weights, description=description)
+
+
+def scan(text, required=(), preferred=()):
+    return SkillMatcher(required, preferred).scan(text)
+
+
+def test_aliases_map_to_canonical_skills():
+    found, _ = scan('Golang, K8s, CPP and Postgres on Amazon Web Services; node.js')
+    assert found == {'go', 'kubernetes', 'c++', 'postgresql', 'aws', 'node.js'}
+
+
+@pytest.mark.parametrize('text', [
+    'I go hiking on weekends',
+    'Internship, spring 2019',
+    'Node 4 of the cluster',
+    'Needed a rest after the launch',
+])
+def test_ordinary_words_are_not_skills(text):
+    found, _ = scan(text)
+    assert not found & {'go', 'spring', 'node.js', 'rest'}
+
+
+def test_job_only_aliases_read_job_lists():
+    matcher = SkillMatcher(['ML', 'Node'], [])
+    assert matcher.required == ['machine learning', 'node.js']
+
+
+def test_experience_from_statements_and_merged_ranges():
+    assert scan('7+ years of Python')[1] == 7.0
+    assert scan('Acme 2012 - 2016\nInitech 2015 to 2018')[1] == 6.0
+    assert scan('5 years total; Acme 2000 - 2002')[1] == 5.0
+
+
+def test_weights_shape_the_match_score():
+    text = 'Python developer, 2 years'
+    skills_heavy = evaluate_resume(text, job(['python'], min_experience=4,
+                                             weights={'skills': 1, 'experience': 0, 'semantic': 0}), 0.1)
+    experience_heavy = evaluate_resume(text, job(['python'], min_experience=4,
+                                                 weights={'skills': 0, 'experience': 1, 'semantic': 0}), 0.1)
+    assert skills_heavy['match_score'] == 1.0
+    assert experience_heavy['match_score'] == 0.5
+
+
+def test_undefined_components_drop_out():
+    result = evaluate_resume('Anything at all', job(), 0.42)
+    assert result['match_score'] == 0.42
+    assert result['score_breakdown']['weights'] == {'semantic': 1.0}
+    assert combine_scores({'skills': None, 'semantic': 0.3}, {'skills': 0, 'semantic': 0}) == (0.3, {'semantic': 1.0})
+
+
+def test_required_skills_outweigh_preferred():
+    posting = job(['python'], ['docker'])
+    required_only = evaluate_resume('Python', posting, 0)['score_breakdown']['skills']
+    preferred_only = evaluate_resume('Docker', posting, 0)['score_breakdown']['skills']
+    assert required_only['score'] == 0.8
+    assert preferred_only['score'] == pytest.approx(0.2)
+    assert required_only['missing_preferred'] == ['docker']
+
+
+def test_fingerprint_marks_only_changed_components():
+    posting = job(['python'])
+    breakdown = evaluate_resume('Python', posting, 0.5)['score_breakdown']
+    posting.score_weights = {'skills': 1}
+    assert stale_components(breakdown, scoring_fingerprint(posting)) == {'weights'}
+    posting.required_skills = ['go']
+    assert stale_components(breakdown, scoring_fingerprint(posting)) == {'weights', 'skills'}
+
+
+def test_job_weights_are_validated(client, headers, job):
+    bad = client.put(f'/api/jobs/{job.id}', json={'score_weights': {'luck': 1}}, headers=headers)
+    assert bad.status_code == 400
+    negative = client.put(f'/api/jobs/{job.id}', json={'score_weights': {'skills': -1}}, headers=headers)
+    assert negative.status_code == 400
+
+    response = client.put(f'/api/jobs/{job.id}', json={'score_weights': {'skills': 1, 'semantic': 1}},
+                          headers=headers)
+    assert response.status_code == 202
+    assert response.get_json()['changed'] == ['weights']
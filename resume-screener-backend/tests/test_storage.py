@@ -0,0 +1,59 @@
+import hashlib
+import io
+import os
+
+from app import storage
+from app.models import BackgroundTask, Candidate, JobPosting, ResumeFile
+from conftest import make_pdf, run_queued, upload
+
+
+def test_files_are_stored_under_their_hash(app):
+    data = b'%PDF-1.4 resume'
+    sha256, path, size = storage.store_file(io.BytesIO(data), app.config['UPLOAD_FOLDER'], '.PDF')
+    assert sha256 == hashlib.sha256(data).hexdigest()
+    assert path == os.path.join(app.config['UPLOAD_FOLDER'], sha256[:2], sha256 + '.pdf')
+    assert size == len(data)
+
+    # Storing it again keeps the one copy
+    assert storage.store_file(io.BytesIO(data), app.config['UPLOAD_FOLDER'], '.pdf') == (sha256, path, size)
+    assert os.listdir(os.path.dirname(path)) == [sha256 + '.pdf']
+
+
+def test_repeat_upload_is_a_duplicate_scored_from_the_stored_extraction(client, headers, job, db):
+    data = make_pdf('Jane Doe\nPython Flask SQL')
+    first = upload(client, headers, job.id, data).get_json()
+    run_queued()
+
+    response = upload(client, headers, job.id, data, filename='copy.pdf')
+    assert response.status_code == 200  # Scored inline, no task queued
+    second = response.get_json()
+    assert second['duplicate'] is True
+    assert second['duplicate_of'] == first['resume_id']
+    assert second['status'] == 'processed'
+
+    assert ResumeFile.query.count() == 1
+    candidates = Candidate.query.order_by(Candidate.id).all()
+    assert candidates[0].file_path == candidates[1].file_path
+    assert candidates[0].match_score == candidates[1].match_score
+    assert BackgroundTask.query.filter_by(kind='process_resume').count() == 1
+
+
+def test_same_file_on_another_job_is_not_a_duplicate(client, headers, job, db):
+    data = make_pdf('Jane Doe\nPython Flask SQL')
+    upload(client, headers, job.id, data)
+    run_queued()
+    other = JobPosting(title='Java', description='Java Spring developer', created_by=job.created_by)
+    db.session.add(other)
+    db.session.commit()
+
+    body = upload(client, headers, other.id, data).get_json()
+    assert (body['duplicate'], body['status']) == (False, 'processed')
+    assert ResumeFile.query.one().extracted_at is not None
+
+
+def test_rejected_file_is_discarded(app, client, headers, job):
+    response = upload(client, headers, job.id, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1legacy word', filename='cv.docx')
+    assert response.status_code == 400
+    assert ResumeFile.query.count() == 0
+    assert not [name for _, _, names in os.walk(app.config['UPLOAD_FOLDER']) for name in names
+                if not name.startswith('.')]
@@ -0,0 +1,82 @@
+import hashlib
+import io
+import os
+
+from app.models import Candidate
+from app.uploads import UploadedPart
+from conftest import make_pdf, make_zip, upload
+
+
+def leftovers(folder):
+    return [name for _, _, names in os.walk(folder) for name in names if name.endswith('.part')]
+
+
+def test_part_is_hashed_while_it_streams(tmp_path):
+    part = UploadedPart(str(tmp_path))
+    for chunk in (b'abc', b'def'):
+        part.write(chunk)
+    assert (part.size, part.hexdigest()) == (6, hashlib.sha256(b'abcdef').hexdigest())
+
+    target = str(tmp_path / 'kept.pdf')
+    part.keep(target)
+    part.close()
+    with open(target, 'rb') as f:
+        assert f.read() == b'abcdef'
+    assert not leftovers(str(tmp_path))
+
+
+def test_oversized_part_is_drained_and_removed(tmp_path):
+    part = UploadedPart(str(tmp_path), max_size=4)
+    part.write(b'abc')
+    part.write(b'defgh')
+    part.write(b'ij')
+    assert (part.too_large, part.size) == (True, 10)
+    part.seek(0)
+    assert part.read() == b''
+    part.close()
+    assert not leftovers(str(tmp_path))
+
+
+def test_upload_streams_into_storage(app, client, headers, job):
+    data = make_pdf('Jane Doe\nPython Flask SQL')
+    assert upload(client, headers, job.id, data).status_code == 202
+    candidate = Candidate.query.one()
+    with open(candidate.file_path, 'rb') as f:
+        assert f.read() == data
+    assert not leftovers(app.config['UPLOAD_FOLDER'])
+
+
+def test_file_over_the_size_limit_is_refused(app, client, headers, job):
+    app.config['MAX_FILE_SIZE'] = 1024
+    response = upload(client, headers, job.id, b'%PDF-1.4' + b'x' * 4096)
+    assert response.status_code == 413
+    assert Candidate.query.count() == 0
+    assert not leftovers(app.config['UPLOAD_FOLDER'])
+
+
+def test_body_over_the_request_limit_is_refused(app, client, headers, job):
+    app.config['MAX_CONTENT_LENGTH'] = 2048
+    response = upload(client, headers, job.id, b'%PDF-1.4' + b'x' * 4096)
+    assert response.status_code == 413
+    assert not leftovers(app.config['UPLOAD_FOLDER'])
+
+
+def test_batch_skips_oversized_files_and_zip_members(app, client, headers, job):
+    small = make_pdf('Jane Doe\nPython')
+    app.config['MAX_FILE_SIZE'] = len(small) + 10
+    big = b'%PDF-1.4' + b'x' * (len(small) * 2)
+    archive = make_zip({'big.pdf': big, 'small.pdf': make_pdf('John Roe\nFlask')})
+    response = client.post(
+        f'/api/jobs/{job.id}/upload/batch',
+        data={'files': [(io.BytesIO(small), 'small.pdf'), (io.BytesIO(big), 'big.pdf'),
+                        (io.BytesIO(archive), 'batch.zip')]},
+        headers=headers,
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 200
+    results = {entry['filename']: entry for entry in response.get_json()['results']}
+    skipped = [entry for entry in response.get_json()['results'] if entry.get('error') == 'File too large']
+    assert [entry['filename'] for entry in skipped] == ['big.pdf', 'big.pdf']
+    assert 'error' not in results['small.pdf']
+    assert Candidate.query.count() == 2
+    assert not leftovers(app.config['UPLOAD_FOLDER'])
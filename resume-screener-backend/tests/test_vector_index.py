@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from app import scorer, vector_index
+from app.job_profile import content_hash
+from app.models import BackgroundTask, Candidate, JobPosting
+from app.vector_index import VectorIndex
+from app.vectors import pack_vector
+from conftest import run_queued
+
+
+def vec(*values):
+    return np.array(values, dtype=np.float32)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return VectorIndex(str(tmp_path / 'index'), 'numpy')
+
+
+def test_search_ranks_by_cosine(index):
+    index.add([(1, vec(1, 0)), (2, vec(1, 1)), (3, vec(0, 1))])
+    results = index.search(vec(2, 0), 2)
+    assert [candidate_id for candidate_id, _ in results] == [1, 2]
+    assert results[0][1] == pytest.approx(1.0)
+    assert [candidate_id for candidate_id, _ in index.search(vec(1, 0), 5, exclude={1})] == [2, 3]
+
+
+def test_add_replaces_and_remove_tombstones(index):
+    index.add([(1, vec(1, 0)), (2, vec(0, 1))])
+    index.add([(1, vec(0, 1))])
+    assert len(index) == 2
+    assert index.search(vec(0, 1), 1)[0][1] == pytest.approx(1.0)
+
+    assert index.remove([2]) == 1
+    assert [candidate_id for candidate_id, _ in index.search(vec(0, 1), 5)] == [1]
+
+
+def test_mismatched_and_zero_vectors_are_skipped(index):
+    assert index.add([(1, vec(1, 0)), (2, vec(1, 0, 0)), (3, vec(0, 0))]) == 1
+    assert len(index) == 1
+    assert index.search(vec(1, 0, 0), 1) == []
+
+
+def test_compaction_rewrites_without_tombstones(index):
+    index.add([(i, vec(1, i)) for i in range(1, 9)])
+    generation = index.read_meta()['generation']
+    index.remove([1, 2, 3])
+    meta = index.read_meta()
+    assert meta['generation'] == generation + 1
+    assert (meta['count'], meta['deleted']) == (5, 0)
+    assert sorted(candidate_id for candidate_id, _ in index.search(vec(1, 1), 10)) == [4, 5, 6, 7, 8]
+
+
+def test_other_processes_see_changes(index):
+    reader = VectorIndex(index.path, 'numpy')
+    index.add([(1, vec(1, 0))])
+    assert len(reader) == 1
+    index.add([(2, vec(0, 1))])
+    index.remove([1])
+    assert [candidate_id for candidate_id, _ in reader.search(vec(1, 1), 5)] == [2]
+
+
+def test_rebuild_replaces_everything(index):
+    index.add([(1, vec(1, 0))])
+    assert index.rebuild([[(2, vec(0, 1)), (3, None)], [(4, vec(1, 1))]]) == 2
+    assert sorted(candidate_id for candidate_id, _ in index.search(vec(1, 1), 5)) == [2, 4]
+
+
+def add_candidate(db, job, vector, resume_file_id=None):
+    candidate = Candidate(job_id=job.id, user_id=job.created_by, status='processed', name='Candidate',
+                          resume_vector=pack_vector(vector), resume_file_id=resume_file_id)
+    db.session.add(candidate)
+    db.session.commit()
+    return candidate
+
+
+def test_suggest_waits_for_the_index_then_ranks_other_jobs_candidates(client, headers, job, db):
+    job.description_hash = content_hash(job.description)
+    job.description_terms = ['python']
+    job.description_vector = pack_vector([1.0, 0.0])
+    other = JobPosting(title='Other', description='Other job', created_by=job.created_by)
+    db.session.add(other)
+    db.session.commit()
+
+    best = add_candidate(db, other, [1.0, 0.1])
+    add_candidate(db, other, [0.1, 1.0])
+    add_candidate(db, job, [1.0, 0.0])  # Already on the job
+
+    response = client.get(f'/api/jobs/{job.id}/suggest?k=5', headers=headers)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
+    assert BackgroundTask.query.filter_by(kind='rebuild_vector_index').count() == 1
+
+    run_queued()
+    body = client.get(f'/api/jobs/{job.id}/suggest?k=5', headers=headers).get_json()
+    assert [result['candidate_id'] for result in body['results']][0] == best.id
+    assert len(body['results']) == 2
+    assert body['backend'] in ('numpy', 'faiss')
+
+    # New candidates are indexed as they are committed
+    newer = add_candidate(db, other, [1.0, 0.0])
+    vector_index.index_candidates([newer.id])
+    body = client.get(f'/api/jobs/{job.id}/suggest?k=1', headers=headers).get_json()
+    assert [result['candidate_id'] for result in body['results']] == [newer.id]
+
+
+def test_suggest_validation(client, headers, job, app):
+    assert client.get(f'/api/jobs/{job.id}/suggest?k=0', headers=headers).status_code == 400
+    too_many = app.config['SUGGEST_MAX_K'] + 1
+    assert client.get(f'/api/jobs/{job.id}/suggest?k={too_many}', headers=headers).status_code == 400
+
+
+@pytest.mark.skipif(scorer.spacy_available(), reason='needs a job without a document vector')
+def test_suggest_needs_document_vectors(client, headers, job):
+    assert client.get(f'/api/jobs/{job.id}/suggest', headers=headers).status_code == 409
@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.vectors import cosine_scores, cosine_similarity, pack_vector, stack_vectors, unpack_vector
+
+
+def test_pack_round_trip():
+    vector = np.array([0.5, -1.25, 3.0])
+    assert unpack_vector(pack_vector(vector)).tolist() == [0.5, -1.25, 3.0]
+    assert pack_vector(None) is None
+    assert unpack_vector(None) is None
+    assert unpack_vector(b'') is None
+
+
+def test_stack_skips_missing_and_mismatched_vectors():
+    blobs = [pack_vector([1, 0]), None, pack_vector([1, 2, 3]), pack_vector([0, 1])]
+    matrix, indices = stack_vectors(blobs)
+    assert indices == [0, 3]
+    assert matrix.shape == (2, 2)
+
+    matrix, indices = stack_vectors([None], dim=4)
+    assert (matrix.shape, indices) == ((0, 4), [])
+
+
+def test_cosine_scores_match_pairwise_similarity():
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(5, 8)).astype(np.float32)
+    matrix[2] = 0
+    vector = rng.normal(size=8)
+    scores = cosine_scores(matrix, vector)
+    expected = [cosine_similarity(row, vector) for row in matrix]
+    assert np.allclose(scores, expected, atol=1e-6)
+    assert scores[2] == 0
+    assert not cosine_scores(matrix, np.zeros(8)).any()
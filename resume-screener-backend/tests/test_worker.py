@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from app.models import BackgroundTask, Candidate
+from app.worker import (TaskRetry, claim_next_task, enqueue, register_task, requeue_stale_tasks,
+                        run_task)
+from conftest import make_pdf, run_queued, upload
+
+
+def test_upload_is_queued_and_scored_by_a_task(client, headers, job, db):
+    response = upload(client, headers, job.id, make_pdf('Jane Doe\nPython Flask SQL developer'))
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status'] == 'queued'
+    assert BackgroundTask.query.filter_by(kind='process_resume', status='queued').count() == 1
+
+    run_queued()
+
+    status = client.get(body['status_url'], headers=headers).get_json()
+    assert status['status'] == 'processed'
+    assert status['match_score'] > 0
+    assert BackgroundTask.query.filter_by(kind='process_resume').one().status == 'done'
+
+
+def test_failed_task_marks_its_candidate_as_error(client, headers, job, db):
+    def fail(task):
+        raise RuntimeError('extractor crashed')
+    register_task('test_failing_resume', fail, failure_handler=lambda task, error: (
+        Candidate.query.filter_by(id=task.candidate_id).update({'status': 'error'})
+    ))
+    candidate = Candidate(job_id=job.id, user_id=job.created_by, status='queued')
+    db.session.add(candidate)
+    db.session.flush()
+    enqueue('test_failing_resume', candidate_id=candidate.id, job_id=job.id)
+    db.session.commit()
+
+    run_queued()
+
+    task = BackgroundTask.query.one()
+    assert (task.status, task.error) == ('error', 'extractor crashed')
+    assert task.finished_at is not None
+    assert db.session.get(Candidate, candidate.id).status == 'error'
+
+
+def test_task_retry_requeues_until_max_attempts(app, db):
+    app.config['WORKER_MAX_ATTEMPTS'] = 2
+    register_task('test_retrying', lambda task: (_ for _ in ()).throw(TaskRetry('busy')))
+    enqueue('test_retrying')
+    db.session.commit()
+
+    run_task(claim_next_task())
+    task = BackgroundTask.query.one()
+    assert (task.status, task.attempts, task.error) == ('queued', 1, 'busy')
+
+    run_task(claim_next_task())
+    db.session.refresh(task)
+    assert (task.status, task.attempts) == ('error', 2)
+    assert claim_next_task() is None
+
+
+def test_unknown_kind_fails(db):
+    enqueue('no_such_kind')
+    db.session.commit()
+    run_task(claim_next_task())
+    task = BackgroundTask.query.one()
+    assert task.status == 'error'
+    assert 'no_such_kind' in task.error
+
+
+def test_tasks_are_claimed_once_in_order(db):
+    first = enqueue('no_such_kind')
+    second = enqueue('no_such_kind')
+    db.session.commit()
+    assert claim_next_task().id == first.id
+    assert claim_next_task().id == second.id
+    assert claim_next_task() is None
+
+
+def test_stale_tasks_are_requeued_or_failed(db):
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    fresh = BackgroundTask(kind='k', status='processing', attempts=1, started_at=datetime.utcnow())
+    stale = BackgroundTask(kind='k', status='processing', attempts=1, started_at=long_ago)
+    exhausted = BackgroundTask(kind='k', status='processing', attempts=3, started_at=long_ago)
+    db.session.add_all([fresh, stale, exhausted])
+    db.session.commit()
+
+    assert requeue_stale_tasks(stale_seconds=60, max_attempts=3) == (1, 1)
+
+    db.session.expire_all()
+    assert fresh.status == 'processing'
+    assert stale.status == 'queued'
+    assert exhausted.status == 'error'
+    assert exhausted.error == 'Gave up after 3 attempts'
@@ -1,8 +1,9 @@
 from app import create_app, db
+from config import ScriptConfig
 from app.models import JobPosting, Candidate
 
 def update_database():
-    app = create_app()
+    app = create_app(ScriptConfig)
     with app.app_context():
         # Update existing JobPosting records with default values
         JobPosting.query.update({
@@ -6,6 +6,21 @@ import { Label } from './ui/label';
 import { Upload, FileText, CheckCircle, AlertCircle } from 'lucide-react';
 import apiClient from '../services/api';
 
+const POLL_INTERVAL_MS = 1000;
+const MAX_POLLS = 120;
+
+// Scoring happens in the background; poll until the resume leaves the queue
+const waitForScoring = async (resumeId) => {
+  for (let attempt = 0; attempt < MAX_POLLS; attempt++) {
+    const { data } = await apiClient.get(`/resumes/${resumeId}/status`);
+    if (data.status === 'processed' || data.status === 'error') {
+      return data;
+    }
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+  throw new Error('Timed out waiting for the resume to be scored.');
+};
+
 function ResumeUploadForm({ jobId, onUploadSuccess }) {
   const [file, setFile] = useState(null);
   const [isUploading, setIsUploading] = useState(false);
@@ -40,7 +55,12 @@ function ResumeUploadForm({ jobId, onUploadSuccess }) {
         },
       });
 
-      const { match_score, name } = response.data;
+      const result = await waitForScoring(response.data.resume_id);
+      if (result.status === 'error') {
+        throw new Error(result.error || 'Failed to process resume.');
+      }
+
+      const { match_score, name } = result;
       const scorePercentage = Math.round(match_score * 100);
       
       setMessage(`Successfully uploaded ${name || file.name}! Match score: ${scorePercentage}%`);
@@ -56,7 +76,7 @@ function ResumeUploadForm({ jobId, onUploadSuccess }) {
       }
     } catch (error) {
       console.error('Upload error:', error);
-      setMessage(error.response?.data?.error || 'Failed to upload resume.');
+      setMessage(error.response?.data?.error || error.message || 'Failed to upload resume.');
       setMessageType('error');
     } finally {
       setIsUploading(false);